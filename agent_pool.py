@@ -0,0 +1,111 @@
+"""
+Pool of pre-built autogen agent sets.
+
+Building agents means loading prompt resources, creating OpenAI clients and
+registering reply functions; the web server would otherwise pay that on every
+request. The pool builds agent sets up front, hands one to each request, and
+resets it (chat history, usage, attached budgets) before it is reused.
+
+Everything a request leaves on its agents is scoped to that request: the reset
+clears it, and retained_messages() lets tests confirm nothing survived. A set
+is rebuilt after max_uses requests, which bounds any growth the reset cannot
+reach (library caches, client connection state) in a long-running server.
+"""
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, Sequence
+
+from budget import ProposalBudget
+
+logger = logging.getLogger(__name__)
+
+
+def reset_agents(agents: Sequence):
+    """Return agents to their freshly built state"""
+    for agent in agents:
+        agent.reset()
+        client = getattr(agent, "client", None)
+        if client is not None:
+            client.clear_usage_summary()
+        groupchat = getattr(agent, "groupchat", None)
+        if groupchat is not None:
+            groupchat.reset()
+    ProposalBudget.detach_autogen(agents)
+
+
+def retained_messages(agents: Sequence) -> int:
+    """Messages still held by the agents (and their group chats); 0 after a clean reset"""
+    total = 0
+    for agent in agents:
+        total += sum(len(messages) for messages in getattr(agent, "chat_messages", {}).values())
+        groupchat = getattr(agent, "groupchat", None)
+        if groupchat is not None:
+            total += len(groupchat.messages)
+    return total
+
+
+class AgentPool:
+    def __init__(self, factory: Callable[[], Sequence], size: int = 2,
+                 reset: Callable[[Sequence], None] = reset_agents, max_uses: Optional[int] = None):
+        self.factory = factory
+        self.size = size
+        self.reset = reset
+        self.max_uses = max_uses
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._uses = {}  # id(agent set) -> requests served
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "recycled": 0, "build_seconds": 0.0}
+
+    def _build(self):
+        start = time.perf_counter()
+        agents = self.factory()
+        with self._lock:
+            self.stats["created"] += 1
+            self.stats["build_seconds"] += time.perf_counter() - start
+        return agents
+
+    def warm(self):
+        """Fill the pool so the first requests don't pay construction cost"""
+        start = time.perf_counter()
+        while not self._idle.full():
+            try:
+                self._idle.put_nowait(self._build())
+            except queue.Full:
+                break
+        logger.info(f"Agent pool warmed with {self._idle.qsize()} agent sets in {time.perf_counter() - start:.2f}s")
+
+    @contextmanager
+    def agents(self):
+        """Borrow an agent set; one is built on demand when the pool is empty"""
+        try:
+            agents = self._idle.get_nowait()
+            with self._lock:
+                self.stats["reused"] += 1
+        except queue.Empty:
+            agents = self._build()
+
+        try:
+            yield agents
+        finally:
+            with self._lock:
+                uses = self._uses.pop(id(agents), 0) + 1
+            self._release(agents, uses)
+
+    def _release(self, agents, uses: int):
+        if self.max_uses and uses >= self.max_uses:
+            # Dropped rather than reset; the next borrower builds a fresh set
+            with self._lock:
+                self.stats["recycled"] += 1
+            return
+        try:
+            self.reset(agents)
+            self._idle.put_nowait(agents)
+            with self._lock:
+                self._uses[id(agents)] = uses
+        except queue.Full:
+            pass  # more sets were built under load than the pool keeps
+        except Exception as e:
+            logger.warning(f"Discarding agent set that failed to reset: {e}")
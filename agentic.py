@@ -1,19 +1,57 @@
-from autogen import AssistantAgent, UserProxyAgent
+from functools import lru_cache
 import os
 
-# Load design standards and sample template
-with open("sample_proposal.txt", "r") as f:
-    sample_proposal = f.read()
+# Directory holding sample_proposal.txt and design_standards.md
+REFERENCE_DIR = os.getenv("PROPOSAL_REFERENCE_DIR", ".")
 
-with open("design_standards.md", "r") as f:
-    design_standards = f.read()
 
-def generate_proposal(requirements):
-    llm_config = {
+@lru_cache(maxsize=None)
+def load_reference_documents():
+    """Load design standards and sample template once, on first use"""
+    with open(os.path.join(REFERENCE_DIR, "sample_proposal.txt"), "r") as f:
+        sample_proposal = f.read()
+
+    with open(os.path.join(REFERENCE_DIR, "design_standards.md"), "r") as f:
+        design_standards = f.read()
+
+    return sample_proposal, design_standards
+
+
+@lru_cache(maxsize=None)
+def writer_system_message():
+    """
+    The writer's system message, built once per process.
+
+    It embeds both reference documents, so every pooled agent set shares this
+    one string instead of holding its own copy.
+    """
+    sample_proposal, design_standards = load_reference_documents()
+    return (
+        "You are a proposal writer. Use the following design standards:\n\n"
+        f"{design_standards}\n\n"
+        "and follow the structure from this template:\n\n"
+        f"{sample_proposal}\n\n"
+        "Incorporate answers from the client and cost corrections to generate the final proposal."
+    )
+
+
+# Quality gate rules the CostValidator reviews; other failing sections go back to the writer
+COST_RULES = {"cost_line", "cost_total", "effort_not_numeric", "unknown_role", "unknown_license"}
+
+
+def default_llm_config():
+    return {
         "config_list": [{"model": "gpt-4", "api_key": os.getenv("OPENAI_API_KEY")}],
         "timeout": 180,
     }
 
+
+def create_agents(llm_config=None):
+    """Build the clarifier, cost validator, writer and client proxy agents"""
+    from autogen import AssistantAgent, UserProxyAgent
+
+    llm_config = llm_config or default_llm_config()
+
     # Step 1: Ask for clarifications
     question_agent = AssistantAgent(
         name="ScopeClarifier",
@@ -32,25 +70,56 @@ def generate_proposal(requirements):
     writer_agent = AssistantAgent(
         name="ProposalWriter",
         llm_config=llm_config,
-        system_message=(
-            "You are a proposal writer. Use the following design standards:\n\n"
-            f"{design_standards}\n\n"
-            "and follow the structure from this template:\n\n"
-            f"{sample_proposal}\n\n"
-            "Incorporate answers from the client and cost corrections to generate the final proposal."
-        )
+        system_message=writer_system_message()
     )
 
     # User proxy
     user_proxy = UserProxyAgent(name="Client", human_input_mode="ALWAYS")
 
-    # Phase 1 - Clarify
-    user_proxy.initiate_chat(question_agent, message=f"Client brief:\n{requirements}")
+    return question_agent, estimator_agent, writer_agent, user_proxy
+
+
+def generate_proposal(requirements, budget=None, agents=None, resources=None, licenses=None):
+    """
+    Run the three-phase flow, on pre-built (e.g. pooled) agents when given.
+
+    With a structured resource plan (role and days per activity) the costs are
+    computed by the cost engine. The written proposal then goes through the
+    quality gate, and only sections that fail its checks are reviewed again by
+    an agent (the CostValidator for cost and effort findings).
+    """
+    question_agent, estimator_agent, writer_agent, user_proxy = agents or create_agents()
+
+    if budget:
+        budget.attach_autogen([question_agent, estimator_agent, writer_agent])
 
-    # Phase 2 - Cost sanity check
-    user_proxy.initiate_chat(estimator_agent, message="Here is the draft proposal. Please check the cost estimates for accuracy.")
+    # Phase 1 - Costs: computed when structured, otherwise checked by the quality gate below.
+    # They are computed first so that invalid amounts are rejected before any LLM call.
+    final_message = "Generate the full final proposal incorporating everything."
+    if resources:
+        from cost_engine import CostEngine
+
+        engine = CostEngine()
+        costs = engine.to_markdown(engine.estimate(resources, licenses))
+        final_message += f"\n\nUse these computed costs exactly as given:\n\n{costs}"
+
+    # Phase 2 - Clarify
+    user_proxy.initiate_chat(question_agent, message=f"Client brief:\n{requirements}")
 
     # Phase 3 - Final generation
-    user_proxy.initiate_chat(writer_agent, message="Generate the full final proposal incorporating everything.")
+    user_proxy.initiate_chat(writer_agent, message=final_message)
+    proposal = user_proxy.last_message(writer_agent)["content"]
+
+    # Phase 4 - Review: rule checks run locally; only failing sections go back to an agent
+    from quality_gate import format_findings, review_sections
+
+    def review(section, text, findings):
+        reviewer = estimator_agent if any(f["rule"] in COST_RULES for f in findings) else writer_agent
+        user_proxy.initiate_chat(reviewer, message=(
+            f"Correct the '{section}' section of the proposal. Fix these findings and reply with "
+            f"the corrected section content only, without its heading:\n{format_findings(findings)}\n\n{text}"
+        ))
+        return user_proxy.last_message(reviewer)["content"]
 
-    return user_proxy.last_message()["content"]
+    proposal, _ = review_sections(proposal, review)
+    return proposal
@@ -1,8 +1,26 @@
+import os
+
 from flask import Flask, request, jsonify, send_from_directory
-from agentic_ai import generate_proposal
+from agent_pool import AgentPool
+from agentic import create_agents, generate_proposal
+from budget import SERVER_MAX_REPORTS, ProposalBudget
+from cost_engine import InvalidAmountError
+from llm_scheduler import INTERACTIVE, PRIORITIES, QuotaExceededError, shared_scheduler, tenant_scope
+from proposal_store import DEFAULT_LIMIT, save_quietly, shared_store, text_sections
 
 app = Flask(__name__, static_folder='static')
 
+# "autogen" (default) or "crew" for the CrewAI analyst/architect/writer pipeline
+BACKEND = os.getenv('PROPOSAL_BACKEND', 'autogen')
+
+# Agent sets are built once at startup and reset between requests
+agent_pool = AgentPool(create_agents, size=int(os.getenv('AGENT_POOL_SIZE', '2')),
+                       max_uses=int(os.getenv('AGENT_POOL_MAX_USES', '500')) or None)
+if BACKEND == 'autogen':
+    # Every autogen LLM call in this process is queued fairly per tenant
+    shared_scheduler().install_autogen()
+    agent_pool.warm()
+
 @app.route('/')
 def index():
     return send_from_directory('static', 'index.html')
@@ -15,11 +33,53 @@ def generate():
     if not requirements.strip():
         return jsonify({'error': 'Requirements are required'}), 400
 
+    budget = ProposalBudget.from_env(max_reports=SERVER_MAX_REPORTS)
+    priority = PRIORITIES.get(request.headers.get('X-Priority', '').lower(), INTERACTIVE)
     try:
-        proposal = generate_proposal(requirements)
-        return jsonify({'proposal': proposal})
+        with tenant_scope(request.headers.get('X-Tenant'), priority):
+            proposal = _generate(requirements, data, budget)
+        proposal_id = save_quietly(text_sections(proposal),
+                                   customer=data.get('customer') or '', project=requirements, source=f'app:{BACKEND}')
+        return jsonify({'proposal': proposal, 'id': proposal_id})
+    except QuotaExceededError as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': f'{e.retry_after:.0f}'}
+    except InvalidAmountError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        budget.write_report()
+
+def _generate(requirements, data, budget):
+    if BACKEND == 'crew':
+        from crew_backend import generate_crew_proposal
+        return generate_crew_proposal(requirements, budget=budget, scheduler=shared_scheduler())
+    with agent_pool.agents() as agents:
+        return generate_proposal(requirements, budget=budget, agents=agents,
+                                 resources=data.get('resources'), licenses=data.get('licenses'))
+
+@app.route('/scheduler', methods=['GET'])
+def scheduler_report():
+    return jsonify({'tenants': shared_scheduler().report()})
+
+@app.route('/proposals', methods=['GET'])
+def search_proposals():
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    return jsonify({'results': shared_store().search(request.args.get('q', ''), limit)})
+
+@app.route('/proposals/<proposal_id>', methods=['GET'])
+def get_proposal(proposal_id):
+    store = shared_store()
+    etag = store.etag(proposal_id)
+    if etag is None:
+        return jsonify({'error': 'Proposal not found'}), 404
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(store.get(proposal_id))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
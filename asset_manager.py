@@ -0,0 +1,151 @@
+"""
+Image assets for generated documents.
+
+Diagrams and logos are embedded over and over: the same picture in several
+places of one proposal and the same logo in every proposal of a batch.
+AssetManager prepares each image once, downsampled to the target DPI for the
+width it is displayed at, and keeps the processed bytes in memory across
+documents. Within a document every distinct image is stored as a single media
+part; repeat inserts reuse its relationship instead of re-reading, re-hashing
+and scanning the package for a match.
+
+Downsampling needs Pillow; without it images are embedded unchanged.
+"""
+import hashlib
+import io
+import logging
+import math
+import threading
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EMU_PER_INCH = 914400
+DEFAULT_DPI = 150
+JPEG_QUALITY = 85
+
+
+@lru_cache(maxsize=None)
+def _load_pil():
+    try:
+        from PIL import Image
+    except ImportError:
+        logger.info("Pillow not installed; images are embedded without downsampling")
+        return None
+    return Image
+
+
+def _read_image(image) -> bytes:
+    """Accept a path, raw bytes or a binary file-like object"""
+    if isinstance(image, bytes):
+        return image
+    if hasattr(image, "read"):
+        image.seek(0)
+        return image.read()
+    with open(image, "rb") as f:
+        return f.read()
+
+
+class AssetManager:
+    def __init__(self, target_dpi: int = DEFAULT_DPI, max_entries: int = 128):
+        self.target_dpi = target_dpi
+        self.max_entries = max_entries
+        # (source sha256, target width px) -> (processed bytes, processed sha256), LRU ordered
+        self._processed: "OrderedDict[Tuple[str, Optional[int]], Tuple[bytes, str]]" = OrderedDict()
+        # document part -> processed sha256 -> (rId, docx Image); dropped with the document
+        self._parts = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "inserted": 0,
+            "reused_parts": 0,
+            "cache_hits": 0,
+            "downsampled": 0,
+            "bytes_saved": 0,
+        }
+
+    def target_width_px(self, width_emu: Optional[int]) -> Optional[int]:
+        if not width_emu:
+            return None
+        return math.ceil(width_emu / EMU_PER_INCH * self.target_dpi)
+
+    def prepare(self, data: bytes, width_emu: Optional[int] = None) -> Tuple[bytes, str]:
+        """Return (bytes, sha256) of the image as it should be embedded at the given width"""
+        target_px = self.target_width_px(width_emu)
+        key = (hashlib.sha256(data).hexdigest(), target_px)
+        with self._lock:
+            cached = self._processed.get(key)
+            if cached is not None:
+                self._processed.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return cached
+
+        processed = self._downsample(data, target_px)
+        entry = (processed, key[0] if processed is data else hashlib.sha256(processed).hexdigest())
+        with self._lock:
+            self._processed[key] = entry
+            while len(self._processed) > self.max_entries:
+                self._processed.popitem(last=False)
+        return entry
+
+    def _downsample(self, data: bytes, target_px: Optional[int]) -> bytes:
+        Image = _load_pil()
+        if Image is None or not target_px:
+            return data
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                if img.width <= target_px:
+                    return data
+                fmt = img.format
+                height = max(1, round(img.height * target_px / img.width))
+                resized = img.resize((target_px, height), Image.LANCZOS)
+                out = io.BytesIO()
+                dpi = (self.target_dpi, self.target_dpi)
+                if fmt == "JPEG":
+                    resized.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, dpi=dpi)
+                else:
+                    if resized.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+                        resized = resized.convert("RGBA")
+                    resized.save(out, "PNG", optimize=True, dpi=dpi)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not downsample image, embedding it unchanged: {e}")
+            return data
+
+        processed = out.getvalue()
+        if len(processed) >= len(data):
+            return data
+        with self._lock:
+            self.stats["downsampled"] += 1
+            self.stats["bytes_saved"] += len(data) - len(processed)
+        return processed
+
+    def add_picture(self, document, image, width=None, height=None):
+        """Drop-in for Document.add_picture: adds the image in a new paragraph and returns the InlineShape"""
+        from docx.oxml.shape import CT_Inline
+        from docx.shape import InlineShape
+
+        data, digest = self.prepare(_read_image(image), int(width) if width else None)
+        run = document.add_paragraph().add_run()
+        part = run.part
+
+        images = self._parts.setdefault(part, {})
+        if digest in images:
+            rId, docx_image = images[digest]
+            self.stats["reused_parts"] += 1
+        else:
+            rId, docx_image = part.get_or_add_image(io.BytesIO(data))
+            images[digest] = (rId, docx_image)
+
+        cx, cy = docx_image.scaled_dimensions(width, height)
+        inline = CT_Inline.new_pic_inline(part.next_id, rId, docx_image.filename, cx, cy)
+        run._r.add_drawing(inline)
+        self.stats["inserted"] += 1
+        return InlineShape(inline)
+
+
+@lru_cache(maxsize=None)
+def shared_assets() -> AssetManager:
+    """Process-wide manager, so processed images are reused across every document built here"""
+    return AssetManager()
@@ -0,0 +1,243 @@
+"""
+Batch proposal generation.
+
+Reads customer/project contexts from a CSV or JSONL file and generates one
+proposal per row across a process pool. Each result is written to its own
+.docx; LLM calls from all workers share one global rate limit.
+
+    python batch.py contexts.csv --output-dir proposals --workers 4 --calls-per-minute 300
+    python batch.py contexts.csv --output-dir proposals --retry-failed
+    python batch.py contexts.csv --backend crew
+
+Each row needs ``customer`` and ``project`` columns and may set an ``id``. A row
+with an ``rfp`` path is ingested first (see rfp_ingest.py): its requirements
+table is written in the Customer Requirements section's place (replacing the
+generated one) and its brief goes into every section prompt.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from typing import Dict, List
+
+SUMMARY_FILE = "batch_summary.json"
+
+
+class RateLimiter:
+    """
+    Spaces LLM calls evenly across every worker process.
+
+    The next free call slot lives in shared memory, so each reservation is a
+    short critical section; callers then wait for their slot outside the lock.
+    """
+
+    def __init__(self, calls_per_minute: float):
+        self.interval = 60.0 / calls_per_minute
+        self._next_slot = multiprocessing.Value('d', 0.0, lock=False)
+        self._lock = multiprocessing.Lock()
+
+    def reserve(self) -> float:
+        """Claim the next call slot and return how many seconds to wait for it"""
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        return slot - now
+
+    def acquire(self):
+        time.sleep(self.reserve())
+
+
+# Set in each worker process by init_worker
+_rate_limiter = None
+
+
+def init_worker(rate_limiter):
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+
+def load_contexts(path: str) -> List[Dict[str, str]]:
+    """Load rows from a .csv or .jsonl file and give each one a stable id"""
+    with open(path, newline='') as f:
+        if path.endswith('.jsonl'):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    for index, row in enumerate(rows, start=1):
+        missing = [key for key in ('customer', 'project') if not row.get(key)]
+        if missing:
+            raise ValueError(f"Row {index} of {path} is missing {', '.join(missing)}")
+        if not row.get('id'):
+            slug = re.sub(r'[^a-z0-9]+', '-', row['customer'].lower()).strip('-')
+            row['id'] = f"{index:04d}-{slug}"
+    return rows
+
+
+def requirements_text(rfp: Dict) -> str:
+    """The ingested requirements as the stored text of the Customer Requirements section"""
+    return "\n".join(f"{r['id']} ({r['priority']}): {r['description']}" for r in rfp['requirements'])
+
+
+def generate_one(context: Dict[str, str], output_dir: str, backend: str = "orchestrator") -> Dict:
+    """Worker entry point; failures are returned, not raised, so they can be retried"""
+    from budget import ProposalBudget
+    from llm_scheduler import shared_scheduler
+    from proposal_store import save_quietly
+    from document_generator import ProposalDocumentGenerator
+
+    start = time.perf_counter()
+    result = {"id": context['id'], "context": context}
+    try:
+        budget = ProposalBudget.from_env(run_id=context['id'], reports_dir=os.path.join(output_dir, "reports"))
+        generator = ProposalDocumentGenerator()
+        generator.add_title_page(context['project'], context['customer'], date.today().isoformat())
+        generator.add_table_of_contents()
+
+        rfp, prompt_context = None, context
+        if context.get('rfp'):
+            from rfp_ingest import ingest_rfp
+
+            rfp = ingest_rfp(context['rfp'], budget=budget, rate_limiter=_rate_limiter, scheduler=shared_scheduler())
+            # The brief stands in for the one-line project description in every prompt
+            prompt_context = {**context, 'project': f"{context['project']}\n\n{rfp['brief']}"}
+
+        def write_requirements(level=1):
+            """Write the ingested requirements table where the requirements section belongs"""
+            generator.add_requirements_table(rfp['requirements'], level=level)
+            return requirements_text(rfp)
+
+        if backend == "crew":
+            from crew_backend import PROPOSAL_SECTION, CrewProposalBackend
+            from streaming import SectionStreamParser
+
+            sections = CrewProposalBackend(prompt_context, budget=budget, rate_limiter=_rate_limiter,
+                                          scheduler=shared_scheduler()).generate_proposal()
+            # The writer's own requirements section gives way to the ingested table
+            replace = {"requirement": write_requirements} if rfp else None
+            parser = SectionStreamParser(generator, PROPOSAL_SECTION, replace=replace)
+            parser.feed(sections[PROPOSAL_SECTION])
+            parser.close()
+            if rfp:
+                sections["Customer Requirements"] = requirements_text(rfp)
+        else:
+            from proposal_generator_agent import AsyncProposalOrchestrator
+            from streaming import stream_proposal_into
+
+            # Sections are written into the document while they stream in; with an RFP the
+            # requirements table takes the Customer Requirements slot instead of an LLM section
+            orchestrator = AsyncProposalOrchestrator(prompt_context, budget=budget, rate_limiter=_rate_limiter,
+                                                     scheduler=shared_scheduler())
+            fixed = {"Customer Requirements": write_requirements} if rfp else None
+            sections = asyncio.run(stream_proposal_into(orchestrator, generator, fixed=fixed))
+
+        output_path = os.path.join(output_dir, f"{context['id']}.docx")
+        generator.save(output_path)
+        budget.write_report()
+        proposal_id = save_quietly(sections, customer=context['customer'], project=context['project'],
+                                   source=f"batch:{backend}", document_path=os.path.abspath(output_path))
+        result.update(status="ok", path=output_path, proposal_id=proposal_id, tokens=budget.total_tokens,
+                      cost=budget.cost)
+    except Exception as e:
+        result.update(status="failed", error=f"{type(e).__name__}: {e}")
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+def run_batch(contexts: List[Dict[str, str]], output_dir: str, workers: int,
+              calls_per_minute: float, retries: int, backend: str = "orchestrator") -> Dict[str, Dict]:
+    os.makedirs(output_dir, exist_ok=True)
+    rate_limiter = RateLimiter(calls_per_minute)
+    results: Dict[str, Dict] = {}
+    pending = list(contexts)
+    total = len(contexts)
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(rate_limiter,)) as pool:
+        for attempt in range(1, retries + 2):
+            if not pending:
+                break
+            if attempt > 1:
+                print(f"\nRetrying {len(pending)} failed item(s), attempt {attempt}...")
+
+            futures = [pool.submit(generate_one, context, output_dir, backend) for context in pending]
+            pending = []
+            for future in as_completed(futures):
+                result = future.result()
+                result["attempts"] = attempt
+                results[result["id"]] = result
+                if result["status"] != "ok":
+                    pending.append(result["context"])
+
+                done = sum(1 for r in results.values() if r["status"] == "ok")
+                rate = done / (time.perf_counter() - start) * 60
+                detail = result.get("path") or result.get("error")
+                print(f"[{done}/{total}] {result['id']} {result['status']} ({result['seconds']}s) "
+                      f"{detail} | {rate:.1f} proposals/min")
+
+    return results
+
+
+def write_summary(results: Dict[str, Dict], output_dir: str, elapsed: float) -> str:
+    succeeded = [r for r in results.values() if r["status"] == "ok"]
+    summary = {
+        "total": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "elapsed_seconds": round(elapsed, 2),
+        "proposals_per_minute": round(len(succeeded) / elapsed * 60, 2) if elapsed else 0,
+        "total_tokens": sum(r.get("tokens", 0) for r in succeeded),
+        "total_cost_usd": round(sum(r.get("cost", 0.0) for r in succeeded), 6),
+        "items": sorted(results.values(), key=lambda r: r["id"]),
+    }
+    path = os.path.join(output_dir, SUMMARY_FILE)
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate proposals for every row of a CSV/JSONL file")
+    parser.add_argument("input", help="CSV or JSONL file with customer and project columns")
+    parser.add_argument("--output-dir", default="proposals")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--calls-per-minute", type=float, default=300.0,
+                        help="global LLM call rate shared by all workers")
+    parser.add_argument("--retries", type=int, default=2, help="times to retry a failed item")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="only run items that failed in the previous summary in --output-dir")
+    parser.add_argument("--backend", choices=["orchestrator", "crew"], default="orchestrator",
+                        help="agent pipeline that writes the proposals")
+    args = parser.parse_args()
+
+    contexts = load_contexts(args.input)
+    previous = {}
+    if args.retry_failed:
+        with open(os.path.join(args.output_dir, SUMMARY_FILE)) as f:
+            previous = {item["id"]: item for item in json.load(f)["items"]}
+        contexts = [c for c in contexts if previous.get(c['id'], {}).get("status") != "ok"]
+        print(f"Retrying {len(contexts)} item(s) that did not succeed previously")
+
+    start = time.perf_counter()
+    results = run_batch(contexts, args.output_dir, args.workers, args.calls_per_minute, args.retries,
+                        args.backend)
+    elapsed = time.perf_counter() - start
+
+    # Keep earlier successes in the summary so it always describes the whole batch
+    results = {**previous, **results}
+    path = write_summary(results, args.output_dir, elapsed)
+    failed = [r["id"] for r in results.values() if r["status"] != "ok"]
+    print(f"\n{len(results) - len(failed)}/{len(results)} proposals generated in {elapsed:.1f}s. Summary: {path}")
+    if failed:
+        print(f"Failed: {', '.join(failed)}. Re-run with --retry-failed to retry them.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Cross-backend benchmark: the same briefs through every proposal pipeline.
+
+Starts benchmarks/mock_llm.py once, then runs each backend in its own
+interpreter against it:
+
+    main_chat         main.py's section-by-section group chat
+    group_chat        proposal_generator.py's eight-agent group chat
+    agentic           agentic.py's clarify / cost check / write phases
+    orchestrator      ProposalOrchestrator (one call per section)
+    async_orchestrator  AsyncProposalOrchestrator (sections concurrently)
+    crew              crew_backend.CrewProposalBackend (when crewai is installed)
+
+LLM calls and prompt/completion tokens are counted by the mock server, so
+every backend is measured the same way. Wall time and peak RSS come from the
+backend's own process. Human turns are simulated: the user proxies never ask
+for input and agentic.py's client accepts each phase's first answer. autogen's
+response cache is disabled so every run is cold.
+
+    python benchmarks/bench_backends.py --briefs 3 --latency 0.2
+    python benchmarks/bench_backends.py --backends agentic orchestrator --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+BRIEFS = [
+    {"customer": "ACME Corp", "project": "ZTNA functionality for the Fiori web browser",
+     "requirements": "Zero-trust access to SAP Fiori for 2,000 remote users, SSO with Entra ID, go-live in Q3."},
+    {"customer": "Globex", "project": "Customer service chatbot",
+     "requirements": "Chatbot integrated with the existing CRM, 10k conversations a day, GDPR compliant."},
+    {"customer": "Initech", "project": "Data platform migration",
+     "requirements": "Move the on-premises data warehouse to Azure, 40 TB, nightly loads, Power BI reporting."},
+]
+
+
+def brief_text(brief):
+    return "\n".join(f"{key.title()}: {value}" for key, value in brief.items())
+
+
+def config_list(model):
+    # cache_seed=None turns off autogen's disk cache, which would replay earlier runs
+    return [{"model": model, "api_key": os.environ["OPENAI_API_KEY"], "cache_seed": None}]
+
+
+# Backend runners: each generates one proposal in this process and returns the number of failed sections
+
+def run_main_chat(brief):
+    import main
+
+    agents = main.create_agents(config_list("gpt-4-turbo-preview"))
+    user_proxy = agents[0]
+    user_proxy.human_input_mode = "NEVER"
+    manager, termination, collected = main.create_section_chat(agents, config_list("gpt-4-turbo-preview"))
+    for section_name, section_prompt in main.SECTIONS.items():
+        collected.expect([section_name])
+        termination.begin(section_name)
+        main.work_on_section(manager, user_proxy, section_name, f"{brief_text(brief)}\n{section_prompt}")
+        termination.end()
+    return 0
+
+
+def run_group_chat(brief):
+    import proposal_generator
+
+    proposal_generator.config_list[0].update(config_list(proposal_generator.config_list[0]["model"])[0])
+    agents = proposal_generator.create_agents(proposal_generator.config_list)
+    user_proxy = agents[0]
+    user_proxy.human_input_mode = "NEVER"
+    manager = proposal_generator.create_group_chat(agents)
+    user_proxy.initiate_chat(manager, message=f"I need an IT project proposal.\n\n{brief_text(brief)}")
+    return 0
+
+
+def run_agentic(brief):
+    import agentic
+
+    llm_config = {**agentic.default_llm_config(), "config_list": config_list("gpt-4")}
+    agents = agentic.create_agents(llm_config)
+    user_proxy = agents[-1]
+    user_proxy.human_input_mode = "NEVER"
+    user_proxy.update_max_consecutive_auto_reply(0)
+    agentic.generate_proposal(brief_text(brief), agents=agents)
+    return 0
+
+
+def count_failed(sections):
+    return sum(1 for content in sections.values() if str(content).startswith("Error generating content"))
+
+
+def run_orchestrator(brief):
+    from proposal_generator_agent import ProposalOrchestrator
+
+    return count_failed(ProposalOrchestrator(brief).generate_proposal())
+
+
+def run_async_orchestrator(brief):
+    from proposal_generator_agent import AsyncProposalOrchestrator
+
+    return count_failed(asyncio.run(AsyncProposalOrchestrator(brief).generate_proposal()))
+
+
+def run_crew(brief):
+    from crew_backend import CrewProposalBackend
+
+    CrewProposalBackend(brief).generate_proposal()
+    return 0
+
+
+BACKENDS = {
+    "main_chat": run_main_chat,
+    "group_chat": run_group_chat,
+    "agentic": run_agentic,
+    "orchestrator": run_orchestrator,
+    "async_orchestrator": run_async_orchestrator,
+    "crew": run_crew,
+}
+
+
+def run_child(backend, count):
+    """Child process: run one backend over the briefs and print its measurements as JSON"""
+    sys.path.insert(0, REPO_DIR)
+    os.chdir(REPO_DIR)
+    runner = BACKENDS[backend]
+    failed_sections = 0
+    errors = []
+    start = time.perf_counter()
+    # Output from the agents would swamp the table
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            for brief in BRIEFS[:count]:
+                try:
+                    failed_sections += runner(brief)
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+        finally:
+            sys.stdout = stdout
+    print(json.dumps({
+        "wall_seconds": time.perf_counter() - start,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "failed_sections": failed_sections,
+        "errors": errors,
+    }))
+
+
+def wait_until_ready(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def run_backend(backend, count, mock_url, env, timeout):
+    httpx.post(f"{mock_url}/reset")
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", backend, "--briefs", str(count)],
+            cwd=REPO_DIR, env=env, capture_output=True, text=True, timeout=timeout,
+        )
+        lines = completed.stdout.strip().splitlines()
+        result = json.loads(lines[-1]) if completed.returncode == 0 and lines else {
+            "errors": [(completed.stderr.strip().splitlines() or ["no output"])[-1]],
+        }
+    except subprocess.TimeoutExpired:
+        result = {"errors": [f"timed out after {timeout:.0f}s"]}
+    result.update(backend=backend, briefs=count, **httpx.get(f"{mock_url}/stats").json())
+    return result
+
+
+def print_table(results):
+    print(f"{'backend':<19} {'calls':>6} {'calls/brief':>11} {'prompt tok':>11} {'compl tok':>10} "
+          f"{'wall (s)':>9} {'s/brief':>8} {'peak RSS MB':>12}  errors")
+    for r in results:
+        briefs = r["briefs"] or 1
+        wall = r.get("wall_seconds")
+        rss = r.get("peak_rss_mb")
+        errors = len(r.get("errors", [])) + r.get("failed_sections", 0)
+        print(f"{r['backend']:<19} {r['calls']:>6} {r['calls'] / briefs:>11.1f} {r['prompt_tokens']:>11,} "
+              f"{r['completion_tokens']:>10,} {wall if wall is not None else float('nan'):>9.2f} "
+              f"{(wall or float('nan')) / briefs:>8.2f} {rss if rss is not None else float('nan'):>12.1f}  {errors}")
+    for r in results:
+        for error in r.get("errors", []):
+            print(f"  {r['backend']}: {error}")
+        if r.get("failed_sections"):
+            print(f"  {r['backend']}: {r['failed_sections']} section(s) returned a generation error")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare proposal backends against the mock LLM")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--briefs", type=int, default=len(BRIEFS), choices=range(1, len(BRIEFS) + 1))
+    parser.add_argument("--latency", type=float, default=0.2, help="mock LLM seconds per completion")
+    parser.add_argument("--mock-port", type=int, default=8100)
+    parser.add_argument("--timeout", type=float, default=900.0, help="seconds allowed per backend")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    parser.add_argument("--child", choices=list(BACKENDS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.briefs)
+        return
+
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "mock_llm.py"), "--port", str(args.mock_port),
+         "--latency", str(args.latency)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    env = dict(os.environ, OPENAI_BASE_URL=f"{mock_url}/v1", OPENAI_API_KEY="mock_key",
+               CREWAI_TELEMETRY_OPT_OUT="true", OTEL_SDK_DISABLED="true")
+
+    results = []
+    try:
+        wait_until_ready(f"{mock_url}/stats")
+        for backend in args.backends:
+            print(f"Running {backend}...", flush=True)
+            results.append(run_backend(backend, args.briefs, mock_url, env, args.timeout))
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    print(f"\n{args.briefs} brief(s), mock latency {args.latency}s\n")
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
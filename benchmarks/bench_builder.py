@@ -0,0 +1,95 @@
+"""
+Document builder micro-benchmark.
+
+Builds and saves a synthetic proposal through proposal_builder at a few sizes
+(items per list and rows per table), with and without the placeholder
+template (filled in place), and compares the bulk add_table path with
+appending the same rows one at a time.
+
+    python benchmarks/bench_builder.py --sizes 10 100 1000 --repeat 5
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def synthetic_content(size):
+    return {
+        "title": "IT Project Proposal - Benchmark",
+        "subtitle": "Prepared for Benchmark Ltd",
+        "executive_summary": "Summary paragraph. " * 20,
+        "requirements": [{"requirement": f"REQ-{i}", "description": f"Requirement {i}"} for i in range(size)],
+        "in_scope": [f"In scope item {i}" for i in range(size)],
+        "out_scope": [f"Out of scope item {i}" for i in range(size)],
+        "solution_summary": "Solution paragraph. " * 20,
+        "standard_deliverables": [f"Standard deliverable {i}" for i in range(size)],
+        "project_specific_deliverables": [f"Specific deliverable {i}" for i in range(size)],
+        "resources": [
+            {"activity": f"Activity {i}", "role_type": "Consultant", "quantity": 5, "unit_cost": "800", "total_cost": "4000"}
+            for i in range(size)
+        ],
+        "licensing": "No additional licensing required",
+        "risks": [f"Risk {i}" for i in range(size)],
+        "assumptions": [f"Assumption {i}" for i in range(size)],
+        "issues": [f"Issue {i}" for i in range(size)],
+        "dependencies": [f"Dependency {i}" for i in range(size)],
+        "tasks": [{"task": f"Task {i}", "effort": 3} for i in range(size)],
+    }
+
+
+def time_it(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time proposal document building")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="items per list/table")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_DIR)
+    from proposal_builder import build_proposal
+    from document_generator import ProposalDocumentGenerator
+    from template_manager import TemplateManager
+
+    template_path = os.path.join(tempfile.mkdtemp(), "littlefish_template.docx")
+    TemplateManager.create_littlefish_template(template_path)
+
+    def build_and_save(content, template=None):
+        build_proposal(content, template).save(io.BytesIO())
+
+    def rows_one_at_a_time(rows):
+        generator = ProposalDocumentGenerator()
+        table = generator.start_table(["Activity", "Role", "Days"])
+        for row in rows:
+            generator.add_table_row(table, row)
+
+    def rows_in_bulk(rows):
+        ProposalDocumentGenerator().add_table(["Activity", "Role", "Days"], rows)
+
+    print(f"{'size':>6} {'build+save':>12} {'template':>12} {'table bulk':>12} {'table rows':>12}")
+    for size in args.sizes:
+        content = synthetic_content(size)
+        rows = [[f"Activity {i}", "Consultant", "5"] for i in range(size)]
+        build = time_it(lambda: build_and_save(content), args.repeat)
+        templated = time_it(lambda: build_and_save(content, template_path), args.repeat)
+        bulk = time_it(lambda: rows_in_bulk(rows), args.repeat)
+        single = time_it(lambda: rows_one_at_a_time(rows), args.repeat)
+        print(f"{size:>6} {build * 1000:>10.1f}ms {templated * 1000:>10.1f}ms {bulk * 1000:>10.1f}ms "
+              f"{single * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Startup benchmark: cold import time per module and per-request agent setup.
+
+Each module is imported in a fresh interpreter so the numbers reflect a cold
+process start. Per-request setup compares building agentic.py's agents from
+scratch with borrowing a set from a warm AgentPool.
+
+    python benchmarks/bench_startup.py --repeat 5 --requests 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+MODULES = [
+    "openai",
+    "docx",
+    "autogen",
+    "prompts",
+    "budget",
+    "proposal_generator_agent",
+    "proposal_generator",
+    "main",
+    "agentic",
+    "agent_pool",
+    "server",
+]
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def cold_import_time(module, repeat):
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings), None
+
+
+def per_request_setup(requests):
+    sys.path.insert(0, REPO_DIR)
+    os.chdir(REPO_DIR)
+    os.environ.setdefault("OPENAI_API_KEY", "mock_key")
+    from agent_pool import AgentPool
+    from agentic import create_agents
+
+    fresh = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        create_agents()
+        fresh.append(time.perf_counter() - start)
+
+    pool = AgentPool(create_agents, size=1)
+    pool.warm()
+    pooled = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        with pool.agents():
+            pass
+        pooled.append(time.perf_counter() - start)
+
+    return statistics.median(fresh), statistics.median(pooled)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import and per-request setup time")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--requests", type=int, default=20, help="simulated requests for setup timing")
+    args = parser.parse_args()
+
+    print(f"Cold import time (median of {args.repeat} fresh interpreters)\n")
+    print(f"{'module':<28} {'seconds':>8}")
+    for module in MODULES:
+        seconds, error = cold_import_time(module, args.repeat)
+        print(f"{module:<28} {seconds:>8.3f}" if error is None else f"{module:<28} {'n/a':>8}  ({error})")
+
+    print(f"\nPer-request agent setup (median of {args.requests})\n")
+    try:
+        fresh, pooled = per_request_setup(args.requests)
+    except (ImportError, OSError) as e:
+        print(f"skipped: {e}")
+        return
+    print(f"{'create_agents()':<28} {fresh * 1000:>8.2f} ms")
+    print(f"{'AgentPool.agents()':<28} {pooled * 1000:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Style resolution benchmark: a RAID section with many bullets.
+
+Compares python-docx's by-name style lookup on every paragraph
+(``add_paragraph(item, style='List Bullet')``) with
+ProposalDocumentGenerator, which resolves each style ID once per document
+and writes it straight into the paragraph XML.
+
+    python benchmarks/bench_styles.py --bullets 1000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+RAID_HEADINGS = ['Risks', 'Assumptions', 'Issues', 'Dependencies']
+
+
+def raid_by_name(items):
+    from docx import Document
+
+    document = Document()
+    document.add_heading('RAID Analysis', level=1)
+    for heading in RAID_HEADINGS:
+        document.add_heading(heading, level=2)
+        for item in items:
+            document.add_paragraph(item, style='List Bullet')
+
+
+def raid_cached(items):
+    from document_generator import ProposalDocumentGenerator
+
+    ProposalDocumentGenerator().add_raid_section(items, items, items, items)
+
+
+def time_it(fn, items, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(items)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time RAID section building with and without cached style IDs")
+    parser.add_argument("--bullets", type=int, default=1000, help="bullets in the RAID section")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_DIR)
+    # Spread the bullets across the four RAID lists
+    items = [f"RAID item {i}" for i in range(max(1, args.bullets // len(RAID_HEADINGS)))]
+
+    by_name = time_it(raid_by_name, items, args.repeat)
+    cached = time_it(raid_cached, items, args.repeat)
+    print(f"RAID section with {len(items) * len(RAID_HEADINGS)} bullets (median of {args.repeat})\n")
+    print(f"{'style by name':<20} {by_name * 1000:>8.1f} ms")
+    print(f"{'cached style IDs':<20} {cached * 1000:>8.1f} ms")
+    print(f"{'speedup':<20} {by_name / cached:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
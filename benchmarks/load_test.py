@@ -0,0 +1,130 @@
+"""
+Load test for server.py against the local mock LLM.
+
+Starts benchmarks/mock_llm.py once, then server.py with each requested number
+of worker processes, fires concurrent /generate requests and reports
+throughput per worker:
+
+    python benchmarks/load_test.py --workers 1 2 4 --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def start_process(args, env=None):
+    return subprocess.Popen(
+        [sys.executable] + args,
+        cwd=REPO_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+async def run_load(url, total, concurrency):
+    latencies = []
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(timeout=None) as client:
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(url, json={
+                    "requirements": f"Load test project {i}",
+                    "customer": "Load Test Ltd",
+                })
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return elapsed, latencies, statuses
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /generate throughput per worker")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="mock LLM seconds per completion")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--mock-port", type=int, default=8100)
+    args = parser.parse_args()
+
+    mock = start_process([
+        os.path.join(BENCH_DIR, "mock_llm.py"),
+        "--port", str(args.mock_port),
+        "--latency", str(args.latency),
+    ])
+    env = dict(
+        os.environ,
+        OPENAI_BASE_URL=f"http://127.0.0.1:{args.mock_port}/v1",
+        OPENAI_API_KEY="mock_key",
+    )
+
+    rows = []
+    try:
+        wait_until_ready(f"http://127.0.0.1:{args.mock_port}/stats")
+        for workers in args.workers:
+            server = start_process([
+                "server.py",
+                "--host", "127.0.0.1",
+                "--port", str(args.port),
+                "--workers", str(workers),
+                "--log-level", "warning",
+            ], env=env)
+            try:
+                wait_until_ready(f"http://127.0.0.1:{args.port}/")
+                elapsed, latencies, statuses = asyncio.run(
+                    run_load(f"http://127.0.0.1:{args.port}/generate", args.requests, args.concurrency)
+                )
+            finally:
+                server.terminate()
+                server.wait()
+
+            throughput = statuses.get(200, 0) / elapsed
+            rows.append((workers, throughput, throughput / workers,
+                         statistics.median(latencies), percentile(latencies, 95),
+                         statuses.get(429, 0), sum(v for k, v in statuses.items() if k not in (200, 429))))
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    print(f"\n{args.requests} requests, concurrency {args.concurrency}, mock latency {args.latency}s\n")
+    print(f"{'workers':>7} {'req/s':>8} {'req/s/worker':>13} {'p50 (s)':>8} {'p95 (s)':>8} {'429s':>6} {'errors':>7}")
+    for workers, throughput, per_worker, p50, p95, rejected, errors in rows:
+        print(f"{workers:>7} {throughput:>8.2f} {per_worker:>13.2f} {p50:>8.2f} {p95:>8.2f} {rejected:>6} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Answers every request with canned proposal text after a configurable delay so
+servers and agents can be exercised without an API key or network access.
+Point clients at it with OPENAI_BASE_URL=http://127.0.0.1:8100/v1.
+
+Speaker-selection prompts from autogen group chats are answered with one of
+the offered agent names, in rotation, so group chats progress as they would
+against a real model. GET /stats returns the calls and tokens served since the
+last POST /reset.
+
+    python benchmarks/mock_llm.py --port 8100 --latency 0.5
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+LATENCY = float(os.getenv("MOCK_LLM_LATENCY", "0.5"))  # seconds per completion
+
+MOCK_CONTENT = (
+    "This proposal delivers a secure, scalable solution aligned with the customer's goals.\n\n"
+    "- Requirements workshop with key stakeholders\n"
+    "- Architecture and design of the target platform\n"
+    "- Build, test and hand over to operations\n"
+)
+
+
+# autogen's "select the next role from [A, B]" and retry prompts
+ROLE_LIST_RE = re.compile(r'(?:select the next role from|names that are accepted are) \[([^\]]*)\]')
+
+_speaker_turns = itertools.count()
+stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "speaker_selections": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def reply_for(messages) -> str:
+    """Canned proposal text, or an agent name when asked to pick the next speaker"""
+    for message in reversed(messages[-2:]):
+        match = ROLE_LIST_RE.search(str(message.get("content") or ""))
+        if match:
+            names = [name.strip() for name in match.group(1).split(",") if name.strip()]
+            if names:
+                stats["speaker_selections"] += 1
+                return names[next(_speaker_turns) % len(names)]
+    return MOCK_CONTENT
+
+
+async def stream_completion(completion_id, model, content, usage, include_usage):
+    """Server-sent events in the OpenAI streaming format, spread over LATENCY"""
+    words = content.split(" ")
+    delay = LATENCY / (len(words) + 1)
+
+    def event(delta, finish_reason=None, chunk_usage=None):
+        choices = [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        return "data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": choices,
+            "usage": chunk_usage,
+        }) + "\n\n"
+
+    await asyncio.sleep(delay)
+    yield event({"role": "assistant", "content": ""})
+    for i, word in enumerate(words):
+        await asyncio.sleep(delay)
+        yield event({"content": word if i == len(words) - 1 else word + " "})
+    yield event({}, finish_reason="stop")
+    if include_usage:
+        yield event(None, chunk_usage=usage)
+    yield "data: [DONE]\n\n"
+
+
+async def chat_completions(request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    content = reply_for(messages)
+
+    prompt_tokens = sum(estimate_tokens(str(m.get("content") or "")) for m in messages)
+    completion_tokens = estimate_tokens(content)
+    stats["calls"] += 1
+    stats["prompt_tokens"] += prompt_tokens
+    stats["completion_tokens"] += completion_tokens
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    model = body.get("model", "mock")
+
+    if body.get("stream"):
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+        return StreamingResponse(
+            stream_completion(completion_id, model, content, usage, include_usage),
+            media_type="text/event-stream",
+        )
+
+    await asyncio.sleep(LATENCY)
+    return JSONResponse({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": usage,
+    })
+
+
+async def get_stats(request):
+    return JSONResponse(stats)
+
+
+async def reset_stats(request):
+    for key in stats:
+        stats[key] = 0
+    return JSONResponse(stats)
+
+
+app = Starlette(routes=[
+    Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+    Route("/stats", get_stats, methods=["GET"]),
+    Route("/reset", reset_stats, methods=["POST"]),
+])
+
+
+def main():
+    global LATENCY
+    parser = argparse.ArgumentParser(description="Run a mock OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=LATENCY, help="seconds per completion")
+    args = parser.parse_args()
+    LATENCY = args.latency
+
+    import uvicorn
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
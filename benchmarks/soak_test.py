@@ -0,0 +1,212 @@
+"""
+Soak test: many generations in one long-running process, checking memory stays flat.
+
+Starts benchmarks/mock_llm.py, then runs --generations proposals through one
+of the web server paths and samples the serving process's RSS as it goes:
+
+    agents    app.py's path, in this process: pooled agentic.py agent sets,
+              reset between requests, with large generated reference documents
+    server    server.py over HTTP, one uvicorn worker
+
+After --warmup generations (caches, pools and allocator arenas fill up), RSS
+may not grow by more than --max-growth-mb. The agents mode also checks that no
+chat messages survive from one request into the next. The exit code is 1 when
+either check fails.
+
+    python benchmarks/soak_test.py --mode agents --generations 1000
+    python benchmarks/soak_test.py --mode server --generations 1000 --concurrency 20
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+REFERENCE_SIZE = 200_000  # characters per generated reference document
+
+
+def rss_mb(pid=None) -> float:
+    """Current resident set size of a process, from /proc (Linux)"""
+    with open(f"/proc/{pid or 'self'}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmRSS not reported")
+
+
+def start_process(args, env=None):
+    return subprocess.Popen([sys.executable] + args, cwd=REPO_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_ready(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def write_reference_documents(directory):
+    """Large stand-ins for sample_proposal.txt and design_standards.md"""
+    line = "Every deliverable follows the agreed design standards and naming conventions.\n"
+    for name in ("sample_proposal.txt", "design_standards.md"):
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(line * (REFERENCE_SIZE // len(line)))
+
+
+def soak_agents(args, samples, mock_url):
+    """app.py's /generate, minus Flask: borrow a pooled agent set, generate, store, report"""
+    os.environ["PROPOSAL_REFERENCE_DIR"] = args.work_dir
+    sys.path.insert(0, REPO_DIR)
+    import agentic
+    from agent_pool import AgentPool, retained_messages
+    from budget import ProposalBudget
+    from proposal_store import save_quietly, text_sections
+
+    llm_config = {**agentic.default_llm_config(),
+                  "config_list": [{"model": "gpt-4", "api_key": "mock_key", "base_url": f"{mock_url}/v1",
+                                   "cache_seed": None}]}
+
+    def factory():
+        agents = agentic.create_agents(llm_config)
+        client = agents[-1]
+        client.human_input_mode = "NEVER"  # the client accepts each phase's first answer
+        client.update_max_consecutive_auto_reply(0)
+        return agents
+
+    pool = AgentPool(factory, size=args.pool_size, max_uses=args.max_uses)
+    pool.warm()
+    leaked, errors = 0, 0
+    writer_prompts = set()  # distinct writer system message objects across all agent sets
+    reports_dir = os.path.join(args.work_dir, "reports")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(args.generations):
+            budget = ProposalBudget(reports_dir=reports_dir)
+            try:
+                with pool.agents() as agents:
+                    leaked += retained_messages(agents) > 0
+                    writer_prompts.add(id(agents[2].system_message))
+                    proposal = agentic.generate_proposal(f"Soak test project {i}", budget=budget, agents=agents)
+                save_quietly(text_sections(proposal), customer="Soak Test Ltd", project=f"Soak test project {i}",
+                             source="soak")
+            except Exception:
+                errors += 1
+            finally:
+                budget.write_report()
+            if (i + 1) % args.sample_every == 0:
+                samples.append((i + 1, rss_mb()))
+    return {"errors": errors, "leaked_sets": leaked, "pool": pool.stats, "writer_prompt_copies": len(writer_prompts)}
+
+
+async def soak_server(args, samples, mock_url, env):
+    port = args.port
+    server = start_process(["server.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+                            "--log-level", "warning"], env=env)
+    statuses = {}
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}/")
+        semaphore = asyncio.Semaphore(args.concurrency)
+        done = 0
+        async with httpx.AsyncClient(timeout=None) as client:
+            async def one(i):
+                nonlocal done
+                async with semaphore:
+                    response = await client.post(f"http://127.0.0.1:{port}/generate", json={
+                        "requirements": f"Soak test project {i}", "customer": "Soak Test Ltd",
+                    })
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                done += 1
+                if done % args.sample_every == 0:
+                    samples.append((done, rss_mb(server.pid)))
+
+            await asyncio.gather(*(one(i) for i in range(args.generations)))
+    finally:
+        server.terminate()
+        server.wait()
+    return {"errors": sum(count for status, count in statuses.items() if status != 200), "statuses": statuses}
+
+
+def growth(samples, warmup):
+    """RSS growth after warmup: median of the last three samples minus the first three"""
+    steady = [rss for generation, rss in samples if generation > warmup]
+    if len(steady) < 6:
+        raise SystemExit("Too few samples after warmup; lower --sample-every or raise --generations")
+    return statistics.median(steady[-3:]) - statistics.median(steady[:3])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that memory stays flat over many generations")
+    parser.add_argument("--mode", choices=["agents", "server"], default="agents")
+    parser.add_argument("--generations", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=100, help="generations before RSS is expected to settle")
+    parser.add_argument("--sample-every", type=int, default=50)
+    parser.add_argument("--max-growth-mb", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=10, help="server mode: requests in flight")
+    parser.add_argument("--pool-size", type=int, default=2, help="agents mode: pooled agent sets")
+    parser.add_argument("--max-uses", type=int, default=500, help="agents mode: requests before a set is rebuilt")
+    parser.add_argument("--latency", type=float, default=0.0, help="mock LLM seconds per completion")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--mock-port", type=int, default=8100)
+    args = parser.parse_args()
+
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    mock = start_process([os.path.join(BENCH_DIR, "mock_llm.py"), "--port", str(args.mock_port),
+                          "--latency", str(args.latency)])
+    samples = []
+    start = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            args.work_dir = work_dir
+            # Stored proposals and budget reports go to the scratch directory
+            env = dict(os.environ, OPENAI_BASE_URL=f"{mock_url}/v1", OPENAI_API_KEY="mock_key",
+                       PROPOSAL_STORE_PATH=os.path.join(work_dir, "proposal_store.db"))
+            os.environ.update(env)
+            wait_until_ready(f"{mock_url}/stats")
+            if args.mode == "agents":
+                write_reference_documents(work_dir)
+                result = soak_agents(args, samples, mock_url)
+            else:
+                result = asyncio.run(soak_server(args, samples, mock_url, env))
+    finally:
+        mock.terminate()
+        mock.wait()
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{args.generations} generations ({args.mode}) in {elapsed:.0f}s, mock latency {args.latency}s\n")
+    print(f"{'generations':>11} {'RSS MB':>8}")
+    for generation, rss in samples:
+        print(f"{generation:>11} {rss:>8.1f}")
+    rss_growth = growth(samples, args.warmup)
+    print(f"\nRSS growth after {args.warmup} warmup generations: {rss_growth:+.1f} MB "
+          f"(limit {args.max_growth_mb:.0f} MB)")
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+    failures = []
+    if rss_growth > args.max_growth_mb:
+        failures.append(f"RSS grew {rss_growth:.1f} MB after warmup")
+    if result.get("leaked_sets"):
+        failures.append(f"{result['leaked_sets']} requests started with another request's messages")
+    if result["errors"]:
+        failures.append(f"{result['errors']} generations failed")
+    if failures:
+        print("\nFAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nPASSED: memory stayed flat")
+
+
+if __name__ == "__main__":
+    main()
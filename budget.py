@@ -0,0 +1,357 @@
+"""
+Per-proposal budgets for LLM usage.
+
+A ProposalBudget caps the tokens, LLM calls and wall time a single proposal may
+consume. Agents reserve a call slot and the call's estimated tokens before every
+call and settle the actual usage afterwards, so sections generating in parallel
+cannot overshoot a limit together; once a limit is hit BudgetExceededError
+stops generation. Close to a limit, requests are downgraded (smaller
+max_tokens, optionally a cheaper model) instead. The final accounting is
+written to reports/<run_id>.json.
+"""
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from functools import wraps
+from typing import Dict, Iterable, List, Optional
+
+from prompts import count_tokens
+
+logger = logging.getLogger(__name__)
+
+REPORTS_DIR = "reports"
+# Long-running servers write one report per request and keep only the newest
+SERVER_MAX_REPORTS = int(os.getenv("PROPOSAL_MAX_REPORTS", "1000"))
+
+# Budget and usage source of the autogen reply being generated (see attach_autogen)
+_autogen_budget = contextvars.ContextVar("autogen_budget", default=None)
+_autogen_source = contextvars.ContextVar("autogen_source", default=None)
+_autogen_hook_lock = threading.Lock()
+_autogen_hooked = False
+
+# USD per 1M tokens: (prompt, completion)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4-turbo-preview": (10.00, 30.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Cost in USD, or None for models without a known price"""
+    # Longest prefix wins so dated snapshots ("gpt-4o-mini-2024-07-18") resolve correctly
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model and model.startswith(name):
+            prompt_price, completion_price = MODEL_PRICES[name]
+            return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+    return None
+
+
+def estimate_prompt_tokens(messages: Optional[List[Dict]]) -> int:
+    return sum(count_tokens(str(message.get("content") or "")) for message in messages or [])
+
+
+def prune_reports(reports_dir: str, keep: int):
+    """Delete all but the ``keep`` newest reports in reports_dir"""
+    paths = glob.glob(os.path.join(reports_dir, "*.json"))
+    if len(paths) <= keep:
+        return
+    paths.sort(key=lambda path: os.stat(path).st_mtime if os.path.exists(path) else 0)
+    for path in paths[:len(paths) - keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # removed by a concurrent request
+
+
+class BudgetExceededError(Exception):
+    """Raised before an LLM call once a proposal has used up its budget"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Proposal budget exceeded: {reason}")
+        self.reason = reason
+
+
+class ProposalBudget:
+    def __init__(self, max_tokens: Optional[int] = None, max_llm_calls: Optional[int] = None,
+                 max_wall_time: Optional[float] = None, downgrade_at: float = 0.8,
+                 downgrade_model: Optional[str] = None, run_id: Optional[str] = None,
+                 reports_dir: str = REPORTS_DIR, max_reports: Optional[int] = None):
+        self.max_tokens = max_tokens
+        self.max_llm_calls = max_llm_calls
+        self.max_wall_time = max_wall_time  # seconds
+        self.downgrade_at = downgrade_at
+        self.downgrade_model = downgrade_model
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.reports_dir = reports_dir
+        self.max_reports = max_reports  # reports kept in reports_dir; None keeps all
+
+        self.started_at = time.time()
+        self._start = time.monotonic()
+        self.usage: Dict[str, Dict] = {}
+        self.unpriced_models = set()
+        self.stopped_reason: Optional[str] = None
+        self.downgraded = False
+        self._reserved = {"calls": 0, "tokens": 0}  # held by calls in flight
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """Build a budget from PROPOSAL_MAX_TOKENS, PROPOSAL_MAX_LLM_CALLS and PROPOSAL_MAX_WALL_TIME"""
+        def env(name, cast):
+            value = os.getenv(name)
+            return cast(value) if value else None
+
+        kwargs.setdefault("max_tokens", env("PROPOSAL_MAX_TOKENS", int))
+        kwargs.setdefault("max_llm_calls", env("PROPOSAL_MAX_LLM_CALLS", int))
+        kwargs.setdefault("max_wall_time", env("PROPOSAL_MAX_WALL_TIME", float))
+        kwargs.setdefault("downgrade_model", os.getenv("PROPOSAL_DOWNGRADE_MODEL") or None)
+        return cls(**kwargs)
+
+    # Accounting
+
+    def record(self, source: str, model: str, prompt_tokens: int, completion_tokens: int,
+               cost: Optional[float] = None):
+        """Add the usage of one LLM call made by ``source``"""
+        if cost is None:
+            cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            entry = self.usage.setdefault(source, {
+                "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "models": [],
+            })
+            entry["calls"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            if cost is None:
+                self.unpriced_models.add(model)
+            else:
+                entry["cost"] += cost
+            if model not in entry["models"]:
+                entry["models"].append(model)
+
+    def record_response(self, source: str, response, model: Optional[str] = None):
+        """Record usage from an OpenAI chat completion response"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            self.record(source, model or getattr(response, "model", ""), 0, 0)
+            return
+        self.record(
+            source,
+            getattr(response, "model", None) or model or "",
+            usage.prompt_tokens or 0,
+            usage.completion_tokens or 0,
+        )
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(u["prompt_tokens"] + u["completion_tokens"] for u in self.usage.values())
+
+    @property
+    def llm_calls(self) -> int:
+        return sum(u["calls"] for u in self.usage.values())
+
+    @property
+    def cost(self) -> float:
+        return sum(u["cost"] for u in self.usage.values())
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    # Enforcement
+
+    def _fractions_used(self):
+        if self.max_tokens:
+            yield "tokens", self.total_tokens / self.max_tokens, f"{self.total_tokens}/{self.max_tokens} tokens"
+        if self.max_llm_calls:
+            yield "llm_calls", self.llm_calls / self.max_llm_calls, f"{self.llm_calls}/{self.max_llm_calls} LLM calls"
+        if self.max_wall_time:
+            yield "wall_time", self.elapsed / self.max_wall_time, f"{self.elapsed:.0f}/{self.max_wall_time:.0f}s wall time"
+
+    def exceeded_reason(self) -> Optional[str]:
+        for _, fraction, description in self._fractions_used():
+            if fraction >= 1:
+                return description
+        return None
+
+    def _stop(self, reason: str):
+        if self.stopped_reason is None:
+            self.stopped_reason = reason
+            logger.warning(f"Run {self.run_id} stopped: budget exceeded ({reason})")
+        raise BudgetExceededError(reason)
+
+    def check(self):
+        """Raise BudgetExceededError if any limit has been reached"""
+        reason = self.exceeded_reason()
+        if reason:
+            self._stop(reason)
+
+    def reserve(self, prompt_tokens: int = 0, max_tokens: Optional[int] = None) -> Dict:
+        """
+        Claim a call slot and the call's tokens before making it.
+
+        Calls in flight count against the limits, so a fan-out of parallel
+        calls cannot overshoot max_llm_calls or max_tokens. The returned
+        reservation's max_tokens is the completion cap the call must use;
+        release() it once the call's usage is recorded or the call failed.
+        """
+        with self._lock:
+            calls = self.llm_calls + self._reserved["calls"]
+            tokens = self.total_tokens + self._reserved["tokens"]
+            if self.max_llm_calls and calls >= self.max_llm_calls:
+                self._stop(f"{calls}/{self.max_llm_calls} LLM calls")
+            if self.max_tokens and tokens + prompt_tokens >= self.max_tokens:
+                self._stop(f"{tokens}/{self.max_tokens} tokens")
+            if self.max_wall_time and self.elapsed >= self.max_wall_time:
+                self._stop(f"{self.elapsed:.0f}/{self.max_wall_time:.0f}s wall time")
+            cap = max_tokens
+            if self.max_tokens:
+                remaining = self.max_tokens - tokens - prompt_tokens
+                if max_tokens and remaining < max_tokens:
+                    self._mark_downgraded()
+                cap = min(max_tokens or remaining, remaining)
+            reservation = {"tokens": prompt_tokens + (cap or 0), "max_tokens": cap}
+            self._reserved["calls"] += 1
+            self._reserved["tokens"] += reservation["tokens"]
+            return reservation
+
+    def release(self, reservation: Dict):
+        """Return a reservation; record the call's actual usage first"""
+        with self._lock:
+            self._reserved["calls"] -= 1
+            self._reserved["tokens"] -= reservation["tokens"]
+
+    def should_downgrade(self) -> bool:
+        return any(fraction >= self.downgrade_at for _, fraction, _ in self._fractions_used())
+
+    def model_for(self, requested: str) -> str:
+        """Swap to the downgrade model once usage is close to a limit"""
+        if self.downgrade_model and self.should_downgrade():
+            self._mark_downgraded()
+            return self.downgrade_model
+        return requested
+
+    def _mark_downgraded(self):
+        if not self.downgraded:
+            self.downgraded = True
+            logger.info(f"Run {self.run_id}: nearing budget, downgrading generation")
+
+    def attach_autogen(self, agents: Iterable):
+        """
+        Enforce this budget on every LLM call autogen agents make while replying.
+
+        Each agent's generate_reply runs with this budget in context, and the
+        OpenAIClient hook (install_autogen_hook) reserves each call against it,
+        caps its max_tokens and records its usage under the agent's name. A
+        GroupChatManager's reply includes speaker selection, whose calls are
+        charged to the manager. Attaching replaces any budget attached
+        earlier, so pooled agents can be reused.
+        """
+        install_autogen_hook()
+        for agent in agents:
+            vars(agent).pop("generate_reply", None)
+            agent.generate_reply = self._wrap_autogen_reply(agent.name, agent.generate_reply)
+
+    def _wrap_autogen_reply(self, source, generate_reply):
+        @wraps(generate_reply)
+        def budgeted_reply(*args, **kwargs):
+            budget_token = _autogen_budget.set(self)
+            source_token = _autogen_source.set(source)
+            try:
+                return generate_reply(*args, **kwargs)
+            finally:
+                _autogen_source.reset(source_token)
+                _autogen_budget.reset(budget_token)
+        return budgeted_reply
+
+    def _autogen_call(self, source, create, client, params):
+        reservation = self.reserve(estimate_prompt_tokens(params.get("messages")),
+                                   params.get("max_tokens") or self.max_tokens)
+        try:
+            if self.max_tokens:
+                params = {**params, "max_tokens": reservation["max_tokens"]}
+            response = create(client, params)
+            self.record_response(source, response)
+            return response
+        finally:
+            self.release(reservation)
+
+    @staticmethod
+    def detach_autogen(agents: Iterable):
+        """Remove any budget attached to the agents"""
+        for agent in agents:
+            vars(agent).pop("generate_reply", None)
+
+    # Reporting
+
+    def report(self) -> Dict:
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "wall_time": round(self.elapsed, 3),
+            "limits": {
+                "max_tokens": self.max_tokens,
+                "max_llm_calls": self.max_llm_calls,
+                "max_wall_time": self.max_wall_time,
+            },
+            "totals": {
+                "llm_calls": self.llm_calls,
+                "prompt_tokens": sum(u["prompt_tokens"] for u in self.usage.values()),
+                "completion_tokens": sum(u["completion_tokens"] for u in self.usage.values()),
+                "total_tokens": self.total_tokens,
+                "cost_usd": round(self.cost, 6),
+            },
+            "unpriced_models": sorted(self.unpriced_models),
+            "downgraded": self.downgraded,
+            "stopped_reason": self.stopped_reason,
+            "by_agent": self.usage,
+        }
+
+    def write_report(self, path: Optional[str] = None) -> str:
+        """Write the accounting to a JSON file and return its path"""
+        path = path or os.path.join(self.reports_dir, f"{self.run_id}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        if self.max_reports:
+            prune_reports(os.path.dirname(path) or ".", self.max_reports)
+        logger.info(f"Run {self.run_id}: {self.llm_calls} LLM calls, {self.total_tokens} tokens, "
+                    f"${self.cost:.4f} - report written to {path}")
+        return path
+
+
+def install_autogen_hook():
+    """
+    Charge autogen LLM calls to the budget attached to the agent replying.
+
+    autogen builds fresh clients for group chat speaker selection, so, like
+    LLMScheduler.install_autogen, the hook goes on OpenAIClient itself. It is
+    installed once per process; calls made outside an attached agent's reply
+    pass straight through. Cache hits never reach it and are not charged.
+    """
+    global _autogen_hooked
+    with _autogen_hook_lock:
+        if _autogen_hooked:
+            return
+        from autogen.oai.client import OpenAIClient
+
+        create = OpenAIClient.create
+
+        def budgeted_create(client, params):
+            budget = _autogen_budget.get()
+            if budget is None:
+                return create(client, params)
+            return budget._autogen_call(_autogen_source.get(), create, client, params)
+
+        OpenAIClient.create = budgeted_create
+        _autogen_hooked = True
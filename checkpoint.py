@@ -0,0 +1,205 @@
+"""
+Checkpointing for long autogen group-chat runs.
+
+Every group-chat message is appended to checkpoints/<run_id>.messages.jsonl as
+it is posted, and the run's progress (completed sections, current section,
+extra state) is kept in checkpoints/<run_id>.json. A failed or interrupted run
+(rate limit, network error, Ctrl-C) can then be continued from its last good
+round with ``--resume <run_id>`` instead of starting over. Agents' own chat
+histories are rebuilt from the messages on resume, so they are not stored.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = "checkpoints"
+
+# id(group chat message list) -> checkpointer journaling it; see _install_append_hook
+_journals: Dict[int, "ChatCheckpointer"] = {}
+_hook_lock = threading.Lock()
+_hooked = False
+
+
+def _install_append_hook():
+    """
+    Journal messages from GroupChat.append itself.
+
+    GroupChatManager runs the chat on a shallow copy of its GroupChat, so
+    wrapping append on the instance would miss every message; the copies
+    share one message list, which identifies the checkpointer to notify.
+    """
+    global _hooked
+    with _hook_lock:
+        if _hooked:
+            return
+        from autogen import GroupChat
+
+        append = GroupChat.append
+
+        def journaled_append(groupchat, message, speaker):
+            append(groupchat, message, speaker)
+            checkpointer = _journals.get(id(groupchat.messages))
+            if checkpointer is not None:
+                checkpointer._journal()
+
+        GroupChat.append = journaled_append
+        _hooked = True
+
+
+class CheckpointStore:
+    """Per run: a small JSON state file, replaced atomically, and an append-only message journal"""
+
+    def __init__(self, root: str = CHECKPOINT_DIR):
+        self.root = root
+
+    @staticmethod
+    def new_run_id() -> str:
+        return uuid.uuid4().hex[:12]
+
+    def path(self, run_id: str) -> str:
+        return os.path.join(self.root, f"{run_id}.json")
+
+    def messages_path(self, run_id: str) -> str:
+        return os.path.join(self.root, f"{run_id}.messages.jsonl")
+
+    def exists(self, run_id: str) -> bool:
+        return os.path.exists(self.path(run_id))
+
+    def _replace(self, path: str, write):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            write(f)
+        # A crash mid-write must never corrupt the last good checkpoint
+        os.replace(tmp_path, path)
+
+    def save(self, run_id: str, state: Dict):
+        """Write the run state; messages live in the journal"""
+        state = {key: value for key, value in state.items() if key != "messages"}
+        self._replace(self.path(run_id), lambda f: json.dump(state, f, default=str))
+
+    def append_messages(self, run_id: str, messages: List[Dict]):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.messages_path(run_id), "a") as f:
+            f.writelines(json.dumps(message, default=str) + "\n" for message in messages)
+
+    def write_messages(self, run_id: str, messages: List[Dict]):
+        """Start the journal over with ``messages``"""
+        self._replace(self.messages_path(run_id),
+                      lambda f: f.writelines(json.dumps(message, default=str) + "\n" for message in messages))
+
+    def load_messages(self, run_id: str) -> List[Dict]:
+        messages = []
+        try:
+            with open(self.messages_path(run_id)) as f:
+                for line in f:
+                    try:
+                        messages.append(json.loads(line))
+                    except ValueError:
+                        break  # a line torn by a crash mid-append, and anything after it
+        except FileNotFoundError:
+            pass
+        return messages
+
+    def load(self, run_id: str) -> Dict:
+        if not self.exists(run_id):
+            raise FileNotFoundError(f"No checkpoint found for run '{run_id}' in {self.root}/")
+        with open(self.path(run_id)) as f:
+            state = json.load(f)
+        # Checkpoints written before the journal kept their messages in the state file
+        state["messages"] = self.load_messages(run_id) or state.get("messages", [])
+        return state
+
+
+class ChatCheckpointer:
+    """Journals a run's group-chat messages as they are posted and restores them on resume"""
+
+    def __init__(self, run_id: str, entry_point: str, store: Optional[CheckpointStore] = None,
+                 state: Optional[Dict] = None):
+        self.run_id = run_id
+        self.store = store or CheckpointStore()
+        self.state = state or {
+            "run_id": run_id,
+            "entry_point": entry_point,
+            "round": 0,
+            "current_section": None,
+            "completed_sections": [],
+            "messages": [],
+            "extra": {},
+        }
+        self._groupchat = None
+        self._journaled = len(self.messages)  # messages already on disk
+        self._replaying = False
+
+    @classmethod
+    def resume(cls, run_id: str, entry_point: str, store: Optional[CheckpointStore] = None):
+        """Load the checkpointer of an earlier run"""
+        store = store or CheckpointStore()
+        state = store.load(run_id)
+        if state.get("entry_point") != entry_point:
+            raise ValueError(f"Run '{run_id}' was started by {state.get('entry_point')}, not {entry_point}")
+        logger.info(f"Resuming run {run_id} from round {state['round']}")
+        return cls(run_id, entry_point, store=store, state=state)
+
+    @property
+    def messages(self) -> List[Dict]:
+        return self.state["messages"]
+
+    @property
+    def completed_sections(self) -> List[str]:
+        return self.state["completed_sections"]
+
+    def attach(self, groupchat):
+        """Journal every message appended to the group chat"""
+        _install_append_hook()
+        self._groupchat = groupchat
+        _journals[id(groupchat.messages)] = self
+
+    def _journal(self):
+        messages = self._groupchat.messages
+        if self._replaying:
+            # manager.resume() re-appends the messages that are already on disk
+            if len(messages) >= self._journaled:
+                self._replaying = False
+            if len(messages) <= self._journaled:
+                return
+        if len(messages) <= self._journaled:
+            # The chat was reset; the journal follows it
+            self.state["messages"] = list(messages)
+            self.store.write_messages(self.run_id, self.messages)
+        else:
+            new = messages[self._journaled:]
+            self.messages.extend(new)
+            self.store.append_messages(self.run_id, new)
+        self._journaled = len(messages)
+        self.state["round"] = len(messages)
+
+    def save(self):
+        self.state["updated_at"] = time.time()
+        self.store.save(self.run_id, self.state)
+
+    def begin_section(self, section_name: str):
+        self.state["current_section"] = section_name
+        self.state["messages"] = list(self._groupchat.messages) if self._groupchat is not None else []
+        self.state["round"] = self._journaled = len(self.messages)
+        self.store.write_messages(self.run_id, self.messages)
+        self.save()
+
+    def complete_section(self, section_name: str):
+        if section_name not in self.completed_sections:
+            self.completed_sections.append(section_name)
+        self.state["current_section"] = None
+        self.save()
+
+    def resume_chat(self, manager):
+        """Continue the group chat from the last journaled round"""
+        # Nothing is written while resume() replays the journal into the chat
+        self._replaying = True
+        last_agent, last_message = manager.resume(messages=self.messages)
+        return last_agent.initiate_chat(recipient=manager, message=last_message, clear_history=False)
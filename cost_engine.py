@@ -0,0 +1,155 @@
+"""
+Deterministic cost calculation for the Costs section.
+
+Agents only decide the activities, roles, days and licence quantities; prices
+come from a rate card file (rate_cards/default.json unless
+PROPOSAL_RATE_CARD points elsewhere) and every figure is computed here with
+NumPy: line totals, contingency, licence costs and the grand total. Nothing
+is left to LLM arithmetic. A role or licence without a price on the rate
+card is never costed: it is listed as unpriced and left out of the totals.
+Negative days, quantities and prices are rejected with InvalidAmountError.
+"""
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_CARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rate_cards", "default.json")
+NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+UNPRICED = "Price on application"
+
+
+@lru_cache(maxsize=None)
+def load_rate_card(path: Optional[str] = None) -> Dict:
+    """Read a rate card once per path"""
+    path = path or os.getenv("PROPOSAL_RATE_CARD", DEFAULT_RATE_CARD)
+    with open(path) as f:
+        return json.load(f)
+
+
+class InvalidAmountError(ValueError):
+    """Raised for a negative quantity, day count or price"""
+
+
+def to_number(value) -> float:
+    """Read numbers the agents may format as text, e.g. "5 days" or "1,200" """
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        match = NUMBER_RE.search(str(value or "").replace(",", ""))
+        number = float(match.group()) if match else 0.0
+    if number < 0:
+        raise InvalidAmountError(f"Amounts cannot be negative: {value!r}")
+    return number
+
+
+class CostEngine:
+    def __init__(self, rate_card: Optional[Dict] = None):
+        card = rate_card or load_rate_card()
+        self.currency = card.get("currency", "")
+        self.contingency_rate = float(card.get("contingency", 0.0))
+        # Role and licence names are matched case-insensitively
+        self.day_rates = {name.lower(): float(rate) for name, rate in card.get("day_rates", {}).items()}
+        self.license_prices = {name.lower(): float(price) for name, price in card.get("licenses", {}).items()}
+        self.roles = list(card.get("day_rates", {}))
+
+    def day_rate(self, role: str) -> Optional[float]:
+        """Rate card day rate of a role, or None if the card has none"""
+        return self.day_rates.get(role.strip().lower())
+
+    def license_price(self, name: str) -> Optional[float]:
+        """Rate card price of a licence, or None if the card has none"""
+        return self.license_prices.get(name.strip().lower())
+
+    def format(self, amount: Optional[float]) -> str:
+        if amount is None:
+            return UNPRICED
+        return f"{self.currency} {amount:,.2f}".strip()
+
+    def estimate(self, resources: List[Dict], licenses: Optional[List[Dict]] = None) -> Dict:
+        """
+        Cost resource lines and licences.
+
+        Resources need ``role`` (or ``role_type``) and ``days`` (or
+        ``quantity``); a numeric ``day_rate`` overrides the rate card. Licences
+        need ``name`` and ``quantity``, with an optional ``unit_price``.
+        Roles and licences with no price of their own or on the rate card get
+        ``None`` prices, stay out of the totals and are named in
+        ``unpriced_roles`` and ``unpriced_licenses``.
+        """
+        licenses = licenses or []
+        roles = [str(r.get("role") or r.get("role_type") or "") for r in resources]
+        days = np.array([to_number(r.get("days", r.get("quantity", 0))) for r in resources], dtype=float)
+        rates = [
+            to_number(r["day_rate"]) if r.get("day_rate") else self.day_rate(role)
+            for r, role in zip(resources, roles)
+        ]
+        rated = np.array([rate is not None for rate in rates], dtype=bool)
+        line_totals = np.round(days * np.array([rate or 0.0 for rate in rates], dtype=float), 2)
+        unpriced_roles = [role for role, rate in zip(roles, rates) if rate is None]
+        if unpriced_roles:
+            logger.warning(f"No day rate for roles {unpriced_roles}; they are left out of the totals")
+
+        quantities = np.array([to_number(l.get("quantity", 0)) for l in licenses], dtype=float)
+        prices = [
+            to_number(l["unit_price"]) if l.get("unit_price") else self.license_price(str(l.get("name", "")))
+            for l in licenses
+        ]
+        priced = np.array([price is not None for price in prices], dtype=bool)
+        license_totals = np.round(quantities * np.array([price or 0.0 for price in prices], dtype=float), 2)
+        unpriced = [str(l.get("name", "")) for l, price in zip(licenses, prices) if price is None]
+        if unpriced:
+            logger.warning(f"No price for licences {unpriced}; they are left out of the totals")
+
+        subtotal = float(line_totals[rated].sum())
+        contingency = round(subtotal * self.contingency_rate, 2)
+        license_total = float(license_totals[priced].sum())
+
+        return {
+            "currency": self.currency,
+            "lines": [
+                {**resource, "day_rate": None if rate is None else float(rate), "days": float(day),
+                 "total": None if rate is None else float(total)}
+                for resource, rate, day, total in zip(resources, rates, days, line_totals)
+            ],
+            "unpriced_roles": unpriced_roles,
+            "total_days": float(days.sum()),
+            "subtotal": round(subtotal, 2),
+            "contingency_rate": self.contingency_rate,
+            "contingency": contingency,
+            "licenses": [
+                {**license, "unit_price": None if price is None else float(price), "quantity": float(quantity),
+                 "total": None if price is None else float(total)}
+                for license, price, quantity, total in zip(licenses, prices, quantities, license_totals)
+            ],
+            "unpriced_licenses": unpriced,
+            "license_total": round(license_total, 2),
+            "total": round(subtotal + contingency + license_total, 2),
+        }
+
+    def to_markdown(self, estimate: Dict) -> str:
+        """Render an estimate as markdown tables for agents to quote verbatim"""
+        lines = ["| Activity | Role | Days | Day rate | Cost |", "|---|---|---|---|---|"]
+        for line in estimate["lines"]:
+            role = line.get("role") or line.get("role_type", "")
+            lines.append(f"| {line.get('activity', '')} | {role} | {line['days']:g} | "
+                         f"{self.format(line['day_rate'])} | {self.format(line['total'])} |")
+        lines.append(f"| Subtotal | | {estimate['total_days']:g} | | {self.format(estimate['subtotal'])} |")
+        lines.append(f"| Contingency ({estimate['contingency_rate']:.0%}) | | | | {self.format(estimate['contingency'])} |")
+        if estimate["licenses"]:
+            lines += ["", "| Licence | Quantity | Unit price | Cost |", "|---|---|---|---|"]
+            for license in estimate["licenses"]:
+                lines.append(f"| {license.get('name', '')} | {license['quantity']:g} | "
+                             f"{self.format(license['unit_price'])} | {self.format(license['total'])} |")
+        lines += ["", f"**Total: {self.format(estimate['total'])}**"]
+        if estimate["unpriced_roles"]:
+            lines.append(f"Excludes roles not on the rate card: {', '.join(estimate['unpriced_roles'])}")
+        if estimate["unpriced_licenses"]:
+            lines.append(f"Excludes licences not on the rate card: {', '.join(estimate['unpriced_licenses'])}")
+        return "\n".join(lines)
@@ -0,0 +1,310 @@
+"""
+CrewAI proposal backend.
+
+The analyst/architect/writer crew from AI-Proposal-Test-2.ipynb as an
+importable backend next to ProposalOrchestrator. The analyst and architect
+both work from the brief, so their tasks run concurrently; the writer gets
+both results as context. One LLM client is shared by every crew in the
+process, crews run quietly (no verbose console output) and each finished task
+is logged as a single key=value line. Token usage is recorded per LLM call into
+the budget of the crew that made it, since crew.usage_metrics would count a
+shared LLM's lifetime usage once per agent.
+
+Every crew LLM call also passes a before-call hook first: it reserves a call
+slot and the prompt's tokens in the budget, waits for the crew's rate limiter
+(batch.py passes its process-wide one) and takes a slot from the crew's
+LLMScheduler, if any, for the tenant that created the backend. A call the
+budget or the tenant's quota cannot afford is aborted, and the crew run raises
+BudgetExceededError or QuotaExceededError.
+
+    backend = CrewProposalBackend(context, budget=budget)
+    sections = backend.generate_proposal()
+
+run_briefs() generates many briefs concurrently on one event loop.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from budget import BudgetExceededError, estimate_prompt_tokens
+from llm_scheduler import QuotaExceededError, current_priority, current_tenant, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+MODEL = os.getenv("CREW_MODEL", "gpt-4o-mini")
+TEMPERATURE = 0.3
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Section name -> (role, goal, backstory, task description, expected output)
+CREW_SECTIONS = {
+    "Requirements Analysis": (
+        "Business Analyst",
+        "Extract core needs from client requirements",
+        "You are an experienced analyst turning vague ideas into actionable specs.",
+        "Analyze this client brief and extract key project requirements:\n\n{brief}",
+        "Key project requirements and insights",
+    ),
+    "Solution Architecture": (
+        "Technical Architect",
+        "Design a scalable solution for the client's needs",
+        "With years of system design experience, you create robust architectures.",
+        "Propose a high-level technical architecture for this client brief:\n\n{brief}",
+        "Proposed technical solution for the project",
+    ),
+}
+WRITER = (
+    "Proposal Writer",
+    "Write a professional business proposal based on the team's findings",
+    "You transform ideas into compelling proposal documents.",
+    "Draft the final proposal combining the analyst's requirements and the architect's solution "
+    "for this client brief:\n\n{brief}\n\nUse markdown headings for each section.",
+    "Completed proposal document in markdown",
+)
+PROPOSAL_SECTION = "Proposal"
+
+# Agent id -> backend of the running crew it belongs to
+_backends_by_agent: Dict[str, "CrewProposalBackend"] = {}
+_backends_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def shared_llm():
+    """One LLM client per process, shared by all agents of all crews"""
+    # CrewAI reports telemetry and prints banners unless told not to
+    os.environ.setdefault("CREWAI_TELEMETRY_OPT_OUT", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    for name in ("LiteLLM", "httpx", "crewai"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    from crewai import LLM
+
+    return LLM(model=MODEL, temperature=TEMPERATURE)
+
+
+def _backend_for(agent_id) -> Optional["CrewProposalBackend"]:
+    with _backends_lock:
+        return _backends_by_agent.get(str(agent_id))
+
+
+@lru_cache(maxsize=None)
+def _install_hooks():
+    """Put every crew LLM call behind its proposal's rate limit and budget (registered once)"""
+    from crewai.events import LLMCallCompletedEvent, crewai_event_bus
+    from crewai.hooks import HookAborted, register_before_llm_call_hook
+
+    def before_call(context):
+        backend = _backend_for(getattr(context.agent, "id", None))
+        if backend is None:
+            return None
+        try:
+            backend.before_call(context.messages)
+        except (BudgetExceededError, QuotaExceededError) as e:
+            # Any other exception in a hook is logged and swallowed by crewai
+            raise HookAborted(str(e)) from e
+        return None
+
+    register_before_llm_call_hook(before_call)
+
+    @crewai_event_bus.on(LLMCallCompletedEvent)
+    def record_usage(source, event):
+        backend = _backend_for(getattr(event, "agent_id", None))
+        if backend is not None:
+            backend.after_call(event)
+
+
+def format_brief(context: Dict[str, str]) -> str:
+    return "\n".join(f"{key.replace('_', ' ').title()}: {value}" for key, value in context.items() if value)
+
+
+def _log_task_done(output):
+    # Module-level so crews stay serializable (bound methods can't be checkpointed)
+    logger.info(f"event=crew_task_done agent={output.agent!r} chars={len(output.raw or '')}")
+
+
+class CrewProposalBackend:
+    def __init__(self, context: Dict[str, str], budget=None, llm=None, rate_limiter=None, scheduler=None):
+        self.context = context
+        self.budget = budget
+        self.llm = llm or shared_llm()
+        # Optional shared limiter; acquire() blocks until the next call slot
+        self.rate_limiter = rate_limiter
+        # Optional llm_scheduler.LLMScheduler; crew threads do not see the caller's
+        # context variables, so the tenant and priority are captured here
+        self.scheduler = scheduler
+        self.tenant = current_tenant()
+        self.priority = current_priority()
+        self.run_id = budget.run_id if budget else hex(id(self))[2:]
+        # Budget reservations and scheduler slots of calls in flight
+        self._reservations: List[Dict] = []
+        self._slots: List[str] = []
+        self._calls_lock = threading.Lock()
+        self._stopped: Optional[Exception] = None
+
+    @property
+    def _hooked(self) -> bool:
+        return bool(self.budget or self.rate_limiter or self.scheduler)
+
+    def before_call(self, messages):
+        """Reserve the call, then wait for its slot; raises BudgetExceededError or QuotaExceededError"""
+        try:
+            if self.budget is not None:
+                reservation = self.budget.reserve(estimate_prompt_tokens(messages))
+                with self._calls_lock:
+                    self._reservations.append(reservation)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            if self.scheduler is not None:
+                tenant = self.scheduler.acquire(estimate_tokens(messages), self.tenant, self.priority)
+                with self._calls_lock:
+                    self._slots.append(tenant)
+        except (BudgetExceededError, QuotaExceededError) as e:
+            self._stopped = e
+            raise
+
+    def after_call(self, event):
+        """Record a finished call's usage, then return its reservation and slot"""
+        usage = getattr(event, "usage", None) or {}
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+        with self._calls_lock:
+            reservation = self._reservations.pop() if self._reservations else None
+            tenant = self._slots.pop() if self._slots else None
+        if self.budget is not None:
+            self.budget.record(event.agent_role or "CrewAI", event.model or MODEL, prompt_tokens, completion_tokens)
+            if reservation:
+                self.budget.release(reservation)
+        if tenant is not None:
+            self.scheduler.record(tenant, prompt_tokens + completion_tokens)
+            self.scheduler.release(tenant)
+
+    def _agent(self, role, goal, backstory):
+        from crewai import Agent
+
+        return Agent(role=role, goal=goal, backstory=backstory, llm=self.llm, verbose=False,
+                     allow_delegation=False)
+
+    def build_crew(self):
+        """A fresh crew per proposal; agents are cheap, the LLM client is shared"""
+        from crewai import Crew, Task
+
+        tasks = {}
+        for section, (role, goal, backstory, description, expected_output) in CREW_SECTIONS.items():
+            tasks[section] = Task(
+                description=description,
+                expected_output=expected_output,
+                agent=self._agent(role, goal, backstory),
+                async_execution=True,  # independent of each other, so run concurrently
+            )
+        role, goal, backstory, description, expected_output = WRITER
+        tasks[PROPOSAL_SECTION] = Task(
+            description=description,
+            expected_output=expected_output,
+            agent=self._agent(role, goal, backstory),
+            context=list(tasks.values()),
+        )
+        crew = Crew(
+            agents=[task.agent for task in tasks.values()],
+            tasks=list(tasks.values()),
+            verbose=False,
+            task_callback=_log_task_done,
+        )
+        return crew, tasks
+
+    def _track(self, crew):
+        if self._hooked:
+            _install_hooks()
+            with _backends_lock:
+                _backends_by_agent.update({str(agent.id): self for agent in crew.agents})
+
+    def _untrack(self, crew):
+        if not self._hooked:
+            return
+        from crewai.events import crewai_event_bus
+
+        # Handlers run on the bus's own threads; let pending usage events land first
+        if hasattr(crewai_event_bus, "flush"):
+            crewai_event_bus.flush()
+        with _backends_lock:
+            for agent in crew.agents:
+                _backends_by_agent.pop(str(agent.id), None)
+        # Calls that failed never reported usage
+        with self._calls_lock:
+            reservations, self._reservations = self._reservations, []
+            slots, self._slots = self._slots, []
+        for reservation in reservations:
+            self.budget.release(reservation)
+        for tenant in slots:
+            self.scheduler.release(tenant)
+
+    def _raise_if_stopped(self):
+        """A call the budget or quota refused aborts the crew; report it as that error"""
+        if self._stopped is not None:
+            raise self._stopped
+
+    def _sections(self, tasks) -> Dict[str, str]:
+        return {section: (task.output.raw if task.output else "").strip() for section, task in tasks.items()}
+
+    def generate_proposal(self) -> Dict[str, str]:
+        """Run the crew and return section name -> text, the proposal last"""
+        if self.budget:
+            self.budget.check()
+        crew, tasks = self.build_crew()
+        self._track(crew)
+        start = time.perf_counter()
+        try:
+            crew.kickoff(inputs={"brief": format_brief(self.context)})
+        except Exception:
+            self._raise_if_stopped()
+            raise
+        finally:
+            self._untrack(crew)
+        self._raise_if_stopped()
+        logger.info(f"event=crew_done run={self.run_id} seconds={time.perf_counter() - start:.2f}")
+        return self._sections(tasks)
+
+    async def generate_proposal_async(self) -> Dict[str, str]:
+        if self.budget:
+            self.budget.check()
+        crew, tasks = self.build_crew()
+        self._track(crew)
+        start = time.perf_counter()
+        try:
+            await crew.kickoff_async(inputs={"brief": format_brief(self.context)})
+        except Exception:
+            self._raise_if_stopped()
+            raise
+        finally:
+            await asyncio.to_thread(self._untrack, crew)
+        self._raise_if_stopped()
+        logger.info(f"event=crew_done run={self.run_id} seconds={time.perf_counter() - start:.2f}")
+        return self._sections(tasks)
+
+
+async def run_briefs(contexts: List[Dict[str, str]], max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                     budgets: Optional[List] = None, scheduler=None) -> List[Dict]:
+    """Generate many proposals concurrently; failures are returned per brief, not raised"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    budgets = budgets or [None] * len(contexts)
+
+    async def run(context, budget):
+        async with semaphore:
+            try:
+                backend = CrewProposalBackend(context, budget=budget, scheduler=scheduler)
+                sections = await backend.generate_proposal_async()
+                return {"context": context, "status": "ok", "sections": sections}
+            except (BudgetExceededError, QuotaExceededError) as e:
+                return {"context": context, "status": "budget_exceeded", "error": str(e)}
+            except Exception as e:
+                logger.warning(f"event=crew_failed error={type(e).__name__}: {e}")
+                return {"context": context, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+    return await asyncio.gather(*(run(context, budget) for context, budget in zip(contexts, budgets)))
+
+
+def generate_crew_proposal(requirements: str, budget=None, scheduler=None) -> str:
+    """Proposal text for a free-form brief, as agentic.generate_proposal returns"""
+    backend = CrewProposalBackend({"brief": requirements}, budget=budget, scheduler=scheduler)
+    return backend.generate_proposal()[PROPOSAL_SECTION]
@@ -0,0 +1,222 @@
+"""
+Solution diagram rendering.
+
+The Solution Designer describes the architecture as a small JSON spec:
+
+    {
+        "title": "Target architecture",
+        "nodes": [
+            {"id": "users", "label": "Field users", "kind": "user"},
+            {"id": "app", "label": "Fiori app", "kind": "service", "group": "SAP BTP"},
+            {"id": "db", "label": "HANA", "kind": "database", "group": "SAP BTP"}
+        ],
+        "edges": [
+            {"from": "users", "to": "app", "label": "HTTPS"},
+            {"from": "app", "to": "db"}
+        ]
+    }
+
+Specs are converted to DOT and rendered by the local graphviz ``dot`` binary in
+a process pool with a per-render timeout. Outputs are cached by a hash of the
+canonical spec, so an identical architecture is never rendered twice.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "diagram_cache"
+DEFAULT_FORMATS = ("png", "svg")
+RENDER_TIMEOUT = 30  # seconds per dot invocation
+
+# Node kind -> DOT node attributes
+NODE_STYLES = {
+    "user": 'shape=oval, style=filled, fillcolor="#e8f1fb"',
+    "service": 'shape=box, style="rounded,filled", fillcolor="#d6e9f8"',
+    "database": 'shape=cylinder, style=filled, fillcolor="#fdf2d0"',
+    "storage": 'shape=folder, style=filled, fillcolor="#fdf2d0"',
+    "queue": 'shape=cds, style=filled, fillcolor="#e5f5e0"',
+    "network": 'shape=hexagon, style=filled, fillcolor="#eeeeee"',
+    "external": 'shape=box, style="dashed"',
+}
+
+SPEC_BLOCK_RE = re.compile(r'```(?:json|architecture)\s*\n(.*?)```', re.DOTALL)
+
+
+def validate_spec(spec: Dict):
+    """Raise ValueError unless the spec has nodes with ids and edges between known nodes"""
+    if not isinstance(spec, dict):
+        raise ValueError(f"Architecture spec must be a JSON object, got {type(spec).__name__}")
+    nodes = spec.get("nodes")
+    if not isinstance(nodes, list) or not nodes:
+        raise ValueError("Architecture spec needs a non-empty 'nodes' list")
+    ids = set()
+    for node in nodes:
+        if not isinstance(node, dict) or not isinstance(node.get("id"), (str, int)) or node["id"] == "":
+            raise ValueError(f"Every node needs an 'id': {node!r}")
+        ids.add(node["id"])
+    edges = spec.get("edges", [])
+    if not isinstance(edges, list):
+        raise ValueError("Architecture spec 'edges' must be a list")
+    for edge in edges:
+        if not isinstance(edge, dict):
+            raise ValueError(f"Every edge must be an object with 'from' and 'to': {edge!r}")
+        if not all(isinstance(edge.get(end), (str, int)) and edge[end] in ids for end in ("from", "to")):
+            raise ValueError(f"Edge references an unknown node: {edge!r}")
+
+
+def extract_architecture_spec(text: str) -> Optional[Dict]:
+    """Find the first valid architecture spec in a fenced json block of an agent message, or in bare JSON"""
+    for block in SPEC_BLOCK_RE.findall(text or "") or [text or ""]:
+        try:
+            spec = json.loads(block)
+        except ValueError:
+            continue
+        if isinstance(spec, dict) and "nodes" in spec:
+            try:
+                validate_spec(spec)
+            except ValueError as e:
+                logger.warning(f"Ignoring invalid architecture spec: {e}")
+                continue
+            return spec
+    return None
+
+
+def spec_hash(spec: Dict) -> str:
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _quote(text) -> str:
+    return '"' + str(text).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def spec_to_dot(spec: Dict) -> str:
+    lines = [
+        "digraph architecture {",
+        '    graph [rankdir=LR, fontname="Arial", dpi=150, pad=0.3];',
+        '    node [fontname="Arial", fontsize=11];',
+        '    edge [fontname="Arial", fontsize=9, color="#555555"];',
+    ]
+    if spec.get("title"):
+        lines.append(f"    label={_quote(spec['title'])}; labelloc=t; fontsize=14;")
+
+    groups: Dict[str, List[Dict]] = {}
+    for node in spec["nodes"]:
+        groups.setdefault(node.get("group") or "", []).append(node)
+
+    for index, (group, nodes) in enumerate(groups.items()):
+        indent = "    "
+        if group:
+            lines.append(f"    subgraph cluster_{index} {{")
+            lines.append(f'        label={_quote(group)}; style="rounded,dashed"; color="#0078c8";')
+            indent = "        "
+        for node in nodes:
+            style = NODE_STYLES.get(node.get("kind"), NODE_STYLES["service"])
+            lines.append(f"{indent}{_quote(node['id'])} [label={_quote(node.get('label', node['id']))}, {style}];")
+        if group:
+            lines.append("    }")
+
+    for edge in spec.get("edges", []):
+        label = f" [label={_quote(edge['label'])}]" if edge.get("label") else ""
+        lines.append(f"    {_quote(edge['from'])} -> {_quote(edge['to'])}{label};")
+
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def _render_dot(dot_source: str, fmt: str, output_path: str, timeout: float) -> str:
+    """Run graphviz in a worker process; writes atomically so the cache never holds partial files"""
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        subprocess.run(
+            ["dot", f"-T{fmt}", "-o", tmp_path],
+            input=dot_source.encode("utf-8"),
+            capture_output=True,
+            timeout=timeout,
+            check=True,
+        )
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
+
+
+class DiagramRenderer:
+    def __init__(self, cache_dir: str = CACHE_DIR, workers: int = 2, timeout: float = RENDER_TIMEOUT):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def cached_paths(self, spec: Dict, formats: Sequence[str] = DEFAULT_FORMATS) -> Dict[str, str]:
+        key = spec_hash(spec)
+        return {fmt: os.path.join(self.cache_dir, f"{key}.{fmt}") for fmt in formats}
+
+    def render_many(self, specs: Sequence[Dict], formats: Sequence[str] = DEFAULT_FORMATS) -> List[Dict[str, str]]:
+        """Render specs in parallel; returns format -> path for each spec (missing formats failed)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        jobs = []
+        results = []
+        for spec in specs:
+            validate_spec(spec)
+            paths = self.cached_paths(spec, formats)
+            dot_source = None
+            for fmt, path in paths.items():
+                if os.path.exists(path):
+                    continue
+                dot_source = dot_source or spec_to_dot(spec)
+                future = self._get_pool().submit(_render_dot, dot_source, fmt, path, self.timeout)
+                jobs.append((paths, fmt, future))
+            results.append(paths)
+
+        for paths, fmt, future in jobs:
+            try:
+                future.result()
+            except (subprocess.SubprocessError, OSError) as e:
+                logger.warning(f"Diagram rendering to {fmt} failed: {e}")
+                del paths[fmt]
+        return results
+
+    def render(self, spec: Dict, formats: Sequence[str] = DEFAULT_FORMATS) -> Dict[str, str]:
+        return self.render_many([spec], formats)[0]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default_renderer: Optional[DiagramRenderer] = None
+
+
+def render_solution_diagram(spec: Dict) -> Optional[str]:
+    """Render a spec with the shared renderer and return the PNG path, or None on failure"""
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = DiagramRenderer()
+        atexit.register(_default_renderer.close)
+    try:
+        return _default_renderer.render(spec, formats=DEFAULT_FORMATS).get("png")
+    except ValueError as e:
+        logger.warning(f"Skipping solution diagram: {e}")
+        return None
@@ -1,19 +1,44 @@
 from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.text.paragraph import Paragraph
 from typing import Dict, List, Optional
 import os
-from .template_manager import TemplateManager
+try:
+    # Imported as utils.document_generator
+    from .asset_manager import AssetManager, shared_assets
+    from .cost_engine import CostEngine
+    from .template_filler import TemplateFiller
+    from .template_manager import TemplateManager
+    from .toc import TableOfContents
+except ImportError:
+    # Imported from the repo root, like every other module
+    from asset_manager import AssetManager, shared_assets
+    from cost_engine import CostEngine
+    from template_filler import TemplateFiller
+    from template_manager import TemplateManager
+    from toc import TableOfContents
 
 class ProposalDocumentGenerator:
-    def __init__(self, template_path: Optional[str] = None):
-        if template_path and os.path.exists(template_path):
+    def __init__(self, template_path: Optional[str] = None, assets: Optional[AssetManager] = None):
+        # Images go through the asset manager so repeats share one media part
+        # and processed bytes are reused across documents
+        self.assets = assets or shared_assets()
+        # Templates with placeholder sections are filled in place; others only lend their styles
+        self.filler = TemplateFiller.load(template_path) if template_path and os.path.exists(template_path) else None
+        if self.filler:
+            self.document = self.filler.document
+        elif template_path and os.path.exists(template_path):
             self.template_doc = Document(template_path)
             self.document = Document()
             TemplateManager.apply_template_styles(self.document, self.template_doc)
         else:
             self.document = Document()
             self._setup_default_styles()
+        # Headings are recorded as they are added so the TOC is written without a re-parse
+        self.toc = TableOfContents(self.document)
+        # Style name -> style ID, resolved once per document
+        self._style_ids: Dict[str, str] = {}
     
     def _setup_default_styles(self):
         """Setup default document styles if no template is provided"""
@@ -30,170 +55,215 @@ class ProposalDocumentGenerator:
     
     def add_title_page(self, title: str, customer: str, date: str):
         """Add the title page"""
-        self.document.add_paragraph(title, style='Title').alignment = WD_ALIGN_PARAGRAPH.CENTER
-        self.document.add_paragraph(f"Prepared for: {customer}").alignment = WD_ALIGN_PARAGRAPH.CENTER
-        self.document.add_paragraph(f"Date: {date}").alignment = WD_ALIGN_PARAGRAPH.CENTER
+        self._add_paragraph(title, self._style_id('Title')).alignment = WD_ALIGN_PARAGRAPH.CENTER
+        self._add_paragraph(f"Prepared for: {customer}").alignment = WD_ALIGN_PARAGRAPH.CENTER
+        self._add_paragraph(f"Date: {date}").alignment = WD_ALIGN_PARAGRAPH.CENTER
+        self.document.add_page_break()
+    
+    def _style_id(self, name: str) -> str:
+        """Resolve a style name to its ID once; python-docx scans the styles part on every by-name lookup"""
+        style_id = self._style_ids.get(name)
+        if style_id is None:
+            style_id = self._style_ids[name] = self.document.styles[name].style_id
+        return style_id
+    
+    def _add_paragraph(self, text: str, style_id: Optional[str] = None) -> Paragraph:
+        """Append a paragraph to the body XML with the style ID set directly"""
+        p = self.document.element.body.add_p()
+        if style_id:
+            p.style = style_id
+        if text:
+            p.add_r().text = text
+        return Paragraph(p, self.document._body)
+    
+    def add_section_heading(self, text: str, level: int = 1):
+        """Add a heading and record it for the table of contents"""
+        if self.filler and level == 1:
+            self.filler.enter(text)
+        paragraph = self._add_paragraph(text, self._style_id(f'Heading {level}'))
+        return self.toc.record(paragraph, text, level)
+    
+    def add_text(self, text: str):
+        """Add a body paragraph"""
+        self._add_paragraph(text)
+    
+    def add_bullet(self, text: str):
+        """Add a bulleted list item"""
+        self._add_paragraph(text, self._style_id('List Bullet'))
+    
+    def add_bullets(self, items: List[str]):
+        """Add a bulleted list"""
+        style_id = self._style_id('List Bullet')
+        for item in items:
+            self._add_paragraph(item, style_id)
+    
+    def add_table(self, headers: List[str], rows: List[List[str]]):
+        """Add a complete table in one go; rows are padded or truncated to the header width"""
+        table = self.document.add_table(rows=len(rows) + 1, cols=len(headers))
+        table._tbl.tblStyle_val = self._style_id('Table Grid')
+        # Resolve all cells once; per-row .cells rebuilds the whole grid each time
+        cells = table._cells
+        width = len(headers)
+        for index, value in enumerate(headers):
+            cells[index].text = value
+        for row_index, values in enumerate(rows, start=1):
+            offset = row_index * width
+            for index, value in enumerate(values[:width]):
+                cells[offset + index].text = value
+        return table
+    
+    def start_table(self, headers: List[str]):
+        """Add a table with a header row and return it for add_table_row"""
+        return self.add_table(headers, [])
+    
+    def add_table_row(self, table, values: List[str]):
+        """Append a row, padding or truncating values to the table width"""
+        row_cells = table.add_row().cells
+        for cell, value in zip(row_cells, values):
+            cell.text = value
+    
+    def add_cover(self, title: str, subtitle: str = ""):
+        """Add a cover page with a title and optional subtitle"""
+        self._add_paragraph(title, self._style_id('Title')).alignment = WD_ALIGN_PARAGRAPH.CENTER
+        if subtitle:
+            self._add_paragraph(subtitle).alignment = WD_ALIGN_PARAGRAPH.CENTER
+        self.document.add_page_break()
+    
+    def add_page_break(self):
+        """End the current section"""
         self.document.add_page_break()
     
     def add_table_of_contents(self):
         """Add table of contents"""
         self.document.add_heading('Table of Contents', level=1)
-        # Note: Table of contents needs to be updated manually in Word
-        self.document.add_paragraph('Right-click and select "Update Field" to update this table of contents')
+        # Entries are filled in from the recorded headings when the document is saved
+        self.toc.insert_placeholder()
         self.document.add_page_break()
     
     def add_executive_summary(self, summary: str):
         """Add executive summary section"""
-        self.document.add_heading('Executive Summary', level=1)
-        self.document.add_paragraph(summary)
+        self.add_section_heading('Executive Summary', level=1)
+        self.add_text(summary)
         self.document.add_page_break()
     
-    def add_requirements_table(self, requirements: List[Dict[str, str]]):
-        """Add customer requirements table"""
-        self.document.add_heading('Customer Requirements', level=1)
-        table = self.document.add_table(rows=1, cols=3)
-        table.style = 'Table Grid'
-        
-        # Add header row
-        header_cells = table.rows[0].cells
-        header_cells[0].text = 'Requirement ID'
-        header_cells[1].text = 'Description'
-        header_cells[2].text = 'Priority'
-        
-        # Add requirement rows
-        for req in requirements:
-            row_cells = table.add_row().cells
-            row_cells[0].text = req['id']
-            row_cells[1].text = req['description']
-            row_cells[2].text = req['priority']
-        
-        self.document.add_page_break()
+    def add_requirements_table(self, requirements: List[Dict[str, str]], level: int = 1):
+        """Add customer requirements table; as a top-level section it ends with a page break"""
+        self.add_section_heading('Customer Requirements', level=level)
+        self.add_table(
+            ['Requirement ID', 'Description', 'Priority'],
+            [[req['id'], req['description'], req['priority']] for req in requirements],
+        )
+        if level == 1:
+            self.document.add_page_break()
     
     def add_scope_sections(self, in_scope: List[str], out_scope: List[str]):
         """Add scope sections"""
-        self.document.add_heading('Project Scope', level=1)
+        self.add_section_heading('Project Scope', level=1)
         
-        self.document.add_heading('In Scope', level=2)
-        for item in in_scope:
-            self.document.add_paragraph(item, style='List Bullet')
+        self.add_section_heading('In Scope', level=2)
+        self.add_bullets(in_scope)
             
-        self.document.add_heading('Out of Scope', level=2)
-        self.document.add_paragraph("Anything not specifically mentioned in scope is considered out of scope, including:")
-        for item in out_scope:
-            self.document.add_paragraph(item, style='List Bullet')
+        self.add_section_heading('Out of Scope', level=2)
+        self.add_text("Anything not specifically mentioned in scope is considered out of scope, including:")
+        self.add_bullets(out_scope)
         
         self.document.add_page_break()
     
     def add_solution_summary(self, summary: str, diagram_path: Optional[str] = None):
         """Add solution summary section"""
-        self.document.add_heading('Solution Summary', level=1)
-        self.document.add_paragraph(summary)
+        self.add_section_heading('Solution Summary', level=1)
+        self.add_text(summary)
         
         if diagram_path and os.path.exists(diagram_path):
-            self.document.add_picture(diagram_path, width=Inches(6))
+            self.assets.add_picture(self.document, diagram_path, width=Inches(6))
             
         self.document.add_page_break()
     
     def add_deliverables(self, deliverables: List[Dict[str, str]]):
         """Add deliverables section"""
-        self.document.add_heading('Deliverables', level=1)
-        table = self.document.add_table(rows=1, cols=2)
-        table.style = 'Table Grid'
-        
-        header_cells = table.rows[0].cells
-        header_cells[0].text = 'Deliverable'
-        header_cells[1].text = 'Description'
-        
-        for deliverable in deliverables:
-            row_cells = table.add_row().cells
-            row_cells[0].text = deliverable['name']
-            row_cells[1].text = deliverable['description']
-            
+        self.add_section_heading('Deliverables', level=1)
+        self.add_table(
+            ['Deliverable', 'Description'],
+            [[deliverable['name'], deliverable['description']] for deliverable in deliverables],
+        )
         self.document.add_page_break()
     
-    def add_costs_section(self, resources: List[Dict[str, str]], licenses: Optional[List[Dict[str, str]]] = None):
-        """Add costs section"""
-        self.document.add_heading('Costs and Resources', level=1)
+    def add_costs_section(self, resources: List[Dict[str, str]], licenses: Optional[List[Dict[str, str]]] = None,
+                          notes: Optional[str] = None, engine: Optional[CostEngine] = None,
+                          title: str = 'Costs and Resources', resources_title: Optional[str] = None,
+                          notes_title: Optional[str] = None):
+        """Add costs section; every figure is computed from the rate card"""
+        engine = engine or CostEngine()
+        estimate = engine.estimate(resources, licenses)
+        money = engine.format
+        self.add_section_heading(title, level=1)
         
         # Resource costs table
-        table = self.document.add_table(rows=1, cols=5)
-        table.style = 'Table Grid'
-        
-        header_cells = table.rows[0].cells
-        header_cells[0].text = 'Activity'
-        header_cells[1].text = 'Role'
-        header_cells[2].text = 'Type'
-        header_cells[3].text = 'Days'
-        header_cells[4].text = 'Cost'
-        
-        for resource in resources:
-            row_cells = table.add_row().cells
-            row_cells[0].text = resource['activity']
-            row_cells[1].text = resource['role']
-            row_cells[2].text = resource['type']
-            row_cells[3].text = str(resource['days'])
-            row_cells[4].text = resource.get('cost', '')
-            
-        if licenses:
-            self.document.add_heading('Required Licenses', level=2)
-            license_table = self.document.add_table(rows=1, cols=3)
-            license_table.style = 'Table Grid'
-            
-            header_cells = license_table.rows[0].cells
-            header_cells[0].text = 'License'
-            header_cells[1].text = 'Quantity'
-            header_cells[2].text = 'Cost'
+        if resources_title:
+            self.add_section_heading(resources_title, level=2)
+        rows = [
+            [line['activity'], line.get('role') or line.get('role_type', ''), line.get('type', ''),
+             f"{line['days']:g}", money(line['day_rate']), money(line['total'])]
+            for line in estimate['lines']
+        ]
+        rows.append(['Subtotal', '', '', f"{estimate['total_days']:g}", '', money(estimate['subtotal'])])
+        rows.append([f"Contingency ({estimate['contingency_rate']:.0%})", '', '', '', '', money(estimate['contingency'])])
+        self.add_table(['Activity', 'Role', 'Type', 'Days', 'Day Rate', 'Cost'], rows)
             
-            for license in licenses:
-                row_cells = license_table.add_row().cells
-                row_cells[0].text = license['name']
-                row_cells[1].text = str(license['quantity'])
-                row_cells[2].text = license.get('cost', '')
+        if estimate['licenses']:
+            self.add_section_heading('Required Licenses', level=2)
+            rows = [
+                [license.get('name', ''), f"{license['quantity']:g}", money(license['unit_price']), money(license['total'])]
+                for license in estimate['licenses']
+            ]
+            rows.append(['Total', '', '', money(estimate['license_total'])])
+            self.add_table(['License', 'Quantity', 'Unit Price', 'Cost'], rows)
+        
+        if notes_title:
+            self.add_section_heading(notes_title, level=2)
+        if notes:
+            self.add_text(notes)
+        self.add_text(f"Total cost: {money(estimate['total'])}")
+        if estimate['unpriced_roles']:
+            self.add_text("The total excludes roles priced on application: "
+                          f"{', '.join(estimate['unpriced_roles'])}")
+        if estimate['unpriced_licenses']:
+            self.add_text("The total excludes licences priced on application: "
+                          f"{', '.join(estimate['unpriced_licenses'])}")
                 
         self.document.add_page_break()
+        return estimate
     
     def add_raid_section(self, risks: List[str], assumptions: List[str], 
-                        issues: List[str], dependencies: List[str]):
+                        issues: List[str], dependencies: List[str], title: str = 'RAID Analysis'):
         """Add RAID analysis section"""
-        self.document.add_heading('RAID Analysis', level=1)
+        self.add_section_heading(title, level=1)
         
-        self.document.add_heading('Risks', level=2)
-        for risk in risks:
-            self.document.add_paragraph(risk, style='List Bullet')
+        self.add_section_heading('Risks', level=2)
+        self.add_bullets(risks)
             
-        self.document.add_heading('Assumptions', level=2)
-        for assumption in assumptions:
-            self.document.add_paragraph(assumption, style='List Bullet')
+        self.add_section_heading('Assumptions', level=2)
+        self.add_bullets(assumptions)
             
-        self.document.add_heading('Issues', level=2)
-        for issue in issues:
-            self.document.add_paragraph(issue, style='List Bullet')
+        self.add_section_heading('Issues', level=2)
+        self.add_bullets(issues)
             
-        self.document.add_heading('Dependencies', level=2)
-        for dependency in dependencies:
-            self.document.add_paragraph(dependency, style='List Bullet')
+        self.add_section_heading('Dependencies', level=2)
+        self.add_bullets(dependencies)
             
         self.document.add_page_break()
     
     def add_effort_breakdown(self, tasks: List[Dict[str, str]]):
         """Add effort breakdown section"""
-        self.document.add_heading('Effort Breakdown', level=1)
-        table = self.document.add_table(rows=1, cols=4)
-        table.style = 'Table Grid'
-        
-        header_cells = table.rows[0].cells
-        header_cells[0].text = 'Task'
-        header_cells[1].text = 'Description'
-        header_cells[2].text = 'Role'
-        header_cells[3].text = 'Effort (days)'
-        
-        for task in tasks:
-            row_cells = table.add_row().cells
-            row_cells[0].text = task['name']
-            row_cells[1].text = task['description']
-            row_cells[2].text = task['role']
-            row_cells[3].text = str(task['effort'])
+        self.add_section_heading('Effort Breakdown', level=1)
+        self.add_table(
+            ['Task', 'Description', 'Role', 'Effort (days)'],
+            [[task['name'], task['description'], task['role'], str(task['effort'])] for task in tasks],
+        )
     
     def save(self, filename: str):
         """Save the document"""
+        if self.filler:
+            self.filler.finish()
+        self.toc.finalize()
         self.document.save(filename) 
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Effort estimation from past proposals.
+
+Historical task breakdowns are read from two JSONL files, one ``{"task",
+"effort", "role"}`` row per line: the seed history kept with the code
+(history/task_efforts.jsonl unless PROPOSAL_EFFORT_HISTORY points elsewhere)
+and the confirmed actuals recorded after delivery (history/actuals.jsonl
+unless PROPOSAL_EFFORT_ACTUALS points elsewhere; not tracked by git). Only
+delivered effort is recorded, never the estimates in a generated proposal, so
+history does not feed on its own guesses.
+
+Task texts are indexed as TF-IDF vectors; a task is estimated from its
+nearest historical neighbours (similarity-weighted mean effort). The LLM
+still lists the project's tasks; apply_estimates() then replaces the effort of
+every task history recognises and leaves the rest to the LLM.
+
+Record actuals from a JSON list of task rows:
+
+    python effort_estimator.py record delivered_tasks.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history")
+DEFAULT_HISTORY = os.path.join(HISTORY_DIR, "task_efforts.jsonl")
+DEFAULT_ACTUALS = os.path.join(HISTORY_DIR, "actuals.jsonl")
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = {"and", "or", "the", "of", "for", "to", "a", "an", "in", "on", "with", "&"}
+
+# Tasks every breakdown covers
+STANDARD_TASKS = [
+    "Requirements gathering",
+    "Architecture and design",
+    "System setup and configuration",
+    "Testing",
+    "Documentation",
+    "Training",
+]
+
+
+def tokenize(text: str) -> List[str]:
+    """Words plus adjacent word pairs, so 'user training' and 'training users' still overlap"""
+    words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOP_WORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def history_path() -> str:
+    return os.getenv("PROPOSAL_EFFORT_HISTORY", DEFAULT_HISTORY)
+
+
+def actuals_path() -> str:
+    return os.getenv("PROPOSAL_EFFORT_ACTUALS", DEFAULT_ACTUALS)
+
+
+def load_history(path: str) -> List[Dict]:
+    rows = []
+    if not os.path.exists(path):
+        return rows
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if row.get("task") and row.get("effort") is not None:
+                    rows.append(row)
+    return rows
+
+
+def record_actuals(tasks: Sequence[Dict], path: Optional[str] = None):
+    """Append the effort tasks actually took once delivered, so later proposals can reuse it"""
+    path = path or actuals_path()
+    rows = [
+        {"task": task["task"], "effort": float(task["effort"]), "role": task.get("role", "")}
+        for task in tasks
+        if task.get("task") and isinstance(task.get("effort"), (int, float))
+    ]
+    if not rows:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+class EffortEstimator:
+    def __init__(self, rows: List[Dict], k: int = 3, min_similarity: float = 0.35):
+        self.rows = rows
+        self.k = k
+        self.min_similarity = min_similarity
+        self.efforts = np.array([float(row["effort"]) for row in rows], dtype=float)
+
+        documents = [tokenize(row["task"]) for row in rows]
+        document_frequency = Counter(term for terms in documents for term in set(terms))
+        self.vocabulary = {term: index for index, term in enumerate(sorted(document_frequency))}
+        count = len(documents)
+        self.idf = np.array([
+            math.log((1 + count) / (1 + document_frequency[term])) + 1 for term in sorted(document_frequency)
+        ], dtype=float)
+        self.matrix = np.vstack([self._vector(terms) for terms in documents]) if documents else None
+
+    @classmethod
+    def from_history(cls, path: Optional[str] = None, actuals: Optional[str] = None, **kwargs) -> "EffortEstimator":
+        paths = (path or history_path(), actuals or actuals_path())
+        mtimes = tuple(os.path.getmtime(p) if os.path.exists(p) else 0.0 for p in paths)
+        return _cached_estimator(paths, mtimes, tuple(sorted(kwargs.items())))
+
+    def _vector(self, terms: List[str]) -> np.ndarray:
+        vector = np.zeros(len(self.vocabulary), dtype=float)
+        for term, frequency in Counter(terms).items():
+            index = self.vocabulary.get(term)
+            if index is not None:
+                vector[index] = frequency
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def predict(self, task: str) -> Optional[Dict]:
+        """Estimate one task, or None when history has nothing similar"""
+        if self.matrix is None:
+            return None
+        similarities = self.matrix @ self._vector(tokenize(task))
+        nearest = np.argsort(similarities)[::-1][:self.k]
+        nearest = nearest[similarities[nearest] >= self.min_similarity]
+        if not len(nearest):
+            return None
+
+        weights = similarities[nearest]
+        effort = float(np.dot(weights, self.efforts[nearest]) / weights.sum())
+        roles = Counter(self.rows[i].get("role", "") for i in nearest)
+        return {
+            "task": task,
+            "effort": round(effort * 2) / 2,  # half-day granularity
+            "role": roles.most_common(1)[0][0],
+            "similarity": round(float(weights[0]), 3),
+            "neighbours": [self.rows[i]["task"] for i in nearest],
+        }
+
+    def split(self, tasks: Sequence[str]) -> Tuple[List[Dict], List[str]]:
+        """Return (estimated rows, novel task names)"""
+        estimated, novel = [], []
+        for task in tasks:
+            prediction = self.predict(task)
+            if prediction is None:
+                novel.append(task)
+            else:
+                estimated.append(prediction)
+        return estimated, novel
+
+
+@lru_cache(maxsize=8)
+def _cached_estimator(paths: Tuple[str, ...], mtimes: Tuple[float, ...], options: Tuple) -> EffortEstimator:
+    # mtimes are part of the key so recorded actuals are picked up on the next call
+    return EffortEstimator([row for path in paths for row in load_history(path)], **dict(options))
+
+
+def _cells(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def apply_estimates(text: str, estimator: EffortEstimator) -> str:
+    """
+    Replace the effort in a markdown task table for every task history
+    recognises. Rows history has nothing similar to, and any text outside the
+    table, are kept as the LLM wrote them.
+    """
+    lines = text.split("\n")
+    task_col = effort_col = role_col = None
+    for index, line in enumerate(lines):
+        if not line.strip().startswith("|"):
+            task_col = effort_col = None
+            continue
+        cells = _cells(line)
+        lowered = [cell.lower() for cell in cells]
+        if task_col is None:
+            # A header row names the task and effort columns
+            task_col = next((i for i, cell in enumerate(lowered) if "task" in cell), None)
+            effort_col = next((i for i, cell in enumerate(lowered) if "effort" in cell or "days" in cell), None)
+            role_col = next((i for i, cell in enumerate(lowered) if "role" in cell), None)
+            if effort_col is None:
+                task_col = None
+            continue
+        if all(set(cell) <= set("-: ") for cell in cells) or len(cells) <= max(task_col, effort_col):
+            continue
+        prediction = estimator.predict(cells[task_col])
+        if prediction is None:
+            continue
+        cells[effort_col] = f"{prediction['effort']:g}"
+        if role_col is not None and role_col < len(cells) and not cells[role_col]:
+            cells[role_col] = prediction["role"]
+        lines[index] = "| " + " | ".join(cells) + " |"
+    return "\n".join(lines)
+
+
+def format_effort_table(rows: Sequence[Dict]) -> str:
+    lines = ["| Task | Role | Effort (days) |", "|---|---|---|"]
+    for row in rows:
+        lines.append(f"| {row['task']} | {row.get('role', '')} | {row['effort']:g} |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Effort history")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="record delivered effort from a JSON list of task rows")
+    record.add_argument("tasks", help='JSON file: [{"task": ..., "effort": days, "role": ...}, ...]')
+    args = parser.parse_args()
+
+    with open(args.tasks) as f:
+        tasks = json.load(f)
+    record_actuals(tasks)
+    print(f"Recorded {len(tasks)} task(s) in {actuals_path()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Warm, persistent code execution for autogen agents.
+
+autogen's local executor writes every code block to a file and runs it in a
+fresh interpreter, which then re-imports python-docx and the document builder
+before doing any work. PersistentCodeExecutor keeps one long-lived worker
+process instead: it starts once with those modules already imported and runs
+each Python block in a clean namespace, talking to the agent process over a
+pipe. Each block has a timeout and the worker an address-space limit; a worker
+that times out, runs out of memory or crashes is replaced automatically.
+
+Implements autogen's CodeExecutor protocol, so it plugs into
+``code_execution_config={"executor": ...}``. Shell blocks are run as
+subprocesses in the same work_dir with the same timeout.
+"""
+import contextlib
+import io
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import traceback
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TIMEOUT = 60  # seconds per code block
+DEFAULT_MEMORY_LIMIT_MB = 2048
+DEFAULT_PRELOAD = ("docx", "proposal_builder")
+PYTHON_LANGUAGES = {"python", "py", "python3", "py3"}
+SHELL_LANGUAGES = {"bash", "shell", "sh"}
+TIMEOUT_EXIT_CODE = 124  # same as autogen's local executor
+
+
+def _serve(conn, work_dir: str, memory_limit_mb: Optional[int], preload: Sequence[str]):
+    """Worker loop: receive source, run it, send back (exit_code, output)"""
+    if memory_limit_mb:
+        try:
+            import resource
+
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning(f"Could not set the worker memory limit: {e}")
+
+    os.makedirs(work_dir, exist_ok=True)
+    os.chdir(work_dir)
+    # Like running a script from work_dir: its modules (document_utils) and the repo are importable
+    sys.path[:0] = [os.getcwd(), REPO_DIR]
+    for module in preload:
+        try:
+            __import__(module)
+        except Exception as e:
+            logger.warning(f"Could not preload {module}: {e}")
+    conn.send("ready")
+
+    while True:
+        try:
+            source = conn.recv()
+        except EOFError:
+            return
+        output = io.StringIO()
+        exit_code = 0
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                exec(compile(source, "<code block>", "exec"), {"__name__": "__main__"})
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except BaseException:
+                exit_code = 1
+                traceback.print_exc()
+        conn.send((exit_code, output.getvalue()))
+
+
+class PersistentCodeExecutor:
+    def __init__(self, work_dir: str = "workdir", timeout: float = DEFAULT_TIMEOUT,
+                 memory_limit_mb: Optional[int] = DEFAULT_MEMORY_LIMIT_MB,
+                 preload: Sequence[str] = DEFAULT_PRELOAD):
+        self.work_dir = os.path.abspath(work_dir)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.preload = tuple(preload)
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self.stats = {"executions": 0, "restarts": 0, "timeouts": 0, "crashes": 0}
+
+    @property
+    def code_extractor(self):
+        from autogen.coding import MarkdownCodeExtractor
+
+        return MarkdownCodeExtractor()
+
+    def start(self):
+        """Start the worker and wait until its preloads are imported"""
+        if self._process is not None and self._process.is_alive():
+            return
+        parent_conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_serve,
+            args=(child_conn, self.work_dir, self.memory_limit_mb, self.preload),
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        try:
+            ready = parent_conn.poll(max(self.timeout, 30)) and parent_conn.recv() == "ready"
+        except EOFError:
+            ready = False
+        if not ready:
+            self._stop()
+            raise RuntimeError("Code execution worker failed to start")
+
+    def _stop(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.kill()
+            self._process.join()
+            self._process = None
+
+    def restart(self):
+        """Replace the worker with a fresh one"""
+        with self._lock:
+            self._stop()
+            self.stats["restarts"] += 1
+            self.start()
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+    def _run_python(self, source: str):
+        self.start()
+        try:
+            self._conn.send(source)
+            if self._conn.poll(self.timeout):
+                return self._conn.recv()
+            self.stats["timeouts"] += 1
+            result = (TIMEOUT_EXIT_CODE, f"Timeout: code block did not finish within {self.timeout}s")
+        except (EOFError, OSError, BrokenPipeError):
+            # Killed by the memory limit or crashed hard
+            self.stats["crashes"] += 1
+            result = (1, "Code execution worker crashed; the next block runs in a fresh worker")
+        # The worker may still be busy or is gone; replace it on the next block
+        self._stop()
+        self.stats["restarts"] += 1
+        return result
+
+    def _run_shell(self, source: str):
+        try:
+            completed = subprocess.run(
+                ["bash", "-c", source], cwd=self.work_dir, capture_output=True, text=True, timeout=self.timeout
+            )
+        except subprocess.TimeoutExpired:
+            return TIMEOUT_EXIT_CODE, f"Timeout: code block did not finish within {self.timeout}s"
+        return completed.returncode, completed.stdout + completed.stderr
+
+    def execute_code_blocks(self, code_blocks: List):
+        """Run blocks in order, stopping at the first failure (autogen CodeExecutor API)"""
+        from autogen.coding import CodeResult
+
+        outputs = []
+        exit_code = 0
+        with self._lock:
+            for block in code_blocks:
+                language = (block.language or "python").lower()
+                if language in PYTHON_LANGUAGES:
+                    exit_code, output = self._run_python(block.code)
+                elif language in SHELL_LANGUAGES:
+                    exit_code, output = self._run_shell(block.code)
+                else:
+                    exit_code, output = 1, f"Unsupported language: {language}"
+                self.stats["executions"] += 1
+                outputs.append(output)
+                if exit_code != 0:
+                    break
+        return CodeResult(exit_code=exit_code, output="".join(outputs))
+
+
+@lru_cache(maxsize=None)
+def shared_executor(work_dir: str) -> PersistentCodeExecutor:
+    """One warm worker per work_dir, shared by every agent that executes code there"""
+    import atexit
+
+    executor = PersistentCodeExecutor(work_dir=work_dir)
+    atexit.register(executor.close)
+    return executor
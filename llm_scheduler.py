@@ -0,0 +1,366 @@
+"""
+Weighted fair scheduling of the shared LLM quota across tenants.
+
+Every LLM call in the process takes one of ``capacity`` call slots from the
+scheduler first. While slots are free, calls go straight through. Once they
+are all busy, calls wait in per-tenant queues and each freed slot goes to:
+
+    1. the highest priority waiting (INTERACTIVE before BATCH), then
+    2. within a priority, the tenant with the smallest virtual finish time
+       (self-clocked weighted fair queuing over estimated tokens), so a tenant
+       with weight 2 gets twice the share of a tenant with weight 1 and one
+       tenant's long group chat cannot starve everyone else's short requests.
+
+Tenants can also be limited to ``max_in_flight`` concurrent calls and to a
+``token_quota`` per ``quota_window`` seconds. Over quota, a call raises
+QuotaExceededError instead of queuing. Queue waits are kept per tenant, and
+report() gives their percentiles.
+
+The tenant and priority of the current request are carried in context
+variables, so they reach LLM calls made from worker threads (autogen) and
+asyncio tasks alike:
+
+    with tenant_scope("sales", INTERACTIVE):
+        generate_proposal(...)
+
+Callers reach the scheduler through the backend they use:
+
+    AsyncBaseAgent / AsyncProposalOrchestrator   scheduler= (server.py, batch.py, rfp_ingest.py)
+    BaseAgent / ProposalOrchestrator             scheduler= (proposal_generator_agent.py)
+    CrewProposalBackend                          scheduler=, via a before-LLM-call hook
+    autogen                                      install_autogen() (app.py, main.py, proposal_generator.py)
+
+Tenants are configured with LLM_SCHEDULER_TENANTS, a JSON object such as
+'{"sales": {"weight": 3}, "presales": {"weight": 1, "token_quota": 2000000}}'.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITIES = {"interactive": INTERACTIVE, "batch": BATCH}
+
+DEFAULT_TENANT = "default"
+DEFAULT_CAPACITY = 32
+DEFAULT_QUOTA_WINDOW = 3600.0  # seconds
+WAIT_SAMPLES = 1000  # most recent queue waits kept per tenant
+MAX_TENANT_LENGTH = 64
+MAX_TENANTS = 1000  # unconfigured tenants beyond this share the default tenant's queue
+
+_tenant = contextvars.ContextVar("llm_tenant", default=DEFAULT_TENANT)
+_priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+
+class QuotaExceededError(Exception):
+    """Raised instead of queuing a call once a tenant has used up its token quota"""
+
+    def __init__(self, tenant: str, retry_after: float):
+        super().__init__(f"LLM quota exceeded for tenant '{tenant}'; retry in {retry_after:.0f}s")
+        self.tenant = tenant
+        self.retry_after = retry_after
+
+
+def normalize_tenant(tenant: Optional[str]) -> str:
+    """Tenant names come from request headers; keep them short and printable"""
+    tenant = "".join(c for c in (tenant or "").strip() if c.isprintable())[:MAX_TENANT_LENGTH]
+    return tenant or DEFAULT_TENANT
+
+
+@contextmanager
+def tenant_scope(tenant: Optional[str], priority: int = INTERACTIVE):
+    """Attribute the LLM calls made inside the block to ``tenant`` at ``priority``"""
+    tenant_token = _tenant.set(normalize_tenant(tenant))
+    priority_token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _tenant.reset(tenant_token)
+        _priority.reset(priority_token)
+
+
+def current_tenant() -> str:
+    return _tenant.get()
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def estimate_tokens(messages, max_tokens: Optional[int] = None) -> int:
+    """Rough size of a call for fair queuing: ~4 characters per prompt token, plus the completion cap"""
+    chars = sum(len(str(message.get("content") or "")) for message in messages or [])
+    return max(1, chars // 4) + (max_tokens or 0)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class _Waiter:
+    __slots__ = ("tenant", "priority", "finish", "seq", "enqueued_at", "grant", "granted")
+
+    def __init__(self, tenant, priority, finish, seq, grant):
+        self.tenant = tenant
+        self.priority = priority
+        self.finish = finish
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.grant = grant
+        self.granted = False
+
+
+class LLMScheduler:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, tenants: Optional[Dict[str, Dict]] = None,
+                 quota_window: float = DEFAULT_QUOTA_WINDOW):
+        self.capacity = capacity
+        self.policies = tenants or {}
+        self.quota_window = quota_window
+        self.in_flight = 0
+        self.virtual_time = 0.0
+        self._seq = 0
+        self._queues: Dict[str, deque] = {}
+        self._tenants: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """Capacity from LLM_SCHEDULER_CONCURRENCY, tenant policies from LLM_SCHEDULER_TENANTS"""
+        kwargs.setdefault("capacity", int(os.getenv("LLM_SCHEDULER_CONCURRENCY", DEFAULT_CAPACITY)))
+        kwargs.setdefault("tenants", json.loads(os.getenv("LLM_SCHEDULER_TENANTS") or "{}"))
+        return cls(**kwargs)
+
+    # Tenant state
+
+    def _resolve(self, tenant: str) -> str:
+        """Tenant names come from clients, so unknown ones are not allowed to grow state without bound"""
+        if tenant in self._tenants or tenant in self.policies or len(self._tenants) < MAX_TENANTS:
+            return tenant
+        return DEFAULT_TENANT
+
+    def _state(self, tenant: str) -> Dict:
+        state = self._tenants.get(tenant)
+        if state is None:
+            policy = self.policies.get(tenant, {})
+            state = self._tenants[tenant] = {
+                "weight": float(policy.get("weight", 1.0)),
+                "max_in_flight": policy.get("max_in_flight"),
+                "token_quota": policy.get("token_quota"),
+                "last_finish": 0.0,
+                "in_flight": 0,
+                "calls": 0,
+                "tokens": 0,
+                "rejected": 0,
+                "window_start": time.monotonic(),
+                "window_tokens": 0,
+                "waits": deque(maxlen=WAIT_SAMPLES),
+            }
+        return state
+
+    def _check_quota(self, tenant: str, state: Dict):
+        quota = state["token_quota"]
+        if not quota:
+            return
+        now = time.monotonic()
+        if now - state["window_start"] >= self.quota_window:
+            state["window_start"], state["window_tokens"] = now, 0
+        if state["window_tokens"] >= quota:
+            state["rejected"] += 1
+            raise QuotaExceededError(tenant, state["window_start"] + self.quota_window - now)
+
+    def record(self, tenant: str, tokens: int):
+        """Charge a finished call's actual tokens to its tenant's quota"""
+        with self._lock:
+            state = self._state(self._resolve(tenant))
+            state["tokens"] += tokens
+            state["window_tokens"] += tokens
+
+    # Slot accounting (all under self._lock)
+
+    def _enqueue(self, tenant: str, priority: int, cost: int, grant) -> _Waiter:
+        tenant = self._resolve(tenant)
+        state = self._state(tenant)
+        self._check_quota(tenant, state)
+        # A tenant that was idle restarts at the current virtual time rather than banking credit
+        finish = max(self.virtual_time, state["last_finish"]) + cost / state["weight"]
+        state["last_finish"] = finish
+        self._seq += 1
+        waiter = _Waiter(tenant, priority, finish, self._seq, grant)
+        self._queues.setdefault(tenant, deque()).append(waiter)
+        return waiter
+
+    def _dispatch(self):
+        """Hand free slots to the next eligible waiters"""
+        while self.in_flight < self.capacity:
+            best = None
+            for tenant, queue in self._queues.items():
+                if not queue:
+                    continue
+                state = self._tenants[tenant]
+                if state["max_in_flight"] and state["in_flight"] >= state["max_in_flight"]:
+                    continue
+                head = queue[0]
+                if best is None or (head.priority, head.finish, head.seq) < (best.priority, best.finish, best.seq):
+                    best = head
+            if best is None:
+                return
+            self._queues[best.tenant].popleft()
+            state = self._tenants[best.tenant]
+            state["in_flight"] += 1
+            state["calls"] += 1
+            state["waits"].append(time.monotonic() - best.enqueued_at)
+            self.in_flight += 1
+            self.virtual_time = max(self.virtual_time, best.finish)
+            best.granted = True
+            best.grant()
+
+    def _release(self, tenant: str):
+        with self._lock:
+            self.in_flight -= 1
+            self._tenants[tenant]["in_flight"] -= 1
+            self._dispatch()
+
+    def _abandon(self, waiter: _Waiter):
+        """A waiter gave up (timeout or cancellation); free its slot if it got one meanwhile"""
+        with self._lock:
+            if not waiter.granted:
+                self._queues[waiter.tenant].remove(waiter)
+                return
+        self._release(waiter.tenant)
+
+    # Public API
+
+    def acquire(self, cost: int = 1, tenant: Optional[str] = None, priority: Optional[int] = None) -> str:
+        """
+        Wait for a call slot (blocking) and return the tenant it is held for;
+        pass that to release() once the call is done. For callers that cannot
+        wrap the call in slot(), such as framework hooks.
+        """
+        tenant = tenant or _tenant.get()
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(tenant, _priority.get() if priority is None else priority, cost, event.set)
+            self._dispatch()
+        try:
+            event.wait()
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        return waiter.tenant
+
+    def release(self, tenant: str):
+        """Free a slot taken with acquire()"""
+        self._release(tenant)
+
+    @contextmanager
+    def slot(self, cost: int = 1, tenant: Optional[str] = None, priority: Optional[int] = None):
+        """Hold a call slot for the current tenant while the block runs (blocking)"""
+        tenant = self.acquire(cost, tenant, priority)
+        try:
+            yield
+        finally:
+            self._release(tenant)
+
+    @asynccontextmanager
+    async def slot_async(self, cost: int = 1, tenant: Optional[str] = None, priority: Optional[int] = None):
+        """Async counterpart of slot(); waiting does not block the event loop"""
+        tenant = tenant or _tenant.get()
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def grant():
+            # May run on another thread when a sync caller releases the slot
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        with self._lock:
+            waiter = self._enqueue(tenant, _priority.get() if priority is None else priority, cost, grant)
+            self._dispatch()
+        try:
+            await granted
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        try:
+            yield
+        finally:
+            self._release(waiter.tenant)
+
+    def report(self) -> Dict[str, Dict]:
+        """Per-tenant calls, tokens, queue lengths and queue-wait percentiles (seconds)"""
+        with self._lock:
+            report = {}
+            for tenant, state in self._tenants.items():
+                waits = list(state["waits"])
+                report[tenant] = {
+                    "weight": state["weight"],
+                    "calls": state["calls"],
+                    "tokens": state["tokens"],
+                    "in_flight": state["in_flight"],
+                    "queued": len(self._queues.get(tenant, ())),
+                    "rejected": state["rejected"],
+                    "wait_p50": round(percentile(waits, 50), 4) if waits else None,
+                    "wait_p95": round(percentile(waits, 95), 4) if waits else None,
+                    "wait_p99": round(percentile(waits, 99), 4) if waits else None,
+                }
+            return report
+
+    def log_report(self):
+        for tenant, r in self.report().items():
+            logger.info(f"event=llm_scheduler tenant={tenant} calls={r['calls']} tokens={r['tokens']} "
+                        f"queued={r['queued']} rejected={r['rejected']} wait_p50={r['wait_p50']} "
+                        f"wait_p95={r['wait_p95']} wait_p99={r['wait_p99']}")
+
+    def install_autogen(self):
+        """
+        Route every autogen LLM call in the process through this scheduler.
+
+        autogen builds fresh clients for group chat speaker selection, so the
+        hook goes on OpenAIClient itself rather than on each agent. Cache hits
+        never reach it and are not charged. Installing again replaces the
+        scheduler used; the hook itself is only added once, so it stacks with
+        other OpenAIClient hooks (budget.install_autogen_hook) in any order.
+        """
+        global _autogen_scheduler
+        from autogen.oai.client import OpenAIClient
+
+        with _scheduler_lock:
+            installed = _autogen_scheduler is not None
+            _autogen_scheduler = self
+        if installed:
+            return
+        create = OpenAIClient.create
+
+        def scheduled_create(client, params):
+            scheduler = _autogen_scheduler
+            tenant = _tenant.get()
+            with scheduler.slot(estimate_tokens(params.get("messages"), params.get("max_tokens")), tenant):
+                response = create(client, params)
+            usage = getattr(response, "usage", None)
+            scheduler.record(tenant, getattr(usage, "total_tokens", 0) or 0)
+            return response
+
+        OpenAIClient.create = scheduled_create
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_autogen_scheduler = None  # the scheduler install_autogen routes autogen calls through
+
+
+def shared_scheduler() -> LLMScheduler:
+    """The process-wide scheduler, configured from the environment on first use"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler.from_env()
+        return _scheduler
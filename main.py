@@ -1,5 +1,5 @@
-import autogen
 from typing import Dict, List
+import argparse
 import os
 import getpass
 import sys
@@ -7,6 +7,12 @@ from dotenv import load_dotenv
 import re
 import time
 
+from budget import BudgetExceededError, ProposalBudget
+from checkpoint import ChatCheckpointer, CheckpointStore
+from llm_scheduler import shared_scheduler
+from termination import ChatTermination, ReviewerApproved, SectionsCollected
+from termination import stats as termination_stats
+
 def validate_api_key(api_key: str) -> bool:
     """Validate the format of the API key"""
     api_key = api_key.strip()
@@ -35,14 +41,21 @@ def setup_api_key():
 
 def create_agents(config_list):
     """Create the agent team"""
+    import autogen
+    from exec_worker import shared_executor
+    from quality_gate import gate_autogen_reviewer
+
+    # Code blocks run in a persistent worker with python-docx preloaded
+    executor = shared_executor("workspace")
+    executor.start()
+
     user_proxy = autogen.UserProxyAgent(
         name="user_proxy",
         system_message="A human user who needs a project proposal document.",
         human_input_mode="ALWAYS",
         code_execution_config={
             "last_n_messages": 3,
-            "work_dir": "workspace",
-            "use_docker": False
+            "executor": executor,
         },
     )
 
@@ -65,6 +78,7 @@ def create_agents(config_list):
         },
         system_message="""You are an expert proposal writer focusing on one section at a time.
         Write detailed, professional content for the current section.
+        Start each draft with the section name as a markdown heading.
         Use clear language and proper formatting."""
     )
 
@@ -76,11 +90,63 @@ def create_agents(config_list):
         },
         system_message="""You are a critical proposal reviewer focusing on one section at a time.
         Review the current section for completeness, accuracy, and clarity.
-        Suggest specific improvements."""
+        Suggest specific improvements. When the section needs no further changes, reply with APPROVED."""
     )
+    # Drafts are checked against the rules of the section named in their heading before the LLM review
+    gate_autogen_reviewer(proposal_reviewer, authors=["Proposal_Writer"])
 
     return user_proxy, requirements_analyst, proposal_writer, proposal_reviewer
 
+# Proposal sections, worked on one at a time in their own group chat
+SECTIONS = {
+    "Requirements Gathering": """
+    Focus on gathering specific details about:
+    1. Existing CRM system and integration requirements
+    2. Expected user volume and scalability needs
+    3. Security and compliance requirements
+    4. Budget constraints
+    5. Timeline requirements
+    """,
+    
+    "Technical Solution": """
+    Design the technical solution including:
+    1. Technology stack selection
+    2. Integration architecture
+    3. Scalability design
+    4. Security measures
+    """,
+    
+    "Implementation Plan": """
+    Create a detailed implementation plan including:
+    1. Timeline and milestones
+    2. Resource requirements
+    3. Risk mitigation strategies
+    4. Success metrics
+    """
+}
+
+def create_section_chat(agents, config_list):
+    """
+    Group chat shared by the section chats. Returns (manager, termination,
+    collected); call collected.expect([section]) and termination.begin(section)
+    before each section so its chat ends once the draft is in or approved.
+    """
+    import autogen
+
+    groupchat = autogen.GroupChat(
+        agents=list(agents),
+        messages=[],
+        max_round=10  # Limit rounds per section to avoid rate limits
+    )
+    collected = SectionsCollected(authors=["Proposal_Writer"], reviewer="Proposal_Reviewer")
+    termination = ChatTermination(collected, ReviewerApproved("Proposal_Reviewer"), max_round=groupchat.max_round)
+    manager = autogen.GroupChatManager(
+        groupchat=groupchat,
+        llm_config={"config_list": config_list},
+        is_termination_msg=termination,
+    )
+    return manager, termination, collected
+
 def work_on_section(manager, user_proxy, section_name: str, section_prompt: str):
     """Work on a specific section of the proposal"""
     print(f"\nWorking on: {section_name}")
@@ -95,7 +161,14 @@ def work_on_section(manager, user_proxy, section_name: str, section_prompt: str)
         Please gather requirements and create content for this section only."""
     )
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a proposal section by section")
+    parser.add_argument("--resume", metavar="RUN_ID", help="continue an interrupted run from its last checkpoint")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+
     # Set up API key
     api_key = setup_api_key()
     os.environ["OPENAI_API_KEY"] = api_key
@@ -108,59 +181,66 @@ def main():
         }
     ]
     
+    # Load or start the run checkpoint
+    if args.resume:
+        checkpointer = ChatCheckpointer.resume(args.resume, "main.py")
+    else:
+        checkpointer = ChatCheckpointer(CheckpointStore.new_run_id(), "main.py")
+    run_id = checkpointer.run_id
+    print(f"Run ID: {run_id}")
+
     # Create agents
+    budget = ProposalBudget.from_env(run_id=run_id)
     user_proxy, requirements_analyst, proposal_writer, proposal_reviewer = create_agents(config_list)
     
     # Create group chat
-    groupchat = autogen.GroupChat(
-        agents=[user_proxy, requirements_analyst, proposal_writer, proposal_reviewer],
-        messages=[],
-        max_round=10  # Limit rounds per section to avoid rate limits
+    manager, termination, collected = create_section_chat(
+        [user_proxy, requirements_analyst, proposal_writer, proposal_reviewer], config_list
     )
+    groupchat = manager.groupchat
+    budget.attach_autogen([requirements_analyst, proposal_writer, proposal_reviewer, manager])
+    # Autogen calls share the process-wide LLM scheduler, as in app.py
+    shared_scheduler().install_autogen()
+    checkpointer.attach(groupchat)
     
-    manager = autogen.GroupChatManager(
-        groupchat=groupchat,
-        llm_config={"config_list": config_list}
-    )
-    
-    # Work on each section
-    sections = {
-        "Requirements Gathering": """
-        Focus on gathering specific details about:
-        1. Existing CRM system and integration requirements
-        2. Expected user volume and scalability needs
-        3. Security and compliance requirements
-        4. Budget constraints
-        5. Timeline requirements
-        """,
-        
-        "Technical Solution": """
-        Design the technical solution including:
-        1. Technology stack selection
-        2. Integration architecture
-        3. Scalability design
-        4. Security measures
-        """,
-        
-        "Implementation Plan": """
-        Create a detailed implementation plan including:
-        1. Timeline and milestones
-        2. Resource requirements
-        3. Risk mitigation strategies
-        4. Success metrics
-        """
-    }
-    
+    finished = False
     try:
-        for section_name, section_prompt in sections.items():
+        # Finish the section that was interrupted, from its last good round
+        interrupted = checkpointer.state["current_section"]
+        if interrupted and checkpointer.messages:
+            print(f"\nResuming: {interrupted} (round {checkpointer.state['round']})")
+            print("-" * 50)
+            collected.expect([interrupted])
+            termination.begin(interrupted)
+            checkpointer.resume_chat(manager)
+            termination.end()
+            checkpointer.complete_section(interrupted)
+
+        for section_name, section_prompt in SECTIONS.items():
+            if section_name in checkpointer.completed_sections:
+                continue
+            checkpointer.begin_section(section_name)
+            collected.expect([section_name])
+            termination.begin(section_name)
             work_on_section(manager, user_proxy, section_name, section_prompt)
+            termination.end()
+            checkpointer.complete_section(section_name)
             print("\nWaiting 10 seconds before next section to avoid rate limits...")
             time.sleep(10)
+        finished = True
     
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.")
+    except BudgetExceededError as e:
+        print(f"\nStopping: {e}")
     except Exception as e:
         print(f"\nError: {str(e)}")
+    finally:
+        if not finished:
+            print(f"Progress saved. Continue with: python main.py --resume {run_id}")
+        print(f"Early termination saved {termination_stats['rounds_saved']} group chat rounds "
+              f"across {termination_stats['chats']} section chats")
+        print(f"Usage report written to {budget.write_report()}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
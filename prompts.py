@@ -0,0 +1,132 @@
+"""
+Prompt registry for the proposal agents.
+
+Templates are parsed once when they are registered, so rendering a prompt is a
+join over precompiled parts rather than a fresh f-string/format parse. Each
+template keeps its static instructions in the system message and puts the
+per-proposal values last, so the leading tokens of every request are identical
+across calls and eligible for provider-side prompt caching.
+
+The registry also counts prompt tokens per agent, so the cost of each system
+prompt and rendered prompt can be measured.
+"""
+import logging
+import string
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(encoding_name: str):
+    """The tiktoken encoding, or None when tiktoken is missing or cannot load it (it downloads on first use)"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding {encoding_name}, estimating tokens instead: {e}")
+        return None
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Count tokens with tiktoken when installed, otherwise estimate ~4 characters per token"""
+    encoding = _get_encoding(encoding_name)
+    if encoding is None:
+        return max(1, len(text) // 4) if text else 0
+    return len(encoding.encode(text))
+
+
+class PromptTemplate:
+    """A system prompt plus a precompiled user template with ``{field}`` placeholders"""
+
+    def __init__(self, name: str, system: str, user: str = ""):
+        self.name = name
+        self.system = system
+        self._parts = self._compile(user)
+        self.fields = tuple(field for _, field in self._parts if field is not None)
+        self._system_tokens = None
+
+    @property
+    def system_tokens(self) -> int:
+        """Counted on first use, not at registration, so importing the agents needs no encoding"""
+        if self._system_tokens is None:
+            self._system_tokens = count_tokens(self.system)
+        return self._system_tokens
+
+    @staticmethod
+    def _compile(template: str):
+        parts = []
+        for literal, field, format_spec, conversion in string.Formatter().parse(template):
+            if format_spec or conversion:
+                raise ValueError(f"Format specs and conversions are not supported: {{{field}}}")
+            if field is not None and not field.isidentifier():
+                raise ValueError(f"Placeholders must be plain names, got {{{field}}}")
+            parts.append((literal, field))
+        return parts
+
+    def render(self, context: Dict) -> str:
+        """Fill the user template from the context"""
+        return "".join(
+            literal if field is None else literal + str(context[field])
+            for literal, field in self._parts
+        )
+
+    def messages(self, context: Dict) -> List[Dict[str, str]]:
+        """Chat messages with the static system prompt first"""
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.render(context)},
+        ]
+
+
+class PromptRegistry:
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def register(self, name: str, system: str, user: str = "") -> PromptTemplate:
+        """Compile and register a template, replacing any previous one with the same name"""
+        template = PromptTemplate(name, system, user)
+        self._templates[name] = template
+        self._stats[name] = {"calls": 0, "user_tokens": 0}
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+    def messages(self, name: str, context: Dict) -> List[Dict[str, str]]:
+        """Render the named template and record its token usage"""
+        template = self._templates[name]
+        messages = template.messages(context)
+        stats = self._stats[name]
+        stats["calls"] += 1
+        stats["user_tokens"] += count_tokens(messages[1]["content"])
+        return messages
+
+    def token_report(self, names: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """Per-template prompt token counts: static system tokens and rendered user tokens"""
+        report = {}
+        for name in names or self._templates:
+            template = self._templates[name]
+            stats = self._stats[name]
+            calls = stats["calls"]
+            report[name] = {
+                "system_tokens": template.system_tokens,
+                "calls": calls,
+                "avg_user_tokens": stats["user_tokens"] / calls if calls else 0,
+                "total_prompt_tokens": template.system_tokens * calls + stats["user_tokens"],
+            }
+        return report
+
+
+# Shared registry used by the agents
+registry = PromptRegistry()
@@ -0,0 +1,146 @@
+"""
+Proposal document builder.
+
+The single implementation of create_proposal_document. proposal_generator.py
+calls it in-process, and the Document Assembler's executed code reaches it
+through the workdir/document_utils.py shim, so every entry point writes the
+same document through ProposalDocumentGenerator's bulk list and table paths.
+
+Content is the dictionary the Document Assembler fills in (see
+DOCUMENT_ASSEMBLER_SYSTEM_MESSAGE in proposal_generator.py). Section headings
+and fixed wording are those of the original create_proposal_document; with a
+placeholder template, sections whose names differ from the template's are
+written in order and its unused placeholders are dropped.
+"""
+import logging
+import os
+from typing import Dict, Optional
+
+from diagram_renderer import extract_architecture_spec, render_solution_diagram
+from proposal_store import content_sections, save_quietly
+from quality_gate import check_content, format_findings
+from document_generator import ProposalDocumentGenerator
+
+logger = logging.getLogger(__name__)
+
+PREPARED_FOR = "Prepared for"
+OUT_OF_SCOPE_STATEMENT = "Anything not specifically mentioned in the In-Scope section is considered Out of Scope."
+
+
+def build_proposal(content: Dict, template_path: Optional[str] = None, assets=None) -> ProposalDocumentGenerator:
+    """Write every section of the proposal and return the generator, ready to save"""
+    generator = ProposalDocumentGenerator(template_path, assets=assets)
+
+    generator.add_cover(content.get("title", "IT Project Proposal"), content.get("subtitle", ""))
+    generator.add_table_of_contents()
+
+    generator.add_executive_summary(content.get("executive_summary", ""))
+
+    generator.add_section_heading("Customer Requirements", level=1)
+    generator.add_table(
+        ["Requirement", "Description"],
+        [[req.get("requirement", ""), req.get("description", "")] for req in content.get("requirements", [])],
+    )
+    generator.add_page_break()
+
+    generator.add_section_heading("Scope", level=1)
+    generator.add_section_heading("In Scope", level=2)
+    generator.add_bullets(content.get("in_scope", []))
+    generator.add_section_heading("Out of Scope", level=2)
+    # Mandatory out of scope statement
+    generator.add_bullets(list(content.get("out_scope", [])) + [OUT_OF_SCOPE_STATEMENT])
+    generator.add_page_break()
+
+    diagram_path = None
+    architecture = content.get("architecture")
+    if isinstance(architecture, str):
+        # The assembler may paste the Solution_Designer's fenced block instead of the parsed spec
+        architecture = extract_architecture_spec(architecture)
+    if architecture:
+        diagram_path = render_solution_diagram(architecture)
+    generator.add_solution_summary(content.get("solution_summary", ""), diagram_path)
+
+    generator.add_section_heading("Deliverables", level=1)
+    generator.add_section_heading("Standard Deliverables", level=2)
+    generator.add_bullets(content.get("standard_deliverables", []))
+    generator.add_section_heading("Project-Specific Deliverables", level=2)
+    generator.add_bullets(content.get("project_specific_deliverables", []))
+    generator.add_page_break()
+
+    # Agents supply roles and days only; prices and totals come from the rate card.
+    # Without a resource plan, the task breakdown is costed instead.
+    resources = [
+        {"activity": res.get("activity", ""), "role": res.get("role_type", ""), "days": res.get("quantity", 0)}
+        for res in content.get("resources", [])
+    ] or [
+        {"activity": task.get("task", ""), "role": task.get("role", ""), "days": task.get("effort", 0)}
+        for task in content.get("tasks", [])
+    ]
+    generator.add_costs_section(
+        resources,
+        licenses=content.get("licenses"),
+        notes=content.get("licensing") or "No additional licensing required",
+        title="Costs",
+        resources_title="Resource Costs",
+        notes_title="Licensing",
+    )
+
+    generator.add_raid_section(
+        content.get("risks", []),
+        content.get("assumptions", []),
+        content.get("issues", []),
+        content.get("dependencies", []),
+        title="RAID",
+    )
+
+    generator.add_section_heading("Tasks and Effort Estimates", level=1)
+    generator.add_table(
+        ["Task", "Role", "Effort (days)"],
+        [[task.get("task", ""), task.get("role", ""), str(task.get("effort", ""))] for task in content.get("tasks", [])],
+    )
+    return generator
+
+
+def content_customer(content: Dict) -> str:
+    """The customer named in the content, or in its "Prepared for ..." subtitle"""
+    if content.get("customer"):
+        return str(content["customer"])
+    subtitle = str(content.get("subtitle") or "")
+    return subtitle[len(PREPARED_FOR):].strip() if subtitle.lower().startswith(PREPARED_FOR.lower()) else ""
+
+
+def create_proposal_document(content: Dict, template_path: Optional[str] = None,
+                             output_path: str = "proposal.docx", customer: Optional[str] = None) -> Optional[str]:
+    """
+    Creates a Word document using the provided content and template
+
+    Args:
+        content (dict): Dictionary containing content for each section
+        template_path (str): Path to the Word template
+        output_path (str): Path where the output document will be saved
+        customer (str): Customer the proposal is stored under; defaults to
+            content["customer"], then to the "Prepared for ..." subtitle
+
+    Returns:
+        str: Path to the generated document, or None if it could not be created
+    """
+    findings = check_content(content)
+    if findings:
+        # Reported with the result so the agents can fix the content and regenerate
+        print(f"Quality gate findings:\n{format_findings(findings)}")
+    try:
+        build_proposal(content, template_path).save(output_path)
+        save_quietly(content_sections(content), customer=customer or content_customer(content),
+                     project=content.get("title", ""), source="document_assembler",
+                     document_path=os.path.abspath(output_path))
+        print(f"\n\n========================")
+        print(f"SUCCESS: Proposal document created successfully at {output_path}")
+        print(f"========================\n")
+        return output_path
+    except Exception as e:
+        error_msg = f"Error creating document: {str(e)}"
+        logger.error(error_msg)
+        print(f"\n\n========================")
+        print(f"ERROR: {error_msg}")
+        print(f"========================\n")
+        return None
@@ -1,8 +1,13 @@
+import argparse
 import os
-import autogen
-from docx import Document
 import logging
 
+from budget import BudgetExceededError, ProposalBudget
+from checkpoint import ChatCheckpointer, CheckpointStore
+from llm_scheduler import shared_scheduler
+from prompts import registry as prompt_registry
+from termination import ChatTermination, DocumentCreated
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -51,152 +56,132 @@ def validate_api_key():
         )
 
 # Function to create a Word document from proposal content
-def create_proposal_document(content, template_path=None, output_path="proposal.docx"):
-    """
-    Creates a Word document using the provided content and template
-    
-    Args:
-        content (dict): Dictionary containing content for each section
-        template_path (str): Path to the Word template
-        output_path (str): Path where the output document will be saved
-    
-    Returns:
-        str: Path to the generated document
-    """
-    try:
-        if template_path and os.path.exists(template_path):
-            doc = Document(template_path)
-        else:
-            doc = Document()
-            logger.warning("Template not found, using default Word document")
-        
-        # Title Page
-        doc.add_heading(content.get("title", "IT Project Proposal"), 0)
-        doc.add_paragraph(content.get("subtitle", ""))
-        doc.add_page_break()
-        
-        # Table of Contents placeholder
-        doc.add_heading("Contents", 1)
-        doc.add_paragraph("Contents will be generated automatically")
-        doc.add_page_break()
-        
-        # Executive Summary
-        doc.add_heading("Executive Summary", 1)
-        doc.add_paragraph(content.get("executive_summary", ""))
-        
-        # Customer Requirements Table
-        doc.add_heading("Customer Requirements", 1)
-        requirements = content.get("requirements", [])
-        if requirements:
-            table = doc.add_table(rows=1, cols=2)
-            table.style = 'Table Grid'
-            header_cells = table.rows[0].cells
-            header_cells[0].text = 'Requirement'
-            header_cells[1].text = 'Description'
-            
-            for req in requirements:
-                row_cells = table.add_row().cells
-                row_cells[0].text = req.get("requirement", "")
-                row_cells[1].text = req.get("description", "")
-        
-        # Scope Statements
-        doc.add_heading("Scope", 1)
-        doc.add_heading("In Scope", 2)
-        for item in content.get("in_scope", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        doc.add_heading("Out of Scope", 2)
-        for item in content.get("out_scope", []):
-            doc.add_paragraph(item, style='List Bullet')
-        # Mandatory out of scope statement
-        doc.add_paragraph("Anything not specifically mentioned in the In-Scope section is considered Out of Scope.", style='List Bullet')
-        
-        # Solution Summary
-        doc.add_heading("Solution Summary", 1)
-        doc.add_paragraph(content.get("solution_summary", ""))
-        
-        # Deliverables
-        doc.add_heading("Deliverables", 1)
-        doc.add_heading("Standard Deliverables", 2)
-        for item in content.get("standard_deliverables", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        doc.add_heading("Project-Specific Deliverables", 2)
-        for item in content.get("project_specific_deliverables", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        # Costs
-        doc.add_heading("Costs", 1)
-        doc.add_heading("Resource Costs", 2)
-        resources = content.get("resources", [])
-        if resources:
-            table = doc.add_table(rows=1, cols=5)
-            table.style = 'Table Grid'
-            header_cells = table.rows[0].cells
-            header_cells[0].text = 'Activity'
-            header_cells[1].text = 'Role Type'
-            header_cells[2].text = 'Quantity (days)'
-            header_cells[3].text = 'Unit Cost'
-            header_cells[4].text = 'Total Cost'
-            
-            for res in resources:
-                row_cells = table.add_row().cells
-                row_cells[0].text = res.get("activity", "")
-                row_cells[1].text = res.get("role_type", "")
-                row_cells[2].text = str(res.get("quantity", ""))
-                row_cells[3].text = res.get("unit_cost", "")
-                row_cells[4].text = res.get("total_cost", "")
-        
-        doc.add_heading("Licensing", 2)
-        doc.add_paragraph(content.get("licensing", "No additional licensing required"))
-        
-        # RAID Section
-        doc.add_heading("RAID", 1)
-        doc.add_heading("Risks", 2)
-        for item in content.get("risks", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        doc.add_heading("Assumptions", 2)
-        for item in content.get("assumptions", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        doc.add_heading("Issues", 2)
-        for item in content.get("issues", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        doc.add_heading("Dependencies", 2)
-        for item in content.get("dependencies", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        # Tasks and Effort
-        doc.add_heading("Tasks and Effort Estimates", 1)
-        tasks = content.get("tasks", [])
-        if tasks:
-            table = doc.add_table(rows=1, cols=2)
-            table.style = 'Table Grid'
-            header_cells = table.rows[0].cells
-            header_cells[0].text = 'Task'
-            header_cells[1].text = 'Effort (days)'
-            
-            for task in tasks:
-                row_cells = table.add_row().cells
-                row_cells[0].text = task.get("task", "")
-                row_cells[1].text = str(task.get("effort", ""))
-        
-        # Save the document
-        doc.save(output_path)
-        logger.info(f"Proposal document created successfully at {output_path}")
-        print(f"\n\n========================")
-        print(f"SUCCESS: Proposal document created successfully at {output_path}")
-        print(f"========================\n")
-        return output_path
-    except Exception as e:
-        error_msg = f"Error creating document: {str(e)}"
-        logger.error(error_msg)
-        print(f"\n\n========================")
-        print(f"ERROR: {error_msg}")
-        print(f"========================\n")
-        return None
+def create_proposal_document(content, template_path=None, output_path="proposal.docx", customer=None):
+    """Build the proposal document with the shared builder; see proposal_builder.py"""
+    from proposal_builder import create_proposal_document as build_document
+    return build_document(content, template_path, output_path, customer=customer)
+
+# Document Assembler instructions. Kept free of per-run values so the whole
+# schema prompt is a stable prefix across turns and runs (cacheable by the
+# provider); the template note is appended at the end in create_agents.
+DOCUMENT_ASSEMBLER_SYSTEM_MESSAGE = """You are the Document Assembler responsible for:
+1. Generating the Microsoft Word document using python-docx.
+2. Assembling content from other agents into the document.
+3. Formatting the document according to standards.
+4. Handling revisions by regenerating the document with updated content.
+
+CRITICAL INSTRUCTION: You MUST directly EXECUTE the code to create the document, not just show or discuss it. 
+Follow these exact steps:
+1. Collect all content from the conversation
+2. Format it into a clean content dictionary
+3. EXECUTE the create_proposal_document function 
+4. Confirm document creation to the user
+
+Execute this exact code block structure (with your collected content) when ready:
+
+```python
+# This is self-executing code that will run when this message is sent
+from document_utils import create_proposal_document
+
+content = {
+    "title": "IT Project Proposal - [YOUR COLLECTED PROJECT NAME]",
+    "customer": "[CLIENT NAME]",
+    "subtitle": "Prepared for [CLIENT NAME]",
+    "executive_summary": "[YOUR COLLECTED EXECUTIVE SUMMARY]",
+    "requirements": [
+        {"requirement": "[REQUIREMENT 1]", "description": "[DESCRIPTION 1]"},
+        # Add all requirements collected from the conversation
+    ],
+    "in_scope": [
+        "[ITEM 1]",
+        "[ITEM 2]",
+        # Add all in-scope items
+    ],
+    "out_scope": [
+        "[ITEM 1]",
+        "[ITEM 2]",
+        # Add all out-of-scope items
+    ],
+    "solution_summary": "[YOUR COLLECTED SOLUTION SUMMARY]",
+    "architecture": {
+        "title": "[DIAGRAM TITLE]",
+        "nodes": [{"id": "[ID]", "label": "[LABEL]", "kind": "[user|service|database|storage|queue|network|external]", "group": "[OPTIONAL GROUP]"}],
+        "edges": [{"from": "[ID]", "to": "[ID]", "label": "[OPTIONAL LABEL]"}]
+    },  # Copy the Solution_Designer's architecture spec exactly; omit the key if there is none
+    "standard_deliverables": [
+        "[DELIVERABLE 1]",
+        "[DELIVERABLE 2]",
+        # Add all standard deliverables
+    ],
+    "project_specific_deliverables": [
+        "[SPECIFIC DELIVERABLE 1]",
+        "[SPECIFIC DELIVERABLE 2]",
+        # Add all project-specific deliverables
+    ],
+    "resources": [
+        {"activity": "[ACTIVITY 1]", "role_type": "[ROLE 1]", "quantity": [DAYS]},
+        # Add all resources; costs are computed from the rate card, do not add prices
+    ],
+    "licenses": [
+        {"name": "[LICENSE 1]", "quantity": [NUMBER]},
+        # Add all required licenses
+    ],
+    "licensing": "[YOUR COLLECTED LICENSING NOTES]",
+    "risks": [
+        "[RISK 1]",
+        "[RISK 2]",
+        # Add all risks
+    ],
+    "assumptions": [
+        "[ASSUMPTION 1]",
+        "[ASSUMPTION 2]",
+        # Add all assumptions
+    ],
+    "issues": [
+        "[ISSUE 1]",
+        "[ISSUE 2]",
+        # Add all issues
+    ],
+    "dependencies": [
+        "[DEPENDENCY 1]",
+        "[DEPENDENCY 2]",
+        # Add all dependencies
+    ],
+    "tasks": [
+        {"task": "[TASK 1]", "role": "[ROLE]", "effort": [NUMBER]},
+        {"task": "[TASK 2]", "role": "[ROLE]", "effort": [NUMBER]},
+        # Add all tasks with effort
+    ]
+}
+
+# DO NOT modify this line - it will create the document
+output_path = create_proposal_document(content, customer=content.get("customer"))
+
+# DO NOT modify this line - it will report success
+print(f"Document created at: {output_path}")
+```
+
+This code WILL execute when you send this message - no further action is needed. The document will be saved as "proposal.docx" in the working directory. After execution, report to the user that the document has been created and where it can be found."""
+
+# Source of workdir/document_utils.py, imported by the Document_Assembler's code.
+# It only points at the shared builder, so there is a single implementation.
+DOCUMENT_UTILS_SOURCE = """\"\"\"Shim for the Document_Assembler: the document builder lives in the repo\"\"\"
+import sys
+
+sys.path.insert(0, {repo_dir!r})
+
+from proposal_builder import create_proposal_document
+"""
+
+def write_document_utils(path="workdir/document_utils.py"):
+    """Write the helper module for the Document_Assembler, skipping the write when unchanged"""
+    source = DOCUMENT_UTILS_SOURCE.format(repo_dir=os.path.dirname(os.path.abspath(__file__)))
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == source:
+                return
+    with open(path, "w") as f:
+        f.write(source)
 
 # Define the agents
 
@@ -211,173 +196,30 @@ def create_agents(config_list, template_path=None):
     Returns:
         tuple: The created agents
     """
+    import autogen
+    from cost_engine import CostEngine
+    from exec_worker import shared_executor
+    from effort_estimator import STANDARD_TASKS, EffortEstimator, format_effort_table
+
+    standard_efforts, _ = EffortEstimator.from_history().split(STANDARD_TASKS)
+
     # Prepare workdir
     if not os.path.exists("workdir"):
         os.makedirs("workdir")
         
-    # Copy the create_proposal_document function to workdir for the Document_Assembler to use
-    with open("workdir/document_utils.py", "w") as f:
-        f.write("""
-import os
-from docx import Document
-import logging
+    # Point the Document_Assembler's code at the shared document builder
+    write_document_utils()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-def create_proposal_document(content, template_path=None, output_path="proposal.docx"):
-    \"""
-    Creates a Word document using the provided content and template
-    
-    Args:
-        content (dict): Dictionary containing content for each section
-        template_path (str): Path to the template
-        output_path (str): Path where the output document will be saved
-    
-    Returns:
-        str: Path to the generated document
-    \"""
-    try:
-        if template_path and os.path.exists(template_path):
-            doc = Document(template_path)
-        else:
-            doc = Document()
-            print("No template found, using default Word document")
-        
-        # Title Page
-        doc.add_heading(content.get("title", "IT Project Proposal"), 0)
-        doc.add_paragraph(content.get("subtitle", ""))
-        doc.add_page_break()
-        
-        # Table of Contents placeholder
-        doc.add_heading("Contents", 1)
-        doc.add_paragraph("Contents will be generated automatically")
-        doc.add_page_break()
-        
-        # Executive Summary
-        doc.add_heading("Executive Summary", 1)
-        doc.add_paragraph(content.get("executive_summary", ""))
-        
-        # Customer Requirements Table
-        doc.add_heading("Customer Requirements", 1)
-        requirements = content.get("requirements", [])
-        if requirements:
-            table = doc.add_table(rows=1, cols=2)
-            table.style = 'Table Grid'
-            header_cells = table.rows[0].cells
-            header_cells[0].text = 'Requirement'
-            header_cells[1].text = 'Description'
-            
-            for req in requirements:
-                row_cells = table.add_row().cells
-                row_cells[0].text = req.get("requirement", "")
-                row_cells[1].text = req.get("description", "")
-        
-        # Scope Statements
-        doc.add_heading("Scope", 1)
-        doc.add_heading("In Scope", 2)
-        for item in content.get("in_scope", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        doc.add_heading("Out of Scope", 2)
-        for item in content.get("out_scope", []):
-            doc.add_paragraph(item, style='List Bullet')
-        # Mandatory out of scope statement
-        doc.add_paragraph("Anything not specifically mentioned in the In-Scope section is considered Out of Scope.", style='List Bullet')
-        
-        # Solution Summary
-        doc.add_heading("Solution Summary", 1)
-        doc.add_paragraph(content.get("solution_summary", ""))
-        
-        # Deliverables
-        doc.add_heading("Deliverables", 1)
-        doc.add_heading("Standard Deliverables", 2)
-        for item in content.get("standard_deliverables", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        doc.add_heading("Project-Specific Deliverables", 2)
-        for item in content.get("project_specific_deliverables", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        # Costs
-        doc.add_heading("Costs", 1)
-        doc.add_heading("Resource Costs", 2)
-        resources = content.get("resources", [])
-        if resources:
-            table = doc.add_table(rows=1, cols=5)
-            table.style = 'Table Grid'
-            header_cells = table.rows[0].cells
-            header_cells[0].text = 'Activity'
-            header_cells[1].text = 'Role Type'
-            header_cells[2].text = 'Quantity (days)'
-            header_cells[3].text = 'Unit Cost'
-            header_cells[4].text = 'Total Cost'
-            
-            for res in resources:
-                row_cells = table.add_row().cells
-                row_cells[0].text = res.get("activity", "")
-                row_cells[1].text = res.get("role_type", "")
-                row_cells[2].text = str(res.get("quantity", ""))
-                row_cells[3].text = res.get("unit_cost", "")
-                row_cells[4].text = res.get("total_cost", "")
-        
-        doc.add_heading("Licensing", 2)
-        doc.add_paragraph(content.get("licensing", "No additional licensing required"))
-        
-        # RAID Section
-        doc.add_heading("RAID", 1)
-        doc.add_heading("Risks", 2)
-        for item in content.get("risks", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        doc.add_heading("Assumptions", 2)
-        for item in content.get("assumptions", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        doc.add_heading("Issues", 2)
-        for item in content.get("issues", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        doc.add_heading("Dependencies", 2)
-        for item in content.get("dependencies", []):
-            doc.add_paragraph(item, style='List Bullet')
-        
-        # Tasks and Effort
-        doc.add_heading("Tasks and Effort Estimates", 1)
-        tasks = content.get("tasks", [])
-        if tasks:
-            table = doc.add_table(rows=1, cols=2)
-            table.style = 'Table Grid'
-            header_cells = table.rows[0].cells
-            header_cells[0].text = 'Task'
-            header_cells[1].text = 'Effort (days)'
-            
-            for task in tasks:
-                row_cells = table.add_row().cells
-                row_cells[0].text = task.get("task", "")
-                row_cells[1].text = str(task.get("effort", ""))
-        
-        # Save the document
-        doc.save(output_path)
-        print(f"\\n\\n========================")
-        print(f"SUCCESS: Proposal document created successfully at {{output_path}}")
-        print(f"========================\\n")
-        return output_path
-    except Exception as e:
-        error_msg = f"Error creating document: {{str(e)}}"
-        print(f"\\n\\n========================")
-        print(f"ERROR: {{error_msg}}")
-        print(f"========================\\n")
-        return None
-""")
+    # Code blocks run in a persistent worker with python-docx and the builder preloaded
+    executor = shared_executor("workdir")
+    executor.start()
     
     # User Proxy Agent
     user_proxy = autogen.UserProxyAgent(
         name="User_Proxy",
         system_message="You are a human user interacting with the AI proposal system. You'll provide the initial project request and review the final output. When the proposal is complete, ask for the Microsoft Word document to be generated if it hasn't been already. The final deliverable must be a Word document file, not just text content.",
         human_input_mode="ALWAYS",
-        code_execution_config={"last_n_messages": 3, "work_dir": "workdir"},
+        code_execution_config={"last_n_messages": 3, "executor": executor},
     )
 
     # Architect Agent
@@ -425,11 +267,14 @@ Focus on identifying critical requirements including Hardware, Software, Volumes
 1. Drafting the Executive Summary based on the project overview.
 2. Defining the Scope Statements (In Scope / Out of Scope).
 3. Writing the Solution Summary with high-level project overview and activities.
-4. Identifying relevant diagrams (if possible).
+4. Describing the target architecture as a fenced ```json block with "title", "nodes" (id, label, kind: user/service/database/storage/queue/network/external, optional group) and "edges" (from, to, optional label); it is rendered as the solution diagram.
 5. Defining the Deliverables section.
 6. Drafting the Tasks and Effort Estimates.
 
-Be specific and focus on technical details while ensuring all information aligns with the project requirements.""",
+Be specific and focus on technical details while ensuring all information aligns with the project requirements.
+
+Effort for the standard tasks is known from past proposals. Use these figures for the matching tasks, and add and estimate every task specific to this project:
+""" + format_effort_table(standard_efforts),
         llm_config=llm_config,
     )
 
@@ -438,10 +283,12 @@ Be specific and focus on technical details while ensuring all information aligns
         name="Cost_Estimator",
         system_message="""You are the Cost Estimator responsible for:
 1. Drafting the Costs section.
-2. Generating the resource table with activities, roles, and quantities.
-3. Generating the section for required licenses.
+2. Generating the resource table with activities, roles, and days.
+3. Generating the section for required licenses with quantities.
 
-Provide realistic estimates based on the solution design and deliverables.""",
+Provide realistic estimates based on the solution design and deliverables.
+Do not calculate prices or totals: day rates, licence prices, contingency and totals are computed from the rate card when the document is built.
+Use these roles: """ + ", ".join(CostEngine().roles),
         llm_config=llm_config,
     )
 
@@ -460,100 +307,14 @@ Focus on realistic risks that could impact project delivery and success.""",
     # Document Assembler Agent
     document_assembler = autogen.AssistantAgent(
         name="Document_Assembler",
-        system_message=f"""You are the Document Assembler responsible for:
-1. Generating the Microsoft Word document using python-docx.
-2. Assembling content from other agents into the document.
-3. Formatting the document according to standards.
-4. Handling revisions by regenerating the document with updated content.
-
-You have access to {'a Littlefish branded template' if template_path else 'a standard Word document format'} for creating the proposal document.
-
-CRITICAL INSTRUCTION: You MUST directly EXECUTE the code to create the document, not just show or discuss it. 
-Follow these exact steps:
-1. Collect all content from the conversation
-2. Format it into a clean content dictionary
-3. EXECUTE the create_proposal_document function 
-4. Confirm document creation to the user
-
-Execute this exact code block structure (with your collected content) when ready:
-
-```python
-# This is self-executing code that will run when this message is sent
-from document_utils import create_proposal_document
-
-content = {{
-    "title": "IT Project Proposal - [YOUR COLLECTED PROJECT NAME]",
-    "subtitle": "Prepared for [CLIENT NAME]",
-    "executive_summary": "[YOUR COLLECTED EXECUTIVE SUMMARY]",
-    "requirements": [
-        {{"requirement": "[REQUIREMENT 1]", "description": "[DESCRIPTION 1]"}},
-        # Add all requirements collected from the conversation
-    ],
-    "in_scope": [
-        "[ITEM 1]",
-        "[ITEM 2]",
-        # Add all in-scope items
-    ],
-    "out_scope": [
-        "[ITEM 1]",
-        "[ITEM 2]",
-        # Add all out-of-scope items
-    ],
-    "solution_summary": "[YOUR COLLECTED SOLUTION SUMMARY]",
-    "standard_deliverables": [
-        "[DELIVERABLE 1]",
-        "[DELIVERABLE 2]",
-        # Add all standard deliverables
-    ],
-    "project_specific_deliverables": [
-        "[SPECIFIC DELIVERABLE 1]",
-        "[SPECIFIC DELIVERABLE 2]",
-        # Add all project-specific deliverables
-    ],
-    "resources": [
-        {{"activity": "[ACTIVITY 1]", "role_type": "[ROLE 1]", "quantity": [NUMBER], "unit_cost": "[COST]", "total_cost": "[TOTAL]"}},
-        # Add all resources
-    ],
-    "licensing": "[YOUR COLLECTED LICENSING INFO]",
-    "risks": [
-        "[RISK 1]",
-        "[RISK 2]",
-        # Add all risks
-    ],
-    "assumptions": [
-        "[ASSUMPTION 1]",
-        "[ASSUMPTION 2]",
-        # Add all assumptions
-    ],
-    "issues": [
-        "[ISSUE 1]",
-        "[ISSUE 2]",
-        # Add all issues
-    ],
-    "dependencies": [
-        "[DEPENDENCY 1]",
-        "[DEPENDENCY 2]",
-        # Add all dependencies
-    ],
-    "tasks": [
-        {{"task": "[TASK 1]", "effort": [NUMBER]}},
-        {{"task": "[TASK 2]", "effort": [NUMBER]}},
-        # Add all tasks with effort
-    ]
-}}
-
-# DO NOT modify this line - it will create the document
-output_path = create_proposal_document(content)
-
-# DO NOT modify this line - it will report success
-print(f"Document created at: {{output_path}}")
-```
-
-This code WILL execute when you send this message - no further action is needed. The document will be saved as "proposal.docx" in the working directory. After execution, report to the user that the document has been created and where it can be found.""",
+        system_message=(
+            DOCUMENT_ASSEMBLER_SYSTEM_MESSAGE
+            + f"\n\nYou have access to {'a Littlefish branded template' if template_path else 'a standard Word document format'} for creating the proposal document."
+        ),
         llm_config=llm_config,
         code_execution_config={
             "last_n_messages": 3, 
-            "work_dir": "workdir", 
+            "executor": executor,  # Warm worker shared with the user proxy
             "auto_execute": True  # Automatically execute code without asking
         },
     )
@@ -561,29 +322,69 @@ This code WILL execute when you send this message - no further action is needed.
     # Force the Document_Assembler to execute code without human input
     document_assembler.human_input_mode = "NEVER"
     
-    return user_proxy, architect, proposal_manager, requirements_analyst, solution_designer, cost_estimator, risk_assessor, document_assembler
+    agents = (user_proxy, architect, proposal_manager, requirements_analyst, solution_designer, cost_estimator, risk_assessor, document_assembler)
+
+    # System prompts are re-sent on every turn, so log what each one costs
+    for agent in agents:
+        prompt_registry.register(agent.name, system=agent.system_message)
+    for name, stats in prompt_registry.token_report([agent.name for agent in agents]).items():
+        logger.info(f"{name} system prompt: {stats['system_tokens']} tokens")
+
+    return agents
+
+GROUP_CHAT_MAX_ROUND = 50
+
+
+def create_group_chat(agents, budget=None, termination=None):
+    """
+    Creates a group chat with all agents, optionally enforcing a usage budget.
+
+    The chat ends as soon as the Document_Assembler's code has saved the
+    document, rather than running on to max_round.
+    """
+    import autogen
 
-def create_group_chat(agents):
-    """Creates a group chat with all agents"""
     user_proxy, architect, proposal_manager, requirements_analyst, solution_designer, cost_estimator, risk_assessor, document_assembler = agents
     
     # Create the group chat
     groupchat = autogen.GroupChat(
         agents=[user_proxy, architect, proposal_manager, requirements_analyst, solution_designer, cost_estimator, risk_assessor, document_assembler],
         messages=[],
-        max_round=50,
+        max_round=GROUP_CHAT_MAX_ROUND,
     )
     
     # Create the group chat manager
+    if termination is None:
+        termination = ChatTermination(DocumentCreated("workdir"), max_round=GROUP_CHAT_MAX_ROUND)
     manager = autogen.GroupChatManager(
         groupchat=groupchat,
         llm_config=llm_config,
+        is_termination_msg=termination,
     )
+
+    if budget:
+        budget.attach_autogen(list(agents) + [manager])
+    # Autogen calls share the process-wide LLM scheduler, as in app.py
+    shared_scheduler().install_autogen()
     
     return manager
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate an IT project proposal with a team of agents")
+    parser.add_argument("--resume", metavar="RUN_ID", help="continue an interrupted run from its last checkpoint")
+    return parser.parse_args()
+
 def main():
     """Main function to run the proposal generation system"""
+    args = parse_args()
+    if args.resume:
+        checkpointer = ChatCheckpointer.resume(args.resume, "proposal_generator.py")
+    else:
+        checkpointer = ChatCheckpointer(CheckpointStore.new_run_id(), "proposal_generator.py")
+    print(f"Run ID: {checkpointer.run_id}")
+
+    budget = ProposalBudget.from_env(run_id=checkpointer.run_id)
+    finished = False
     try:
         print("Starting proposal generator...")
         
@@ -603,14 +404,18 @@ def main():
             
         print("Using " + ("mock LLM" if USE_MOCK_LLM else "OpenAI API") + " for chat completions")
         
-        # Ask for template path
-        template_path = input("Enter the path to the Littlefish Word template (press Enter to use default): ").strip()
-        if not template_path:
-            template_path = "littlefish_template.docx"
-            
-        if not os.path.exists(template_path):
-            logger.warning(f"Template file not found at {template_path}, using default Word format")
-            template_path = None
+        # Ask for template path (a resumed run keeps its original choice)
+        if args.resume:
+            template_path = checkpointer.state["extra"].get("template_path")
+        else:
+            template_path = input("Enter the path to the Littlefish Word template (press Enter to use default): ").strip()
+            if not template_path:
+                template_path = "littlefish_template.docx"
+                
+            if not os.path.exists(template_path):
+                logger.warning(f"Template file not found at {template_path}, using default Word format")
+                template_path = None
+            checkpointer.state["extra"]["template_path"] = template_path
         
         print("Configuring LLM...")
         
@@ -620,40 +425,59 @@ def main():
         
         # Create the group chat
         print("Setting up group chat...")
-        manager = create_group_chat(agents)
+        termination = ChatTermination(DocumentCreated("workdir"), max_round=GROUP_CHAT_MAX_ROUND,
+                                      label=checkpointer.run_id)
+        manager = create_group_chat(agents, budget, termination)
+        checkpointer.attach(manager.groupchat)
         
         # Start the conversation
         user_proxy = agents[0]
         
-        # Starting message
-        print("Initiating chat - this may take a moment...")
-        user_proxy.initiate_chat(
-            manager,
-            message="""
-            I need to generate an IT project proposal. I would like to describe my project needs so you can help create a comprehensive proposal document.
-            
-            Please ask me about:
-            - Project description and overview
-            - Project budget and financial constraints
-            - Ideal timescales and deadlines
-            - Technical requirements and specifications
-            - Stakeholders and target audience
-            - Any existing systems or infrastructure
-            - Specific business goals and outcomes
-            
-            Once you have this information, please create a comprehensive proposal document.
-            """
-        )
-        
-       
-        output_path = create_proposal_document(content)
-        
+        if checkpointer.messages:
+            print(f"Resuming chat from round {checkpointer.state['round']}...")
+            checkpointer.resume_chat(manager)
+        else:
+            # Starting message
+            print("Initiating chat - this may take a moment...")
+            checkpointer.save()
+            user_proxy.initiate_chat(
+                manager,
+                message="""
+                I need to generate an IT project proposal. I would like to describe my project needs so you can help create a comprehensive proposal document.
+                
+                Please ask me about:
+                - Project description and overview
+                - Project budget and financial constraints
+                - Ideal timescales and deadlines
+                - Technical requirements and specifications
+                - Stakeholders and target audience
+                - Any existing systems or infrastructure
+                - Specific business goals and outcomes
+                
+                Once you have this information, please create a comprehensive proposal document.
+                """
+            )
+        finished = True
+
+        # The Document_Assembler has already written the document from inside the chat
+        termination.end()
+        summary = termination.summary()
+        if summary["reason"]:
+            print(f"Chat finished after {summary['rounds']} rounds ({summary['reason']}), "
+                  f"{summary['rounds_saved']} rounds saved")
+        
+    except BudgetExceededError as e:
+        logger.warning(f"Stopping the proposal chat: {e}")
     except Exception as e:
         logger.error(f"Error: {e}")
         print(f"An error occurred: {e}")
         # Print the full traceback for better debugging
         import traceback
         traceback.print_exc()
+    finally:
+        if not finished:
+            print(f"Progress saved. Continue with: python proposal_generator.py --resume {checkpointer.run_id}")
+        budget.write_report()
 
 if __name__ == "__main__":
     try:
@@ -1,118 +1,533 @@
 import os
-import openai
+import asyncio
+import random
+from contextlib import asynccontextmanager, nullcontext
+from functools import lru_cache
+
+from budget import BudgetExceededError, ProposalBudget, estimate_prompt_tokens
+from llm_scheduler import QuotaExceededError, current_tenant, estimate_tokens, shared_scheduler
+from prompts import registry as prompt_registry
+
+
+@lru_cache(maxsize=None)
+def load_openai():
+    """Import openai on first use; building agents and prompts does not need it"""
+    import openai
+
+    # Set your OpenAI API key in environment variable OPENAI_API_KEY before running this script
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    return openai
+
+MODEL = "gpt-4o-mini"
+SYSTEM_PROMPT = "You are a helpful assistant that writes professional proposal content."
+TEMPERATURE = 0.7
+MAX_TOKENS = 800
+
+# Defaults for the async path
+DEFAULT_TIMEOUT = 60.0  # seconds per LLM call
+DEFAULT_MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1.0  # seconds, doubled on every attempt
+RETRY_MAX_DELAY = 20.0
+
+
+class AgentError(Exception):
+    """Raised by the async agents when a section cannot be generated"""
+
+    def __init__(self, agent_name, message, attempts=1):
+        super().__init__(f"{agent_name}: {message}")
+        self.agent_name = agent_name
+        self.attempts = attempts
+
+
+class AgentTimeoutError(AgentError):
+    """Raised when every attempt of an LLM call exceeded its timeout"""
+
+
+def call_limits(budget, messages):
+    """
+    Model, max_tokens and budget reservation for the next call; the model and
+    max_tokens are downgraded when the budget is nearly spent. Pass the
+    reservation to release_call() once the call's usage has been recorded.
+    """
+    if budget is None:
+        return MODEL, MAX_TOKENS, None
+    reservation = budget.reserve(estimate_prompt_tokens(messages), MAX_TOKENS)
+    return budget.model_for(MODEL), reservation["max_tokens"], reservation
+
+
+def release_call(budget, reservation):
+    if reservation is not None:
+        budget.release(reservation)
+
+
+# Static instructions live in the system prompt and per-proposal values come
+# last, so every request from an agent starts with the same cacheable prefix.
+PROJECT_CONTEXT = "Project: {project}\nCustomer: {customer}"
+
+
+def register_section_prompt(name, instructions):
+    return prompt_registry.register(name, system=f"{SYSTEM_PROMPT}\n\n{instructions}", user=PROJECT_CONTEXT)
+
+
+register_section_prompt(
+    "executive_summary",
+    "Write an executive summary for a business proposal about the project below for the named customer. "
+    "The summary should highlight the goals, importance, and benefits of the project."
+)
+register_section_prompt(
+    "requirements",
+    "Create a detailed list of customer requirements for the project below, as requested by the named customer. "
+    "Format as a table with requirement IDs and descriptions."
+)
+register_section_prompt(
+    "scope",
+    "Define the in-scope and out-of-scope items clearly for the project below. "
+    "Use bullet points under 'In Scope' and 'Out of Scope' headings."
+)
+register_section_prompt(
+    "solution_summary",
+    "Provide a high-level solution summary for the project below. "
+    "Include key activities, integration points, and main architectural considerations."
+)
+register_section_prompt(
+    "deliverables",
+    "List the key deliverables for the project below in bullet point format."
+)
+register_section_prompt(
+    "costs",
+    "Generate a sample resource cost table and mention any licensing requirements for the project below. "
+    "Format the table with columns: Activity, Role, Type, Quantity (Days), Unit Cost, Total Cost."
+)
+register_section_prompt(
+    "raid",
+    "Describe the risks, assumptions, issues, and dependencies (RAID) for the project below."
+)
+register_section_prompt(
+    "task_breakdown",
+    "Provide a task breakdown with estimated effort (in days) for the project below. "
+    "Include tasks such as requirements gathering, architecture & design, system setup, testing, documentation, and training, "
+    "plus the tasks specific to this project. "
+    "Format as a table with columns: Task, Role, Effort (days)."
+)
 
-# Set your OpenAI API key in environment variable OPENAI_API_KEY before running this script
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
 class BaseAgent:
-    def __init__(self, name):
+    # Name of the registered prompt template; subclasses may override create_prompt instead
+    prompt_name = None
+    # Set when finish() rewrites the answer, so it cannot be streamed chunk by chunk
+    rewrites_answer = False
+
+    def __init__(self, name, budget=None, scheduler=None):
         self.name = name
+        self.budget = budget
+        # Optional llm_scheduler.LLMScheduler; each call waits for a fair share of the shared quota
+        self.scheduler = scheduler
+
+    def prefill(self, context):
+        """
+        Content known without an LLM call, and the context for the call that is
+        still needed (None to skip it). Returns (prefix, context).
+        """
+        return "", context
+
+    def finish(self, text):
+        """Post-process the complete answer"""
+        return text
 
     def generate(self, context):
-        prompt = self.create_prompt(context)
+        prefix, context = self.prefill(context)
+        if context is None:
+            return prefix
+        messages = self.create_messages(context)
+        # Budget and quota errors must stop the orchestrator, so they are not turned into content
+        model, max_tokens, reservation = call_limits(self.budget, messages)
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that writes professional proposal content."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
-            return response.choices[0].message.content.strip()
+            with self._scheduler_slot(messages, max_tokens):
+                response = load_openai().ChatCompletion.create(
+                    model=model,
+                    messages=messages,
+                    temperature=TEMPERATURE,
+                    max_tokens=max_tokens
+                )
+            if self.budget:
+                self.budget.record_response(self.name, response, model)
+            if self.scheduler:
+                self.scheduler.record(current_tenant(), getattr(response.usage, "total_tokens", 0) or 0)
+            return self.finish(prefix + response.choices[0].message.content.strip())
+        except QuotaExceededError:
+            raise
         except Exception as e:
             return f"Error generating content in {self.name}: {e}"
+        finally:
+            release_call(self.budget, reservation)
+
+    def _scheduler_slot(self, messages, max_tokens):
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(estimate_tokens(messages, max_tokens))
 
     def create_prompt(self, context):
-        raise NotImplementedError("Each agent must implement create_prompt.")
+        if self.prompt_name is None:
+            raise NotImplementedError("Each agent must set prompt_name or implement create_prompt.")
+        return prompt_registry.get(self.prompt_name).render(context)
+
+    def create_messages(self, context):
+        if self.prompt_name is None:
+            return [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": self.create_prompt(context)}
+            ]
+        return prompt_registry.messages(self.prompt_name, context)
 
 class ExecutiveSummaryAgent(BaseAgent):
-    def create_prompt(self, context):
-        return (
-            f"Write an executive summary for a business proposal about {context['project']} "
-            f"for the customer {context['customer']}. The summary should highlight the goals, "
-            "importance, and benefits of the project."
-        )
+    prompt_name = "executive_summary"
 
 class RequirementsAgent(BaseAgent):
-    def create_prompt(self, context):
-        return (
-            f"Create a detailed list of customer requirements for the project {context['project']} "
-            f"requested by {context['customer']}. Format as a table with requirement IDs and descriptions."
-        )
+    prompt_name = "requirements"
 
 class ScopeAgent(BaseAgent):
-    def create_prompt(self, context):
-        return (
-            f"Define the in-scope and out-of-scope items clearly for the project titled '{context['project']}'. "
-            "Use bullet points under 'In Scope' and 'Out of Scope' headings."
-        )
+    prompt_name = "scope"
 
 class SolutionSummaryAgent(BaseAgent):
-    def create_prompt(self, context):
-        return (
-            f"Provide a high-level solution summary for the project {context['project']}. "
-            "Include key activities, integration points, and main architectural considerations."
-        )
+    prompt_name = "solution_summary"
 
 class DeliverablesAgent(BaseAgent):
-    def create_prompt(self, context):
-        return (
-            f"List the key deliverables for the project {context['project']} in bullet point format."
-        )
+    prompt_name = "deliverables"
 
 class CostsAgent(BaseAgent):
-    def create_prompt(self, context):
-        return (
-            f"Generate a sample resource cost table and mention any licensing requirements "
-            f"for the project {context['project']}. Format the table with columns: Activity, Role, Type, Quantity (Days), Unit Cost, Total Cost."
-        )
+    prompt_name = "costs"
 
 class RAIDAgent(BaseAgent):
-    def create_prompt(self, context):
-        return (
-            f"Describe the risks, assumptions, issues, and dependencies (RAID) for the project {context['project']}."
-        )
+    prompt_name = "raid"
 
 class TaskBreakdownAgent(BaseAgent):
-    def create_prompt(self, context):
-        return (
-            f"Provide a task breakdown with estimated effort (in days) for the project {context['project']}. "
-            "Include tasks such as requirements gathering, architecture & design, system setup, testing, documentation, and training."
-        )
+    """The LLM lists the project's tasks; history re-estimates the effort of those it recognises"""
+    prompt_name = "task_breakdown"
+    rewrites_answer = True
+
+    def __init__(self, name, budget=None, scheduler=None, estimator=None):
+        super().__init__(name, budget=budget, scheduler=scheduler)
+        self.estimator = estimator
+
+    def finish(self, text):
+        from effort_estimator import EffortEstimator, apply_estimates
+
+        return apply_estimates(text, self.estimator or EffortEstimator.from_history())
+
+# Section name -> (agent class, agent name), in document order
+SECTION_AGENTS = {
+    "Executive Summary": (ExecutiveSummaryAgent, "Executive Summary Agent"),
+    "Customer Requirements": (RequirementsAgent, "Requirements Agent"),
+    "Scope Statement": (ScopeAgent, "Scope Agent"),
+    "Solution Summary": (SolutionSummaryAgent, "Solution Summary Agent"),
+    "Deliverables": (DeliverablesAgent, "Deliverables Agent"),
+    "Costs": (CostsAgent, "Costs Agent"),
+    "RAID": (RAIDAgent, "RAID Agent"),
+    "Task Breakdown and Effort Estimates": (TaskBreakdownAgent, "Task Breakdown Agent"),
+}
 
 class ProposalOrchestrator:
-    def __init__(self, context):
+    def __init__(self, context, budget=None, scheduler=None):
         self.context = context
+        self.budget = budget
         self.agents = {
-            "Executive Summary": ExecutiveSummaryAgent("Executive Summary Agent"),
-            "Customer Requirements": RequirementsAgent("Requirements Agent"),
-            "Scope Statement": ScopeAgent("Scope Agent"),
-            "Solution Summary": SolutionSummaryAgent("Solution Summary Agent"),
-            "Deliverables": DeliverablesAgent("Deliverables Agent"),
-            "Costs": CostsAgent("Costs Agent"),
-            "RAID": RAIDAgent("RAID Agent"),
-            "Task Breakdown and Effort Estimates": TaskBreakdownAgent("Task Breakdown Agent"),
+            section: agent_cls(agent_name, budget=budget, scheduler=scheduler)
+            for section, (agent_cls, agent_name) in SECTION_AGENTS.items()
         }
 
     def generate_proposal(self):
         proposal_content = {}
         for section, agent in self.agents.items():
             print(f"Generating section: {section}...")
-            content = agent.generate(self.context)
+            try:
+                content = agent.generate(self.context)
+            except (BudgetExceededError, QuotaExceededError) as e:
+                print(f"Stopping before {section}: {e}")
+                break
             proposal_content[section] = content
         return proposal_content
 
 
+class AsyncBaseAgent:
+    """
+    Async counterpart of BaseAgent built on openai.AsyncOpenAI.
+
+    Unlike BaseAgent, failures are raised as AgentError/AgentTimeoutError instead
+    of being returned as content. Transient API errors and timeouts are retried
+    with exponential backoff and full jitter; cancellation is never swallowed.
+    The prompt comes from the wrapped synchronous agent, or from create_prompt
+    when subclassing directly.
+    """
+
+    def __init__(self, agent=None, name=None, client=None,
+                 timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, budget=None,
+                 rate_limiter=None, scheduler=None):
+        self.agent = agent
+        self.name = name or (agent.name if agent else self.__class__.__name__)
+        self.client = client
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.budget = budget
+        # Optional shared limiter; reserve() returns how long to wait for the next call slot
+        self.rate_limiter = rate_limiter
+        # Optional llm_scheduler.LLMScheduler; each call waits for a fair share of the shared quota
+        self.scheduler = scheduler
+
+    def create_prompt(self, context):
+        if self.agent is None:
+            raise NotImplementedError("Provide a prompt agent or implement create_prompt.")
+        return self.agent.create_prompt(context)
+
+    def create_messages(self, context):
+        if self.agent is None:
+            return [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": self.create_prompt(context)}
+            ]
+        return self.agent.create_messages(context)
+
+    def _get_client(self):
+        if self.client is None:
+            # Retries are handled here so the SDK must not retry on its own
+            self.client = load_openai().AsyncOpenAI(max_retries=0)
+        return self.client
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff for the given (1-based) attempt"""
+        return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+    def _scheduler_slot(self, messages, max_tokens):
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot_async(estimate_tokens(messages, max_tokens))
+
+    def _record_usage(self, response, model):
+        if self.budget:
+            self.budget.record_response(self.name, response, model)
+        usage = getattr(response, "usage", None)
+        if self.scheduler and usage is not None:
+            self.scheduler.record(current_tenant(), usage.total_tokens or 0)
+
+    async def _attempt(self, client, messages, kwargs):
+        """One call; its budget reservation is released here if it fails, by the caller otherwise"""
+        model, max_tokens, reservation = call_limits(self.budget, messages)
+        try:
+            # Time spent queuing for a slot does not count against the call's timeout
+            async with self._scheduler_slot(messages, max_tokens):
+                response = await asyncio.wait_for(
+                    client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=TEMPERATURE,
+                        max_tokens=max_tokens,
+                        **kwargs
+                    ),
+                    timeout=self.timeout
+                )
+        except BaseException:
+            release_call(self.budget, reservation)
+            raise
+        return response, model, reservation
+
+    async def _create_with_retries(self, messages, **kwargs):
+        """
+        Create a chat completion, retrying transient failures; returns
+        (response, model, reservation). Release the reservation with
+        release_call() once the response's usage has been recorded.
+        """
+        openai = load_openai()
+        retryable_errors = (
+            openai.APITimeoutError,
+            openai.APIConnectionError,
+            openai.RateLimitError,
+            openai.InternalServerError,
+        )
+        client = self._get_client()
+        attempts = self.max_retries + 1
+
+        for attempt in range(1, attempts + 1):
+            if self.rate_limiter:
+                await asyncio.sleep(self.rate_limiter.reserve())
+            try:
+                return await self._attempt(client, messages, kwargs)
+            except asyncio.TimeoutError:
+                if attempt == attempts:
+                    raise AgentTimeoutError(
+                        self.name, f"timed out after {self.timeout}s", attempts=attempt
+                    ) from None
+            except retryable_errors as e:
+                if attempt == attempts:
+                    raise AgentError(self.name, str(e), attempts=attempt) from e
+            except openai.OpenAIError as e:
+                raise AgentError(self.name, str(e), attempts=attempt) from e
+            await asyncio.sleep(self._backoff(attempt))
+
+    def prefill(self, context):
+        if self.agent is None:
+            return "", context
+        return self.agent.prefill(context)
+
+    def finish(self, text):
+        if self.agent is None:
+            return text
+        return self.agent.finish(text)
+
+    async def generate(self, context):
+        prefix, context = self.prefill(context)
+        if context is None:
+            return prefix
+        response, model, reservation = await self._create_with_retries(self.create_messages(context))
+        self._record_usage(response, model)
+        release_call(self.budget, reservation)
+        return self.finish(prefix + (response.choices[0].message.content or "").strip())
+
+    async def stream(self, context):
+        """
+        Yield the completion text as it arrives.
+
+        Opening the stream is retried like generate(). Once text has been
+        yielded a failure raises AgentError, because the consumer has already
+        used the partial output. self.timeout bounds the wait for each chunk.
+        Answers the agent rewrites in finish() are yielded once, complete.
+        """
+        if self.agent is not None and self.agent.rewrites_answer:
+            yield await self.generate(context)
+            return
+        prefix, context = self.prefill(context)
+        if prefix:
+            yield prefix
+        if context is None:
+            return
+        openai = load_openai()
+        stream, model, reservation = await self._create_with_retries(
+            self.create_messages(context),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        chunks = stream.__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=self.timeout)
+                except StopAsyncIteration:
+                    break
+                if chunk.usage:
+                    self._record_usage(chunk, model)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except asyncio.TimeoutError:
+            raise AgentTimeoutError(self.name, f"stream stalled for {self.timeout}s") from None
+        except openai.OpenAIError as e:
+            raise AgentError(self.name, str(e)) from e
+        finally:
+            # The usage arrives with the last chunk; until then the reservation holds the call's tokens
+            release_call(self.budget, reservation)
+            # Closing returns the HTTP connection when the stream stalls or the consumer is cancelled
+            await stream.close()
+
+
+class AsyncProposalOrchestrator:
+    """
+    Generates all sections concurrently on a single event loop.
+
+    Safe to share one instance per proposal inside an ASGI app: no threads are
+    used, and cancelling generate_proposal() cancels every in-flight section.
+    As in ProposalOrchestrator, a section that runs out of budget is left out:
+    the sections already under way still finish, and the error is kept in
+    ``stopped`` next to the partial proposal.
+    """
+
+    def __init__(self, context, client=None, timeout=DEFAULT_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES, max_concurrency=None, budget=None,
+                 rate_limiter=None, scheduler=None):
+        self.context = context
+        self.max_concurrency = max_concurrency
+        self.budget = budget
+        self.stopped = None
+        # Shared by every section agent; see client_scope()
+        self.client = client
+        self.agents = {
+            section: AsyncBaseAgent(
+                agent_cls(agent_name),
+                client=client,
+                timeout=timeout,
+                max_retries=max_retries,
+                budget=budget,
+                rate_limiter=rate_limiter,
+                scheduler=scheduler
+            )
+            for section, (agent_cls, agent_name) in SECTION_AGENTS.items()
+        }
+
+    @asynccontextmanager
+    async def client_scope(self):
+        """
+        One AsyncOpenAI client for every section agent. A client passed to the
+        constructor belongs to the caller; otherwise one is created here and
+        closed on exit, before its event loop is.
+        """
+        if self.client is not None:
+            yield self.client
+            return
+        client = load_openai().AsyncOpenAI(max_retries=0)  # the agents retry themselves
+        self._share_client(client)
+        try:
+            yield client
+        finally:
+            self._share_client(None)
+            await client.close()
+
+    def _share_client(self, client):
+        self.client = client
+        for agent in self.agents.values():
+            agent.client = client
+
+    async def generate_proposal(self):
+        async with self.client_scope():
+            return await self._generate_sections()
+
+    async def _generate_sections(self):
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        proposal_content = {}
+        self.stopped = None
+
+        async def run(section, agent):
+            try:
+                if semaphore is None:
+                    proposal_content[section] = await agent.generate(self.context)
+                    return
+                async with semaphore:
+                    proposal_content[section] = await agent.generate(self.context)
+            except BudgetExceededError as e:
+                self.stopped = self.stopped or e
+
+        tasks = [asyncio.ensure_future(run(section, agent)) for section, agent in self.agents.items()]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # gather() leaves siblings running on failure/cancellation
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return {section: proposal_content[section] for section in self.agents if section in proposal_content}
+
+
 if __name__ == "__main__":
     context = {
         "customer": "ACME Corp",
         "project": "ZTNA Functionality for Fiori Web Browser"
     }
-    orchestrator = ProposalOrchestrator(context)
+    budget = ProposalBudget.from_env()
+    orchestrator = ProposalOrchestrator(context, budget=budget, scheduler=shared_scheduler())
     proposal = orchestrator.generate_proposal()
 
     print("\n\n======= GENERATED PROPOSAL =======\n")
     for section, content in proposal.items():
         print(f"--- {section} ---\n{content}\n{'='*60}\n")
+
+    print("Prompt tokens per agent:")
+    for name, stats in prompt_registry.token_report().items():
+        print(f"  {name}: {stats['system_tokens']} static + {stats['avg_user_tokens']:.0f} per-call tokens")
+
+    print(f"Usage report written to {budget.write_report()}")
@@ -0,0 +1,221 @@
+"""
+Persistent store for generated proposals.
+
+Every proposal an entry point generates is saved to a local SQLite database
+(proposal_store.db next to this module unless PROPOSAL_STORE_PATH points
+elsewhere), so every entry point uses the same file whatever its working
+directory, including code the Document Assembler runs in workdir. One row per
+section, and indexed with FTS5 by section name, section text, customer and
+project. Past proposals can then be found with a ranked full-text search and
+reused instead of regenerated.
+
+Each proposal carries an ETag (a hash of its content) so the HTTP routes can
+answer repeat fetches with 304 Not Modified.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "proposal_store.db")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+TERM_RE = re.compile(r'\w+\*?', re.UNICODE)
+# Content keys stored on the proposal row rather than as sections
+CONTENT_METADATA = ("title", "subtitle", "customer")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS proposals (
+    id TEXT PRIMARY KEY,
+    customer TEXT NOT NULL DEFAULT '',
+    project TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT '',
+    document_path TEXT,
+    created_at REAL NOT NULL,
+    etag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS proposals_created ON proposals (created_at DESC);
+CREATE TABLE IF NOT EXISTS sections (
+    proposal_id TEXT NOT NULL REFERENCES proposals (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (proposal_id, position)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS section_search USING fts5(
+    section, content, customer, project, proposal_id UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+"""
+
+
+def content_sections(content: Dict) -> Dict[str, str]:
+    """Flatten the Document Assembler's content dictionary into section name -> text"""
+    sections = {}
+    for key, value in content.items():
+        if key in CONTENT_METADATA:
+            continue
+        if isinstance(value, str):
+            text = value
+        elif isinstance(value, list):
+            text = "\n".join(
+                "- " + (" | ".join(str(v) for v in item.values()) if isinstance(item, dict) else str(item))
+                for item in value
+            )
+        elif isinstance(value, dict):
+            text = json.dumps(value, indent=2)
+        else:
+            text = str(value)
+        if text.strip():
+            sections[key.replace("_", " ").title()] = text
+    return sections
+
+
+def text_sections(text: str) -> Dict[str, str]:
+    """Split a markdown proposal on its headings; text before the first heading is the Overview"""
+    from quality_gate import split_sections
+
+    sections = {(name or "Overview"): body for name, body in split_sections(text or "").items() if body.strip()}
+    return sections or {"Proposal": text or ""}
+
+
+def fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, 'word*' matches a prefix"""
+    terms = []
+    for term in TERM_RE.findall(query):
+        prefix = term.endswith("*")
+        word = term.rstrip("*")
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class ProposalStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("PROPOSAL_STORE_PATH", DEFAULT_PATH)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets searches run while a proposal is being saved"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def save(self, sections: Dict[str, str], customer: str = "", project: str = "", source: str = "",
+             document_path: Optional[str] = None, proposal_id: Optional[str] = None) -> str:
+        """Store (or replace) a proposal and index its sections; returns its id"""
+        proposal_id = proposal_id or uuid.uuid4().hex[:12]
+        sections = {name: str(text or "") for name, text in sections.items()}
+        etag = hashlib.sha256(json.dumps(
+            [customer, project, document_path, list(sections.items())], sort_keys=True
+        ).encode()).hexdigest()[:32]
+
+        with self._connection() as conn:
+            conn.execute("DELETE FROM section_search WHERE proposal_id = ?", (proposal_id,))
+            conn.execute("DELETE FROM sections WHERE proposal_id = ?", (proposal_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO proposals (id, customer, project, source, document_path, created_at, etag) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (proposal_id, customer or "", project or "", source, document_path, time.time(), etag),
+            )
+            conn.executemany(
+                "INSERT INTO sections (proposal_id, position, name, content) VALUES (?, ?, ?, ?)",
+                [(proposal_id, position, name, text) for position, (name, text) in enumerate(sections.items())],
+            )
+            conn.executemany(
+                "INSERT INTO section_search (section, content, customer, project, proposal_id) VALUES (?, ?, ?, ?, ?)",
+                [(name, text, customer or "", project or "", proposal_id) for name, text in sections.items()],
+            )
+        logger.info(f"Stored proposal {proposal_id} ({len(sections)} sections) from {source or 'unknown'}")
+        return proposal_id
+
+    def get(self, proposal_id: str) -> Optional[Dict]:
+        conn = self._connection()
+        row = conn.execute("SELECT * FROM proposals WHERE id = ?", (proposal_id,)).fetchone()
+        if row is None:
+            return None
+        sections = conn.execute(
+            "SELECT name, content FROM sections WHERE proposal_id = ? ORDER BY position", (proposal_id,)
+        ).fetchall()
+        return {**dict(row), "sections": [{"name": s["name"], "content": s["content"]} for s in sections]}
+
+    def etag(self, proposal_id: str) -> Optional[str]:
+        """The stored ETag alone, so unchanged proposals are revalidated without reading their sections"""
+        row = self._connection().execute("SELECT etag FROM proposals WHERE id = ?", (proposal_id,)).fetchone()
+        return row["etag"] if row else None
+
+    def search(self, query: str = "", limit: int = DEFAULT_LIMIT) -> List[Dict]:
+        """
+        Proposals matching every word of ``query``, best first, with the best
+        matching section and a snippet of it. An empty query lists the most
+        recent proposals.
+        """
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        conn = self._connection()
+        match = fts_query(query)
+        if not match:
+            rows = conn.execute(
+                "SELECT id, customer, project, source, created_at FROM proposals ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+            return [dict(row) for row in rows]
+
+        # Sections come back best first; each proposal is reported under its best section
+        rows = conn.execute(
+            """
+            SELECT p.id, p.customer, p.project, p.source, p.created_at, s.section,
+                   snippet(section_search, 1, '[', ']', ' ... ', 16) AS snippet,
+                   bm25(section_search, 2.0, 1.0, 4.0, 4.0) AS score
+            FROM section_search s JOIN proposals p ON p.id = s.proposal_id
+            WHERE section_search MATCH ?
+            ORDER BY score
+            """,
+            (match,),
+        )
+        results: Dict[str, Dict] = {}
+        for row in rows:
+            if row["id"] not in results:
+                results[row["id"]] = dict(row)
+                if len(results) == limit:
+                    break
+        return list(results.values())
+
+    def delete(self, proposal_id: str) -> bool:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM section_search WHERE proposal_id = ?", (proposal_id,))
+            return conn.execute("DELETE FROM proposals WHERE id = ?", (proposal_id,)).rowcount > 0
+
+
+@lru_cache(maxsize=None)
+def shared_store(path: Optional[str] = None) -> ProposalStore:
+    """One store per database path per process"""
+    return ProposalStore(path)
+
+
+def save_quietly(sections: Dict[str, str], **kwargs) -> Optional[str]:
+    """Store a proposal without letting a storage problem fail the generation that produced it"""
+    try:
+        return shared_store().save(sections, **kwargs)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not store the proposal: {e}")
+        return None
@@ -0,0 +1,403 @@
+"""
+Rule-based proposal quality gate.
+
+Most of what the reviewer agents check is mechanical: every required section
+is present, the mandatory out-of-scope statement is included, tables have
+rows, cost lines and totals add up, and effort figures are numbers. These
+checks run locally in microseconds and return structured findings:
+
+    {"section": "Costs", "rule": "cost_total", "severity": "error", "message": "..."}
+
+The findings go to the LLM reviewer with the draft. A draft the checks cover
+completely (only tables) and that passes needs no LLM review; see
+gate_autogen_reviewer() for autogen agents and review_sections() for
+two-agent flows.
+"""
+import logging
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from cost_engine import NUMBER_RE, CostEngine, InvalidAmountError, to_number
+
+logger = logging.getLogger(__name__)
+
+ERROR = "error"
+WARNING = "warning"
+
+OUT_OF_SCOPE_STATEMENT = "Anything not specifically mentioned in scope is considered out of scope"
+_OUT_OF_SCOPE_KEY = "not specifically mentioned in scope"
+
+# Section name -> lowercase keywords that identify its heading in generated text
+REQUIRED_SECTIONS = OrderedDict([
+    ("Executive Summary", ("executive summary",)),
+    ("Customer Requirements", ("requirement",)),
+    ("Scope Statement", ("scope",)),
+    ("Solution Summary", ("solution",)),
+    ("Deliverables", ("deliverable",)),
+    ("Costs", ("cost", "pricing")),
+    ("RAID", ("raid", "risk")),
+    ("Task Breakdown and Effort Estimates", ("effort", "task breakdown")),
+])
+
+# Structured content keys (the Document Assembler's schema) that must not be empty
+REQUIRED_CONTENT = OrderedDict([
+    ("executive_summary", "Executive Summary"),
+    ("requirements", "Customer Requirements"),
+    ("in_scope", "Scope Statement"),
+    ("out_scope", "Scope Statement"),
+    ("solution_summary", "Solution Summary"),
+    ("tasks", "Task Breakdown and Effort Estimates"),
+])
+
+HEADING_RE = re.compile(r'^\s{0,3}(#{1,6})\s+(.+?)\s*#*\s*$')
+SEPARATOR_RE = re.compile(r'^\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?$')
+SUMMARY_ROW_RE = re.compile(r'\b(sub-?total|total|contingency|vat|tax|discount)\b', re.IGNORECASE)
+
+# Relative tolerance for rounded figures in generated tables
+COST_TOLERANCE = 0.01
+
+stats = {"checks": 0, "sections_passed": 0, "sections_failed": 0, "llm_reviews": 0}
+
+
+def finding(section: str, rule: str, message: str, severity: str = ERROR) -> Dict[str, str]:
+    return {"section": section, "rule": rule, "severity": severity, "message": message}
+
+
+def failing_sections(findings: Sequence[Dict]) -> List[str]:
+    """Sections with at least one error finding, in order of first appearance"""
+    return list(OrderedDict.fromkeys(f["section"] for f in findings if f["severity"] == ERROR))
+
+
+def format_findings(findings: Sequence[Dict]) -> str:
+    return "\n".join(f"- [{f['severity']}] {f['section']}: {f['message']} ({f['rule']})" for f in findings)
+
+
+# Markdown helpers
+
+def _outline(text: str) -> List[Tuple[int, str, str]]:
+    """(heading level, heading, body) for each markdown heading; text before the first is level 0, ''"""
+    outline = []
+    level, name, lines = 0, "", []
+    for line in text.splitlines():
+        match = HEADING_RE.match(line)
+        if not match:
+            lines.append(line)
+            continue
+        if name or any(l.strip() for l in lines):
+            outline.append((level, name, "\n".join(lines).strip()))
+        level, name, lines = len(match.group(1)), match.group(2).strip(), []
+    if name or any(l.strip() for l in lines):
+        outline.append((level, name, "\n".join(lines).strip()))
+    return outline
+
+
+def split_sections(text: str) -> "OrderedDict[str, str]":
+    """Heading -> body for every markdown heading; text before the first heading is keyed ''"""
+    return OrderedDict((name, body) for _, name, body in _outline(text))
+
+
+def draft_section(text: str) -> str:
+    """The section a draft is written for: its first markdown heading, or '' without one"""
+    return next((name for name in split_sections(text) if name), "")
+
+
+def replace_section(text: str, name: str, body: str) -> str:
+    """Swap the body under one heading, leaving the rest of the text untouched"""
+    out, skipping, replaced = [], False, False
+    for line in text.splitlines():
+        match = HEADING_RE.match(line)
+        if match:
+            skipping = False
+            if match.group(2).strip() == name and not replaced:
+                out += [line, body.strip(), ""]
+                skipping = replaced = True
+                continue
+        if not skipping:
+            out.append(line)
+    if not replaced:
+        out += ["", f"## {name}", body.strip()]
+    return "\n".join(out)
+
+
+def parse_tables(text: str) -> List[Tuple[List[str], List[List[str]]]]:
+    """Markdown pipe tables as (headers, rows)"""
+    tables = []
+    block: List[str] = []
+    for line in text.splitlines() + [""]:
+        if line.strip().startswith("|"):
+            block.append(line.strip())
+            continue
+        if block:
+            cells = [[cell.strip() for cell in row.strip("|").split("|")] for row in block]
+            has_separator = len(block) > 1 and SEPARATOR_RE.match(block[1])
+            headers = cells[0]
+            rows = cells[2:] if has_separator else cells[1:]
+            tables.append((headers, rows))
+            block = []
+    return tables
+
+
+def _column(headers: List[str], *keywords: str, exclude: Tuple[str, ...] = ()) -> Optional[int]:
+    for index, header in enumerate(headers):
+        lowered = header.lower()
+        if any(k in lowered for k in keywords) and not any(k in lowered for k in exclude):
+            return index
+    return None
+
+
+def _cell(row: List[str], index: Optional[int]) -> str:
+    return row[index] if index is not None and index < len(row) else ""
+
+
+def _close(a: float, b: float) -> bool:
+    return abs(a - b) <= max(1.0, COST_TOLERANCE * max(abs(a), abs(b)))
+
+
+def _amount(cell: str) -> float:
+    """A figure as written in a table cell; discounts and credits may be negative"""
+    match = NUMBER_RE.search(cell.replace(",", ""))
+    return float(match.group()) if match else 0.0
+
+
+def _positive(value) -> bool:
+    try:
+        return to_number(value) > 0
+    except InvalidAmountError:
+        return False
+
+
+def _check_table(section: str, headers: List[str], rows: List[List[str]]) -> List[Dict]:
+    findings = []
+    title = " | ".join(headers)
+    if not [row for row in rows if any(cell for cell in row)]:
+        return [finding(section, "empty_table", f"Table '{title}' has no rows")]
+
+    lines = [row for row in rows if not SUMMARY_ROW_RE.search(row[0] if row else "")]
+
+    effort = _column(headers, "effort", "days", "quantity", "qty", "hours")
+    if effort is not None:
+        for row in lines:
+            value = _cell(row, effort)
+            if not NUMBER_RE.search(value.replace(",", "")):
+                findings.append(finding(section, "effort_not_numeric",
+                                        f"'{headers[effort]}' is not a number for '{row[0]}': '{value}'"))
+
+    quantity = _column(headers, "quantity", "qty", "days")
+    rate = _column(headers, "unit", "rate", "price", exclude=("total",))
+    total = _column(headers, "total", "cost", exclude=("unit",))
+    if total is None or total in (quantity, rate):
+        return findings
+
+    line_totals = []
+    for row in lines:
+        amount = _amount(_cell(row, total))
+        line_totals.append(amount)
+        if quantity is not None and rate is not None:
+            expected = _amount(_cell(row, quantity)) * _amount(_cell(row, rate))
+            if expected and not _close(expected, amount):
+                findings.append(finding(section, "cost_line",
+                                        f"'{row[0]}': {_cell(row, quantity)} x {_cell(row, rate)} "
+                                        f"is {expected:,.2f}, not {_cell(row, total)}"))
+
+    # A (sub)total row must equal the sum of the lines above it, unless other adjustments follow the lines
+    summary = [row for row in rows if row and SUMMARY_ROW_RE.search(row[0])]
+    adjustments = [row for row in summary if not re.search(r'total', row[0], re.IGNORECASE)]
+    for row in summary:
+        label = row[0].lower()
+        if "sub" in label or ("total" in label and not adjustments):
+            stated = _amount(_cell(row, total))
+            if not _close(sum(line_totals), stated):
+                findings.append(finding(section, "cost_total",
+                                        f"'{row[0]}' is {_cell(row, total)} but the lines add up to "
+                                        f"{sum(line_totals):,.2f}"))
+    return findings
+
+
+# Checks
+
+def fully_checked(text: str) -> bool:
+    """True when the draft is only tables (and headings), so the mechanical checks see all of its content"""
+    lines = [line for line in (text or "").splitlines() if line.strip()]
+    return bool(lines) and any(line.strip().startswith("|") for line in lines) and all(
+        line.strip().startswith("|") or HEADING_RE.match(line) for line in lines
+    )
+
+
+def check_section(name: str, text: str) -> List[Dict]:
+    """Mechanical checks on one section's markdown"""
+    findings = []
+    if not (text or "").strip():
+        findings.append(finding(name, "empty_section", "Section is empty"))
+    elif "error generating content" in text.lower():
+        findings.append(finding(name, "generation_error", "Section contains a generation error"))
+    for headers, rows in parse_tables(text or ""):
+        findings += _check_table(name, headers, rows)
+    if _section_kind(name) == "Scope Statement" and _OUT_OF_SCOPE_KEY not in _normalise(text):
+        findings.append(finding(name, "out_of_scope_statement",
+                                f"Missing the mandatory statement: '{OUT_OF_SCOPE_STATEMENT}'"))
+    return findings
+
+
+def check_proposal(proposal: Union[str, Dict[str, str]]) -> List[Dict]:
+    """Check a whole proposal, as markdown text or a section name -> text mapping"""
+    if isinstance(proposal, str):
+        outline = _outline(proposal)
+    else:
+        outline = [(1, name, text) for name, text in proposal.items()]
+    findings = []
+    kinds = {_section_kind(name) for _, name, _ in outline}
+    for required in REQUIRED_SECTIONS:
+        if required not in kinds:
+            findings.append(finding(required, "missing_section", "Required section is missing"))
+
+    for index, (level, name, text) in enumerate(outline):
+        if not name:
+            continue
+        section_findings = check_section(name, text)
+        # The out-of-scope statement may sit under any scope sub-heading; checked below
+        section_findings = [f for f in section_findings if f["rule"] != "out_of_scope_statement"]
+        next_level = outline[index + 1][0] if index + 1 < len(outline) else 0
+        if next_level > level:
+            # A heading whose content is all in its sub-sections
+            section_findings = [f for f in section_findings if f["rule"] != "empty_section"]
+        findings += section_findings
+
+    scope_texts = [text for _, name, text in outline if _section_kind(name) == "Scope Statement"]
+    if scope_texts and not any(_OUT_OF_SCOPE_KEY in _normalise(text) for text in scope_texts):
+        findings.append(finding("Scope Statement", "out_of_scope_statement",
+                                f"Missing the mandatory statement: '{OUT_OF_SCOPE_STATEMENT}'"))
+    _count(findings, len([name for _, name, _ in outline if name]))
+    return findings
+
+
+def check_content(content: Dict, engine: Optional[CostEngine] = None) -> List[Dict]:
+    """Check the Document Assembler's structured content before the document is built"""
+    findings = []
+    for key, section in REQUIRED_CONTENT.items():
+        if not content.get(key):
+            findings.append(finding(section, "missing_section", f"'{key}' is empty"))
+    if not (content.get("standard_deliverables") or content.get("project_specific_deliverables")):
+        findings.append(finding("Deliverables", "missing_section", "No deliverables"))
+    if not any(content.get(key) for key in ("risks", "assumptions", "issues", "dependencies")):
+        findings.append(finding("RAID", "missing_section", "No risks, assumptions, issues or dependencies"))
+
+    for req in content.get("requirements", []):
+        if not str(req.get("description", "")).strip():
+            findings.append(finding("Customer Requirements", "empty_table",
+                                    f"Requirement '{req.get('requirement', '')}' has no description"))
+
+    for task in content.get("tasks", []):
+        effort = task.get("effort")
+        if not isinstance(effort, (int, float)) or isinstance(effort, bool) or effort <= 0:
+            findings.append(finding("Task Breakdown and Effort Estimates", "effort_not_numeric",
+                                    f"Effort for '{task.get('task', '')}' is not a positive number: {effort!r}"))
+
+    resources = content.get("resources", [])
+    for res in resources:
+        if not _positive(res.get("quantity", 0)):
+            findings.append(finding("Costs", "effort_not_numeric",
+                                    f"Days for '{res.get('activity', '')}' are not a positive number: "
+                                    f"{res.get('quantity')!r}"))
+    if resources or content.get("licenses"):
+        engine = engine or CostEngine()
+        roles = {role.lower() for role in engine.roles}
+        for res in resources:
+            role = str(res.get("role_type") or res.get("role") or "")
+            if role.strip().lower() not in roles:
+                findings.append(finding("Costs", "unknown_role",
+                                        f"Role '{role}' is not on the rate card and is not priced"))
+        for license in content.get("licenses") or []:
+            name = str(license.get("name", ""))
+            if not license.get("unit_price") and engine.license_price(name) is None:
+                findings.append(finding("Costs", "unknown_license",
+                                        f"Licence '{name}' is not on the rate card and has no unit price"))
+        # Stated figures, if the agents added any, must match what the rate card computes
+        if content.get("total_cost") is not None:
+            try:
+                estimate = engine.estimate(
+                    [{"role": r.get("role_type", ""), "days": r.get("quantity", 0)} for r in resources],
+                    content.get("licenses"),
+                )
+                stated = to_number(content["total_cost"])
+            except InvalidAmountError as e:
+                findings.append(finding("Costs", "cost_total", f"The total cannot be checked: {e}"))
+            else:
+                if not _close(stated, estimate["total"]):
+                    findings.append(finding("Costs", "cost_total",
+                                            f"Stated total {content['total_cost']} does not match the computed "
+                                            f"{engine.format(estimate['total'])}"))
+    _count(findings, len(REQUIRED_SECTIONS))
+    return findings
+
+
+def _normalise(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _section_kind(name: str) -> Optional[str]:
+    lowered = name.lower()
+    for section, keywords in REQUIRED_SECTIONS.items():
+        if any(keyword in lowered for keyword in keywords):
+            return section
+    return None
+
+
+def _count(findings: Sequence[Dict], sections: int):
+    failed = len(failing_sections(findings))
+    stats["checks"] += 1
+    stats["sections_failed"] += failed
+    stats["sections_passed"] += max(0, sections - failed)
+
+
+# LLM review of failing sections only
+
+def review_sections(proposal: str, review: Callable[[str, str, List[Dict]], str]) -> Tuple[str, List[Dict]]:
+    """
+    Gate a markdown proposal and send only failing sections to ``review``.
+
+    ``review(section_name, section_text, findings)`` returns the corrected
+    section body, which replaces the original. Returns the proposal and the
+    findings that triggered reviews.
+    """
+    findings = check_proposal(proposal)
+    sections = split_sections(proposal)
+    for name in failing_sections(findings):
+        section_findings = [f for f in findings if f["section"] == name]
+        heading = next((h for h in sections if h == name or _section_kind(h) == name), name)
+        stats["llm_reviews"] += 1
+        logger.info(f"Quality gate: reviewing {heading} ({len(section_findings)} finding(s))")
+        proposal = replace_section(proposal, heading, review(heading, sections.get(heading, ""), section_findings))
+    return proposal, findings
+
+
+def gate_autogen_reviewer(reviewer, authors: Optional[Sequence[str]] = None, section: str = ""):
+    """
+    Put the quality gate in front of an autogen reviewer agent.
+
+    The latest draft (from ``authors``, or anyone but the reviewer) is checked
+    locally first, as ``section`` or else as the section named by its first
+    heading, and the LLM reviews it with the findings appended to its
+    context. Only a passing draft the checks cover completely (tables only) is
+    approved without an LLM call; prose always gets the LLM review.
+    """
+    from autogen import Agent
+
+    def review(recipient, messages=None, sender=None, config=None):
+        draft = next((
+            m for m in reversed(messages or [])
+            if m.get("content") and m.get("name") != recipient.name and (not authors or m.get("name") in authors)
+        ), None)
+        if draft is None:
+            return True, "Nothing to review yet."
+        findings = check_section(section or draft_section(draft["content"]), draft["content"])
+        _count(findings, 1)
+        if not failing_sections(findings) and fully_checked(draft["content"]):
+            return True, "APPROVED: the draft passes the quality gate."
+        stats["llm_reviews"] += 1
+        report = format_findings(findings) if findings else "- none; the mechanical checks pass"
+        gate_message = {"role": "user", "content": "Quality gate findings for the latest draft:\n" + report}
+        return recipient.generate_oai_reply(messages=list(messages) + [gate_message], sender=sender, config=config)
+
+    reviewer.register_reply([Agent, None], review, position=0)
+    return reviewer
@@ -0,0 +1,347 @@
+"""
+Ingestion of large RFP documents as proposal briefs.
+
+A 100-page RFP is too long for one prompt and too big to load whole. The
+document is streamed instead:
+
+    read_blocks     paragraphs (and table rows) from .txt, .docx or .pdf, one at
+                    a time; .docx is parsed incrementally from the zip, .pdf page
+                    by page (needs pypdf)
+    chunk_blocks    blocks packed into chunks of at most CHUNK_CHARS characters
+    map             each chunk is summarized and its requirements extracted by an
+                    LLM call, several chunks at a time; at most max_concurrency
+                    chunks are held in memory
+    reduce          requirements are de-duplicated and numbered into the
+                    {id, description, priority} rows that
+                    ProposalDocumentGenerator.add_requirements_table takes, and
+                    the chunk summaries are combined into one brief
+
+Chunk results are cached in rfp_cache/ by a hash of the chunk text, prompt and
+model, so re-ingesting an amended RFP only calls the LLM for changed chunks.
+
+    python rfp_ingest.py customer_rfp.pdf --json rfp.json
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import zipfile
+from typing import Dict, Iterator, List, Optional
+
+from proposal_generator_agent import MODEL, AsyncBaseAgent, load_openai
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "rfp_cache"
+CHUNK_CHARS = 12_000  # ~3,000 tokens per map call
+DEFAULT_MAX_CONCURRENCY = 4
+MAX_BRIEF_CHARS = 4_000
+
+PROMPT_VERSION = "1"  # bump when the prompts change so cached results are not reused
+EXTRACT_PROMPT = (
+    "You read one part of a customer's request for proposal (RFP). Reply with a JSON object with two keys: "
+    '"summary", two or three sentences on what this part asks for, and "requirements", a list of '
+    '{"description": ..., "priority": "High" | "Medium" | "Low"} for every requirement stated in this part. '
+    "Mandatory (must/shall) requirements are High, should are Medium, nice-to-have are Low. "
+    "Use an empty list if this part states no requirements."
+)
+REDUCE_PROMPT = (
+    "These are summaries of consecutive parts of one RFP. Combine them into a single brief for a proposal "
+    "team: the customer's goals, the scope, constraints and deadlines. Plain text, at most 300 words."
+)
+
+PRIORITIES = ["High", "Medium", "Low"]
+PRIORITY_ALIASES = {
+    "must": "High", "shall": "High", "mandatory": "High", "critical": "High",
+    "should": "Medium", "desirable": "Medium",
+    "could": "Low", "may": "Low", "optional": "Low", "nice to have": "Low",
+}
+BULLET_RE = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+(.+)$')
+JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+# Streaming readers
+
+def _read_txt(path: str) -> Iterator[str]:
+    block = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line.strip():
+                block.append(line.strip())
+            elif block:
+                yield " ".join(block)
+                block = []
+    if block:
+        yield " ".join(block)
+
+
+def _element_text(element) -> str:
+    return "".join(t.text or "" for t in element.iter(f"{W_NS}t")).strip()
+
+
+def _read_docx(path: str) -> Iterator[str]:
+    """Paragraphs and table rows from word/document.xml, parsed incrementally and discarded as read"""
+    from lxml import etree
+
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as xml:
+        for _, element in etree.iterparse(xml, events=("end",), tag=(f"{W_NS}p", f"{W_NS}tr")):
+            parent = element.getparent()
+            if element.tag == f"{W_NS}p" and parent is not None and parent.tag == f"{W_NS}tc":
+                continue  # cell paragraphs are read with their row
+            if element.tag == f"{W_NS}tr":
+                text = " | ".join(filter(None, (_element_text(cell) for cell in element.iter(f"{W_NS}tc"))))
+            else:
+                text = _element_text(element)
+            if text:
+                yield text
+            # Free what has been read, including earlier siblings
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+def _read_pdf(path: str) -> Iterator[str]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ImportError("Reading PDF RFPs needs pypdf: pip install pypdf") from None
+
+    for page in PdfReader(path).pages:
+        for block in re.split(r'\n\s*\n', page.extract_text() or ""):
+            block = " ".join(block.split())
+            if block:
+                yield block
+
+
+READERS = {".txt": _read_txt, ".md": _read_txt, ".docx": _read_docx, ".pdf": _read_pdf}
+
+
+def read_blocks(path: str) -> Iterator[str]:
+    """Text blocks of an RFP, in document order, without loading the whole file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Unsupported RFP format {extension or path!r}; expected one of {', '.join(READERS)}")
+    return READERS[extension](path)
+
+
+def chunk_blocks(blocks: Iterator[str], max_chars: int = CHUNK_CHARS) -> Iterator[str]:
+    """Pack blocks into chunks of at most max_chars; an oversized block is split on its own"""
+    chunk, size = [], 0
+    for block in blocks:
+        while len(block) > max_chars:
+            if chunk:
+                yield "\n".join(chunk)
+                chunk, size = [], 0
+            yield block[:max_chars]
+            block = block[max_chars:]
+        if size + len(block) > max_chars and chunk:
+            yield "\n".join(chunk)
+            chunk, size = [], 0
+        chunk.append(block)
+        size += len(block) + 1
+    if chunk:
+        yield "\n".join(chunk)
+
+
+# Map
+
+class ExtractionCache:
+    """Chunk results as JSON files named by a hash of the chunk, prompt and model"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def key(self, *parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in (PROMPT_VERSION, MODEL) + parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, value: Dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+
+class RFPAgent(AsyncBaseAgent):
+    """One-shot LLM call with its own system prompt; retries, budget and scheduler come from AsyncBaseAgent"""
+
+    def __init__(self, system_prompt: str, **kwargs):
+        super().__init__(**kwargs)
+        self.system_prompt = system_prompt
+
+    def create_messages(self, context):
+        return [{"role": "system", "content": self.system_prompt}, {"role": "user", "content": context}]
+
+
+def normalize_priority(value) -> str:
+    text = str(value or "").strip().lower()
+    for priority in PRIORITIES:
+        if text == priority.lower():
+            return priority
+    return PRIORITY_ALIASES.get(text, "Medium")
+
+
+def parse_extraction(text: str) -> Dict:
+    """The map call's JSON reply; a reply that is not JSON keeps its bullets as requirements"""
+    match = JSON_RE.search(text or "")
+    if match:
+        try:
+            data = json.loads(match.group(0))
+            requirements = [
+                {"description": str(item.get("description", "")).strip(), "priority": normalize_priority(item.get("priority"))}
+                for item in data.get("requirements") or [] if isinstance(item, dict)
+            ]
+            return {"summary": str(data.get("summary") or "").strip(),
+                    "requirements": [r for r in requirements if r["description"]]}
+        except (ValueError, AttributeError):
+            pass
+    lines = (text or "").splitlines()
+    bullets = [m.group(1).strip() for m in map(BULLET_RE.match, lines) if m]
+    summary = " ".join(line.strip() for line in lines if line.strip() and not BULLET_RE.match(line))
+    return {"summary": summary, "requirements": [{"description": b, "priority": "Medium"} for b in bullets]}
+
+
+# Reduce
+
+def _requirement_key(description: str) -> str:
+    return " ".join(re.sub(r'[^\w\s]', ' ', description.lower()).split())
+
+
+def reduce_requirements(extractions: List[Dict]) -> List[Dict[str, str]]:
+    """Merge the chunks' requirements in document order; repeats keep their highest priority"""
+    merged: Dict[str, Dict[str, str]] = {}
+    for extraction in extractions:
+        for requirement in extraction["requirements"]:
+            key = _requirement_key(requirement["description"])
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = dict(requirement)
+            elif PRIORITIES.index(requirement["priority"]) < PRIORITIES.index(existing["priority"]):
+                existing["priority"] = requirement["priority"]
+    return [
+        {"id": f"REQ-{number:03d}", "description": requirement["description"], "priority": requirement["priority"]}
+        for number, requirement in enumerate(merged.values(), start=1)
+    ]
+
+
+async def ingest(path: str, budget=None, scheduler=None, rate_limiter=None, client=None,
+                 cache: Optional[ExtractionCache] = None, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, chunk_chars: int = CHUNK_CHARS) -> Dict:
+    """
+    Stream an RFP through the map calls and reduce it to a brief and a requirements table.
+
+    Returns {"source", "brief", "requirements", "chunks", "cached_chunks"}.
+    """
+    cache = cache or ExtractionCache()
+    # One client for every map and reduce call, closed before its event loop is
+    own_client = client is None
+    if own_client:
+        client = load_openai().AsyncOpenAI(max_retries=0)  # the agents retry themselves
+    try:
+        return await _map_reduce(path, cache, {"client": client, "budget": budget, "scheduler": scheduler,
+                                                    "rate_limiter": rate_limiter}, max_concurrency, chunk_chars)
+    finally:
+        if own_client:
+            await client.close()
+
+
+async def _map_reduce(path: str, cache: ExtractionCache, agent_options: Dict, max_concurrency: int,
+                      chunk_chars: int) -> Dict:
+    extractor = RFPAgent(EXTRACT_PROMPT, name="RFP Extractor", **agent_options)
+    extractions: Dict[int, Dict] = {}
+    cached = 0
+
+    async def extract(index, key, chunk):
+        extractions[index] = parse_extraction(await extractor.generate(chunk))
+        cache.put(key, extractions[index])
+
+    pending = set()
+    try:
+        for index, chunk in enumerate(chunk_blocks(read_blocks(path), chunk_chars)):
+            key = cache.key(chunk)
+            hit = cache.get(key)
+            if hit is not None:
+                extractions[index] = hit
+                cached += 1
+                continue
+            # Bounded memory: the reader pauses while max_concurrency chunks are in flight
+            while len(pending) >= max_concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            pending.add(asyncio.ensure_future(extract(index, key, chunk)))
+        if pending:
+            await asyncio.gather(*pending)
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        raise
+
+    ordered = [extractions[index] for index in sorted(extractions)]
+    summaries = [extraction["summary"] for extraction in ordered if extraction["summary"]]
+    brief = "\n".join(summaries)
+    if len(summaries) > 1:
+        key = cache.key("reduce", brief)
+        hit = cache.get(key)
+        if hit is None:
+            reducer = RFPAgent(REDUCE_PROMPT, name="RFP Reducer", **agent_options)
+            hit = {"brief": await reducer.generate(brief)}
+            cache.put(key, hit)
+        brief = hit["brief"]
+
+    requirements = reduce_requirements(ordered)
+    logger.info(f"Ingested {path}: {len(ordered)} chunks ({cached} cached), {len(requirements)} requirements")
+    return {
+        "source": path,
+        "brief": brief[:MAX_BRIEF_CHARS],
+        "requirements": requirements,
+        "chunks": len(ordered),
+        "cached_chunks": cached,
+    }
+
+
+def ingest_rfp(path: str, **kwargs) -> Dict:
+    """Synchronous ingest() for scripts and worker processes"""
+    return asyncio.run(ingest(path, **kwargs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turn an RFP document into a brief and a requirements table")
+    parser.add_argument("path", help=".txt, .md, .docx or .pdf file")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="chunks extracted at once")
+    parser.add_argument("--chunk-chars", type=int, default=CHUNK_CHARS)
+    parser.add_argument("--json", metavar="PATH", help="write the result as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = ingest_rfp(args.path, max_concurrency=args.concurrency, chunk_chars=args.chunk_chars)
+    print(f"{result['chunks']} chunks ({result['cached_chunks']} from cache)\n\n{result['brief']}\n")
+    for requirement in result["requirements"]:
+        print(f"{requirement['id']}  {requirement['priority']:<6}  {requirement['description']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
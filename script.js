@@ -18,6 +18,9 @@ function submitRequirements() {
     .then(data => {
         if (data.proposal) {
             output.textContent = data.proposal;
+            if (data.incomplete) {
+                output.textContent += "\n\nIncomplete (" + data.missing.join(", ") + " missing): " + data.incomplete;
+            }
         } else {
             output.textContent = "Error: " + (data.error || 'Unknown error');
         }
@@ -0,0 +1,213 @@
+"""
+Production server for the proposal generator.
+
+Serves the same routes as app.py (``/``, ``/generate`` and the ``/proposals``
+store) as an ASGI app so a single process can handle many concurrent proposals
+on one event loop. Run it with uvicorn worker processes instead of Flask's
+development server:
+
+    python server.py --workers 4 --port 8000
+"""
+import argparse
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Route
+
+from budget import SERVER_MAX_REPORTS, BudgetExceededError, ProposalBudget
+from llm_scheduler import INTERACTIVE, PRIORITIES, QuotaExceededError, shared_scheduler, tenant_scope
+from proposal_store import DEFAULT_LIMIT, save_quietly, shared_store
+from proposal_generator_agent import AsyncProposalOrchestrator, AgentError, load_openai
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Per-process limits, configurable through the environment
+REQUEST_TIMEOUT = float(os.getenv("PROPOSAL_REQUEST_TIMEOUT", "300"))  # seconds
+MAX_CONCURRENT = int(os.getenv("PROPOSAL_MAX_CONCURRENT", "100"))  # proposals generating at once
+MAX_QUEUE = int(os.getenv("PROPOSAL_MAX_QUEUE", "100"))  # proposals waiting for a slot
+RETRY_AFTER = "5"
+PROPOSAL_CACHE_CONTROL = "private, no-cache"  # always revalidate, 304 while unchanged
+
+# Only these files are served; everything else in the repo stays private
+STATIC_FILES = {
+    "/": ("index.html", "no-cache"),
+    "/index.html": ("index.html", "no-cache"),
+    "/styles.css": ("styles.css", "public, max-age=86400"),
+    "/script.js": ("script.js", "public, max-age=86400"),
+}
+
+
+class AdmissionControl:
+    """Bounded slots plus a bounded wait queue; anything beyond both is rejected"""
+
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.capacity = max_concurrent + max_queue
+        self.in_flight = 0
+        self.slots = asyncio.Semaphore(max_concurrent)
+
+    def try_admit(self) -> bool:
+        if self.in_flight >= self.capacity:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+
+admission = AdmissionControl(MAX_CONCURRENT, MAX_QUEUE)
+
+# Worker-wide, immutable across requests: the OpenAI client and its connection pool.
+# Everything else a request touches (orchestrator, agents, budget) is built per request.
+_client = None
+
+
+def shared_client():
+    global _client
+    if _client is None:
+        _client = load_openai().AsyncOpenAI(max_retries=0)  # the agents retry themselves
+    return _client
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    if _client is not None:
+        await _client.close()
+
+
+def format_proposal(proposal: dict) -> str:
+    """Render generated sections as plain text for the web UI"""
+    return "\n\n".join(f"--- {section} ---\n{content}" for section, content in proposal.items())
+
+
+async def static_file(request):
+    filename, cache_control = STATIC_FILES[request.url.path]
+    path = os.path.join(BASE_DIR, filename)
+    # With the stat result up front the ETag is set now, not only when the response is sent
+    response = FileResponse(path, headers={"Cache-Control": cache_control}, stat_result=os.stat(path))
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and response.headers["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={
+            "ETag": response.headers["etag"],
+            "Cache-Control": cache_control,
+        })
+    return response
+
+
+async def generate(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return JSONResponse({'error': 'Invalid JSON body'}, status_code=400)
+    if not isinstance(data, dict):
+        return JSONResponse({'error': 'JSON body must be an object'}, status_code=400)
+    requirements = data.get('requirements', '')
+
+    if not isinstance(requirements, str) or not requirements.strip():
+        return JSONResponse({'error': 'Requirements are required'}, status_code=400)
+
+    if not admission.try_admit():
+        return JSONResponse(
+            {'error': 'Server is busy, please retry shortly'},
+            status_code=429,
+            headers={"Retry-After": RETRY_AFTER},
+        )
+
+    # LLM calls are queued fairly per tenant (X-Tenant), interactive work ahead of batch work (X-Priority)
+    priority = PRIORITIES.get(request.headers.get("x-priority", "").lower(), INTERACTIVE)
+    budget = ProposalBudget.from_env(max_reports=SERVER_MAX_REPORTS)
+    try:
+        async with admission.slots:
+            orchestrator = AsyncProposalOrchestrator({
+                "customer": data.get('customer') or "the customer",
+                "project": requirements,
+            }, client=shared_client(), budget=budget, scheduler=shared_scheduler())
+            with tenant_scope(request.headers.get("x-tenant"), priority):
+                proposal = await asyncio.wait_for(orchestrator.generate_proposal(), timeout=REQUEST_TIMEOUT)
+        if orchestrator.stopped and not proposal:
+            raise orchestrator.stopped
+        proposal_id = await asyncio.to_thread(
+            save_quietly, proposal, customer=data.get('customer') or "", project=requirements, source="server",
+        )
+        body = {'proposal': format_proposal(proposal), 'id': proposal_id}
+        if orchestrator.stopped:
+            # Sections finished before the budget ran out are returned, with what is missing
+            body.update(incomplete=str(orchestrator.stopped),
+                        missing=[section for section in orchestrator.agents if section not in proposal])
+        return JSONResponse(body)
+    except asyncio.TimeoutError:
+        return JSONResponse({'error': f'Generation exceeded {REQUEST_TIMEOUT:.0f}s'}, status_code=504)
+    except AgentError as e:
+        return JSONResponse({'error': str(e)}, status_code=502)
+    except BudgetExceededError as e:
+        return JSONResponse({'error': str(e)}, status_code=503)
+    except QuotaExceededError as e:
+        return JSONResponse({'error': str(e)}, status_code=429, headers={"Retry-After": f"{e.retry_after:.0f}"})
+    finally:
+        admission.release()
+        await asyncio.to_thread(budget.write_report)
+
+
+async def search_proposals(request):
+    try:
+        limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return JSONResponse({'error': 'limit must be an integer'}, status_code=400)
+    results = await asyncio.to_thread(shared_store().search, request.query_params.get('q', ''), limit)
+    return JSONResponse({'results': results})
+
+
+async def get_proposal(request):
+    proposal_id = request.path_params['proposal_id']
+    store = shared_store()
+    etag = await asyncio.to_thread(store.etag, proposal_id)
+    if etag is None:
+        return JSONResponse({'error': 'Proposal not found'}, status_code=404)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": PROPOSAL_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    proposal = await asyncio.to_thread(store.get, proposal_id)
+    return JSONResponse(proposal, headers=headers)
+
+
+async def scheduler_report(request):
+    """Per-tenant LLM calls, tokens and queue-wait percentiles for this worker"""
+    return JSONResponse({'tenants': shared_scheduler().report()})
+
+
+routes = [Route(path, static_file, methods=["GET", "HEAD"]) for path in STATIC_FILES]
+routes.append(Route('/generate', generate, methods=["POST"]))
+routes.append(Route('/scheduler', scheduler_report, methods=["GET"]))
+routes.append(Route('/proposals', search_proposals, methods=["GET"]))
+routes.append(Route('/proposals/{proposal_id}', get_proposal, methods=["GET", "HEAD"]))
+
+app = Starlette(routes=routes, lifespan=lifespan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the proposal generator ASGI server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="number of worker processes")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(
+        "server:app",
+        app_dir=BASE_DIR,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+    )
+
+
+if __name__ == '__main__':
+    main()
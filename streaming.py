@@ -0,0 +1,191 @@
+"""
+Streaming assembly of proposal documents.
+
+Section agents stream their completions token by token. SectionStreamParser
+turns each completed line into a ProposalDocumentGenerator call as soon as it
+arrives (headings, paragraphs, bullets and markdown table rows), so the
+document is built while generation is still running and is ready to save
+moments after the last token.
+"""
+import asyncio
+import re
+from typing import Callable, Dict, List, Optional
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*)$')
+BOLD_HEADING_RE = re.compile(r'^\*\*([^*]+)\*\*:?$')
+BULLET_RE = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+(.*)$')
+TABLE_ROW_RE = re.compile(r'^\s*\|.*\|\s*$')
+TABLE_SEPARATOR_RE = re.compile(r'^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$')
+
+
+def clean_inline(text: str) -> str:
+    """Strip inline markdown emphasis"""
+    return text.replace('**', '').replace('__', '').strip()
+
+
+def heading_key(text: str) -> str:
+    """Heading text compared without case, numbering and punctuation"""
+    return " ".join(re.sub(r'[^\w\s]', ' ', re.sub(r'^\s*\d+[.)]?\s+', '', clean_inline(text)).lower()).split())
+
+
+class SectionStreamParser:
+    """
+    Incrementally writes one section's streamed markdown into a ProposalDocumentGenerator.
+
+    ``replace`` maps a word to a writer: the first sub-section whose heading
+    contains the word is dropped and ``writer(level)`` writes its replacement
+    in its place (at the end of the section if no heading matches).
+    """
+
+    def __init__(self, generator, heading: str, replace: Optional[Dict[str, Callable[[int], None]]] = None):
+        self.generator = generator
+        self._line = ""
+        self._paragraph: List[str] = []
+        self._table = None
+        self._table_width = 0
+        self.text = ""
+        self._heading_key = heading_key(heading)
+        self._started = False
+        self._replace = dict(replace or {})
+        # (level, bold) of the replaced sub-section being skipped
+        self._skipping = None
+        generator.add_section_heading(heading, level=1)
+
+    def feed(self, chunk: str):
+        """Consume streamed text; every completed line is written immediately"""
+        self.text += chunk
+        self._line += chunk
+        while '\n' in self._line:
+            line, self._line = self._line.split('\n', 1)
+            self._handle_line(line)
+
+    def close(self):
+        """Flush any partial line and end the section"""
+        if self._line:
+            self._handle_line(self._line)
+            self._line = ""
+        self._flush_paragraph()
+        self._table = None
+        for writer in self._replace.values():
+            writer(2)
+        self._replace.clear()
+        self.generator.add_page_break()
+
+    def _handle_line(self, line: str):
+        stripped = line.strip()
+        # Only the first non-blank line can repeat the section heading
+        first_line = bool(stripped) and not self._started
+        self._started = self._started or bool(stripped)
+        if self._skipping and not self._ends_skip(stripped):
+            return
+        self._skipping = None
+
+        if TABLE_ROW_RE.match(stripped):
+            self._flush_paragraph()
+            if TABLE_SEPARATOR_RE.match(stripped):
+                return
+            cells = [clean_inline(cell) for cell in stripped.strip('|').split('|')]
+            if self._table is None:
+                self._table = self.generator.start_table(cells)
+                self._table_width = len(cells)
+            else:
+                self.generator.add_table_row(self._table, cells[:self._table_width])
+            return
+        self._table = None
+
+        if not stripped:
+            self._flush_paragraph()
+            return
+
+        heading = HEADING_RE.match(stripped) or BOLD_HEADING_RE.match(stripped)
+        if heading and first_line and heading_key(heading.groups()[-1]) == self._heading_key:
+            return  # the model repeated the section heading, which is already written
+        if heading:
+            self._flush_paragraph()
+            level = 2 if heading.re is BOLD_HEADING_RE else min(3, max(2, len(heading.group(1))))
+            text = clean_inline(heading.groups()[-1])
+            writer = self._replacement(text)
+            if writer:
+                writer(level)
+                self._skipping = (len(heading.group(1)) if heading.re is HEADING_RE else 0,
+                                  heading.re is BOLD_HEADING_RE)
+                return
+            self.generator.add_section_heading(text, level=level)
+            return
+
+        bullet = BULLET_RE.match(line)
+        if bullet:
+            self._flush_paragraph()
+            self.generator.add_bullet(clean_inline(bullet.group(1)))
+            return
+
+        self._paragraph.append(clean_inline(stripped))
+
+    def _replacement(self, heading: str) -> Optional[Callable[[int], None]]:
+        key = heading_key(heading)
+        word = next((word for word in self._replace if word in key), None)
+        return self._replace.pop(word) if word else None
+
+    def _ends_skip(self, stripped: str) -> bool:
+        """A heading at the replaced sub-section's level or above ends it"""
+        level, bold = self._skipping
+        heading = HEADING_RE.match(stripped)
+        if heading:
+            return bold or len(heading.group(1)) <= level
+        return bold and bool(BOLD_HEADING_RE.match(stripped))
+
+    def _flush_paragraph(self):
+        if self._paragraph:
+            self.generator.add_text(" ".join(self._paragraph))
+            self._paragraph = []
+
+
+async def stream_proposal_into(orchestrator, generator, sections: Optional[List[str]] = None,
+                               fixed: Optional[Dict[str, Callable[[], str]]] = None) -> Dict[str, str]:
+    """
+    Stream every section of an AsyncProposalOrchestrator into a document.
+
+    All sections generate concurrently. The first section is written as its
+    tokens arrive; later sections buffer until the sections before them are
+    done, so the document keeps section order. Sections in ``fixed`` are not
+    generated: their writer is called in their place in that order and
+    returns the section's text. The sections share the orchestrator's client.
+    Returns the text per section.
+    """
+    sections = sections or list(orchestrator.agents)
+    fixed = fixed or {}
+    generated = [section for section in sections if section not in fixed]
+    queues = {section: asyncio.Queue() for section in generated}
+    done = object()
+
+    async def pump(section):
+        try:
+            async for token in orchestrator.agents[section].stream(orchestrator.context):
+                queues[section].put_nowait(token)
+        finally:
+            queues[section].put_nowait(done)
+
+    async with orchestrator.client_scope():
+        tasks = {section: asyncio.ensure_future(pump(section)) for section in generated}
+        results = {}
+        try:
+            for section in sections:
+                if section in fixed:
+                    results[section] = fixed[section]()
+                    continue
+                parser = SectionStreamParser(generator, section)
+                while True:
+                    token = await queues[section].get()
+                    if token is done:
+                        break
+                    parser.feed(token)
+                # Surface the section's error, if any, before writing its end
+                await tasks[section]
+                parser.close()
+                results[section] = parser.text.strip()
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+    return results
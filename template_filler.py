@@ -0,0 +1,121 @@
+"""
+In-place filling of placeholder templates.
+
+TemplateManager.create_littlefish_template writes the cover title, then one
+Heading 1 per section followed by a placeholder paragraph. Instead of copying
+the template's styles into a blank document and appending every section after
+it, the generator opens the template itself and writes each section where its
+placeholder is.
+
+The template is indexed once per file (cached by path, size and mtime): the
+body positions of the front matter and of each section's heading, placeholder
+and blank spacer paragraph. Filling a document is then a single forward pass.
+When a section starts, its template paragraphs are removed and the body's
+final sectPr, where python-docx inserts every new paragraph and table, is
+parked in their place. Everything the generator adds lands there, with no
+search and no cleanup afterwards. finish() puts the sectPr back at the end and
+drops slots that were never filled.
+"""
+import io
+import logging
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from docx import Document
+from docx.oxml.ns import qn
+
+try:
+    from .template_manager import PLACEHOLDER_TEXT
+except ImportError:
+    from template_manager import PLACEHOLDER_TEXT
+
+logger = logging.getLogger(__name__)
+
+FRONT = ""  # slot for the cover and contents, before the first section
+
+
+def _text(element) -> str:
+    return "".join(t.text or "" for t in element.iter(qn('w:t'))).strip()
+
+
+def _is_heading(element, style_ids) -> bool:
+    style = element.find(f"{qn('w:pPr')}/{qn('w:pStyle')}")
+    return style is not None and style.get(qn('w:val')) in style_ids
+
+
+@lru_cache(maxsize=16)
+def _index(path: str, size: int, mtime_ns: int) -> Tuple[bytes, Dict[str, List[int]]]:
+    """Template bytes and slot name -> body child positions; size and mtime invalidate the cache"""
+    with open(path, "rb") as f:
+        data = f.read()
+    document = Document(io.BytesIO(data))
+    heading_ids = {style.style_id for style in document.styles if style.name == 'Heading 1'}
+    children = [child for child in document.element.body if child.tag != qn('w:sectPr')]
+
+    slots: Dict[str, List[int]] = {}
+    first_section = None
+    for position, child in enumerate(children[:-1]):
+        if child.tag != qn('w:p') or not _is_heading(child, heading_ids):
+            continue
+        if _text(children[position + 1]) != PLACEHOLDER_TEXT:
+            continue
+        positions = [position, position + 1]
+        # The template follows each placeholder with an empty spacer paragraph
+        spacer = position + 2
+        if spacer < len(children) and children[spacer].tag == qn('w:p') and not _text(children[spacer]):
+            positions.append(spacer)
+        slots[_text(child).lower()] = positions
+        if first_section is None:
+            first_section = position
+    if slots:
+        slots[FRONT] = list(range(first_section))
+    return data, slots
+
+
+class TemplateFiller:
+    def __init__(self, document, slots: Dict[str, List[int]]):
+        self.document = document
+        body = document.element.body
+        self._body = body
+        self._sect_pr = body.find(qn('w:sectPr'))
+        children = [child for child in body if child.tag != qn('w:sectPr')]
+        self._slots = {name: [children[p] for p in positions] for name, positions in slots.items()}
+        self.filled: List[str] = []
+        self.enter(FRONT)
+
+    @classmethod
+    def load(cls, template_path: str) -> Optional["TemplateFiller"]:
+        """A filler over a fresh copy of the template, or None if it has no placeholder sections"""
+        stat = os.stat(template_path)
+        data, slots = _index(os.path.abspath(template_path), stat.st_size, stat.st_mtime_ns)
+        if not slots:
+            return None
+        document = Document(io.BytesIO(data))
+        if document.element.body.find(qn('w:sectPr')) is None:
+            return None
+        return cls(document, slots)
+
+    def enter(self, section: str) -> bool:
+        """Write what follows in place of ``section``'s template paragraphs; False if it has none"""
+        elements = self._slots.pop(section.strip().lower(), None)
+        if elements is None:
+            return False
+        if elements:
+            elements[0].addprevious(self._sect_pr)
+        else:
+            # Empty front matter: write at the start of the body
+            self._body.insert(0, self._sect_pr)
+        for element in elements:
+            self._body.remove(element)
+        self.filled.append(section)
+        return True
+
+    def finish(self):
+        """Return the sectPr to the end of the body and remove sections nobody filled"""
+        self._body.append(self._sect_pr)
+        for section, elements in self._slots.items():
+            logger.info(f"Template section '{section}' was not filled; removing its placeholder")
+            for element in elements:
+                self._body.remove(element)
+        self._slots.clear()
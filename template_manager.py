@@ -5,6 +5,9 @@ from docx.enum.style import WD_STYLE_TYPE
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
 
+# Marks where the generator writes each section (see template_filler.py)
+PLACEHOLDER_TEXT = 'This section will be populated by the proposal generator.'
+
 class TemplateManager:
     @staticmethod
     def create_littlefish_template(output_path: str):
@@ -78,7 +81,7 @@ class TemplateManager:
         
         for section in sections:
             doc.add_paragraph(section, style='Heading 1')
-            doc.add_paragraph('This section will be populated by the proposal generator.', style='Normal')
+            doc.add_paragraph(PLACEHOLDER_TEXT, style='Normal')
             doc.add_paragraph()
         
         # Save the template
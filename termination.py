@@ -0,0 +1,201 @@
+"""
+Early termination for autogen group chats.
+
+A group chat runs until max_round unless its manager's is_termination_msg says
+otherwise, and every extra round is another LLM call over the whole transcript.
+ChatTermination is that predicate, built from completion detectors:
+
+    DocumentCreated      the Document Assembler's code reported a document saved during this chat
+    SectionsCollected    every expected section has been drafted, passes the quality gate
+                         and was approved by the reviewer
+    ReviewerApproved     the reviewer approved the latest draft
+
+Each detector returns a reason or None. The first detector that fires ends
+the chat, and the rounds saved against max_round are logged and added to
+``stats``.
+
+    termination = ChatTermination(DocumentCreated("workdir"), max_round=50)
+    manager = autogen.GroupChatManager(groupchat, llm_config=..., is_termination_msg=termination)
+"""
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CODE_BLOCK_RE = re.compile(r'```.*?```', re.DOTALL)
+DOCUMENT_CREATED_RE = re.compile(
+    r'(?:Document created at:?|Proposal document created successfully at)\s*(\S+\.docx)\b', re.IGNORECASE
+)
+APPROVED_RE = re.compile(r'\bAPPROVED\b')
+# A negated approval anywhere in the reply is a veto, whatever its case and spacing
+NOT_APPROVED_RE = re.compile(r'\bnot\s+(?:yet\s+)?approved\b', re.IGNORECASE)
+
+stats = {"chats": 0, "terminated_early": 0, "rounds": 0, "rounds_saved": 0, "reasons": {}}
+_stats_lock = threading.Lock()
+
+
+def approves(text: str) -> bool:
+    """True when a reviewer's reply says APPROVED and does not say it is not approved"""
+    return bool(APPROVED_RE.search(text)) and not NOT_APPROVED_RE.search(text)
+
+
+def _content(message) -> str:
+    if isinstance(message, dict):
+        return str(message.get("content") or "")
+    return str(message or "")
+
+
+class DocumentCreated:
+    """
+    Fires on the 'Document created at <path>' output once that file exists and
+    was written after the chat started, so a document left by an earlier run
+    does not count.
+    """
+
+    def __init__(self, work_dir: Optional[str] = None):
+        self.work_dir = work_dir
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+
+    def _written(self, path: str) -> bool:
+        return os.path.exists(path) and os.path.getmtime(path) >= self.started
+
+    def __call__(self, message) -> Optional[str]:
+        # The assembler's own code contains the print statement; only its output counts
+        text = CODE_BLOCK_RE.sub("", _content(message))
+        for path in DOCUMENT_CREATED_RE.findall(text):
+            candidates = [path] if os.path.isabs(path) or not self.work_dir else [os.path.join(self.work_dir, path), path]
+            if any(self._written(candidate) for candidate in candidates):
+                return f"document created at {path}"
+        return None
+
+
+class ReviewerApproved:
+    """Fires when the reviewer's message says APPROVED (and not "not approved", in any case)"""
+
+    def __init__(self, reviewer: str = "Proposal_Reviewer"):
+        self.reviewer = reviewer
+
+    def __call__(self, message) -> Optional[str]:
+        if isinstance(message, dict) and message.get("name") not in (None, self.reviewer):
+            return None
+        if approves(_content(message)):
+            return f"approved by {self.reviewer}"
+        return None
+
+
+class SectionsCollected:
+    """
+    Fires once every expected section has been drafted by one of ``authors``
+    under its own markdown heading, with no quality gate errors, and the
+    ``reviewer`` has approved the latest draft. A new draft needs a new
+    approval.
+    """
+
+    def __init__(self, sections: Sequence[str] = (), authors: Optional[Sequence[str]] = None,
+                 reviewer: str = "Proposal_Reviewer"):
+        self.authors = authors
+        self.reviewer = reviewer
+        self.expect(sections)
+
+    def expect(self, sections: Sequence[str]):
+        """Set the sections the next chat has to produce"""
+        self.sections = list(sections)
+        self.reset()
+
+    def reset(self):
+        self.collected = []
+        self.approved = False
+
+    def __call__(self, message) -> Optional[str]:
+        from quality_gate import check_section, failing_sections, split_sections
+
+        if not self.sections:
+            return None
+        name = message.get("name") if isinstance(message, dict) else None
+        if name == self.reviewer:
+            self.approved = approves(_content(message))
+            if self.approved and len(self.collected) == len(self.sections):
+                return f"all sections collected and approved ({', '.join(self.collected)})"
+            return None
+        if self.authors and isinstance(message, dict) and name not in self.authors:
+            return None
+        self.approved = False
+        for heading, body in split_sections(_content(message)).items():
+            for section in self.sections:
+                if section in self.collected or section.lower() not in heading.lower():
+                    continue
+                if body and not failing_sections(check_section(heading, body)):
+                    self.collected.append(section)
+        return None
+
+
+class ChatTermination:
+    """An is_termination_msg predicate that ends a chat on the first detector that fires"""
+
+    def __init__(self, *detectors, max_round: Optional[int] = None, label: str = ""):
+        self.detectors = detectors
+        self.max_round = max_round
+        self.label = label
+        self.rounds = 0
+        self.reason: Optional[str] = None
+        self.detector: Optional[str] = None
+        self._open = False
+
+    def begin(self, label: Optional[str] = None):
+        """Start counting a new chat on the same manager"""
+        self.end()
+        if label is not None:
+            self.label = label
+        self.rounds = 0
+        self.reason = None
+        self.detector = None
+        for detector in self.detectors:
+            if hasattr(detector, "reset"):
+                detector.reset()
+
+    def __call__(self, message) -> bool:
+        self._open = True
+        self.rounds += 1
+        for detector in self.detectors:
+            reason = detector(message)
+            if reason:
+                self.reason = reason
+                self.detector = type(detector).__name__
+                self.end()
+                return True
+        return False
+
+    @property
+    def rounds_saved(self) -> int:
+        if not self.reason or not self.max_round:
+            return 0
+        return max(0, self.max_round - self.rounds)
+
+    def end(self):
+        """Record the chat's outcome in ``stats``; safe to call more than once"""
+        if not self._open:
+            return
+        self._open = False
+        with _stats_lock:
+            stats["chats"] += 1
+            stats["rounds"] += self.rounds
+            if self.reason:
+                stats["terminated_early"] += 1
+                stats["rounds_saved"] += self.rounds_saved
+                stats["reasons"][self.detector] = stats["reasons"].get(self.detector, 0) + 1
+        label = f" {self.label}" if self.label else ""
+        if self.reason:
+            logger.info(f"Chat{label} ended after {self.rounds} rounds: {self.reason} "
+                        f"({self.rounds_saved} of {self.max_round} rounds saved)")
+        else:
+            logger.info(f"Chat{label} ran {self.rounds} rounds without a completion signal")
+
+    def summary(self) -> Dict:
+        return {"label": self.label, "rounds": self.rounds, "reason": self.reason, "rounds_saved": self.rounds_saved}
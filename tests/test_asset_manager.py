@@ -0,0 +1,44 @@
+import io
+
+import pytest
+from docx import Document
+from docx.shared import Inches
+
+from asset_manager import AssetManager
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def png(width, height):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(out, "PNG")
+    return out.getvalue()
+
+
+def test_images_are_downsampled_to_the_displayed_width():
+    assets = AssetManager(target_dpi=100)
+    data, _ = assets.prepare(png(2000, 1000), width_emu=Inches(2))
+
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.size == (200, 100)
+    assert assets.prepare(png(2000, 1000), width_emu=Inches(2))[0] == data
+    assert assets.stats["cache_hits"] == 1
+
+
+def test_small_images_are_embedded_unchanged():
+    data = png(50, 50)
+
+    assert AssetManager().prepare(data, width_emu=Inches(2))[0] is data
+
+
+def test_repeated_pictures_share_one_media_part():
+    assets = AssetManager()
+    document = Document()
+    logo = png(400, 200)
+
+    assets.add_picture(document, logo, width=Inches(1))
+    assets.add_picture(document, io.BytesIO(logo), width=Inches(1))
+
+    images = [part for part in document.part.package.parts if part.partname.startswith("/word/media/")]
+    assert len(images) == 1
+    assert (assets.stats["inserted"], assets.stats["reused_parts"]) == (2, 1)
@@ -0,0 +1,66 @@
+import pytest
+
+from cost_engine import UNPRICED, CostEngine, InvalidAmountError, to_number
+from quality_gate import check_content
+
+RATE_CARD = {
+    "currency": "GBP",
+    "contingency": 0.1,
+    "day_rates": {"Consultant": 800},
+    "licenses": {"Power BI Pro": 8.2},
+}
+
+
+def test_unknown_licence_is_not_costed_at_zero():
+    engine = CostEngine(RATE_CARD)
+    estimate = engine.estimate(
+        [{"role": "Consultant", "days": 2}],
+        [{"name": "Power BI Pro", "quantity": 2}, {"name": "Mystery Suite", "quantity": 3}],
+    )
+
+    unpriced = estimate["licenses"][1]
+    assert unpriced["unit_price"] is None and unpriced["total"] is None
+    assert engine.format(unpriced["total"]) == UNPRICED
+    assert estimate["unpriced_licenses"] == ["Mystery Suite"]
+    assert estimate["license_total"] == 16.4
+    assert estimate["total"] == 1600 + 160 + 16.4
+
+
+def test_unknown_licence_fails_the_quality_gate():
+    findings = check_content({"licenses": [{"name": "Mystery Suite", "quantity": 3}]}, CostEngine(RATE_CARD))
+
+    assert [f["rule"] for f in findings if f["section"] == "Costs"] == ["unknown_license"]
+
+
+def test_unknown_role_is_not_costed_at_a_default_rate():
+    engine = CostEngine(RATE_CARD)
+    estimate = engine.estimate([{"role": "Consultant", "days": 2}, {"role": "Astronaut", "days": 5}])
+
+    unpriced = estimate["lines"][1]
+    assert unpriced["day_rate"] is None and unpriced["total"] is None
+    assert estimate["unpriced_roles"] == ["Astronaut"]
+    assert estimate["total_days"] == 7
+    assert estimate["total"] == 1600 + 160
+    assert "Excludes roles not on the rate card: Astronaut" in engine.to_markdown(estimate)
+
+
+def test_unknown_role_fails_the_quality_gate():
+    findings = check_content({"resources": [{"activity": "Launch", "role_type": "Astronaut", "quantity": 5}]},
+                             CostEngine(RATE_CARD))
+
+    assert [(f["rule"], f["severity"]) for f in findings if f["section"] == "Costs"] == [("unknown_role", "error")]
+
+
+@pytest.mark.parametrize("value", [-2, "-2 days", "-1,200"])
+def test_negative_amounts_are_rejected(value):
+    with pytest.raises(InvalidAmountError):
+        to_number(value)
+
+
+def test_negative_days_and_prices_are_not_costed():
+    engine = CostEngine(RATE_CARD)
+
+    with pytest.raises(InvalidAmountError):
+        engine.estimate([{"role": "Consultant", "days": -2}])
+    with pytest.raises(InvalidAmountError):
+        engine.estimate([], [{"name": "Power BI Pro", "quantity": 2, "unit_price": "-8.20"}])
@@ -0,0 +1,39 @@
+import json
+
+from effort_estimator import EffortEstimator, apply_estimates, load_history, record_actuals
+
+HISTORY = [
+    {"task": "Requirements gathering workshops", "effort": 3, "role": "Business Analyst"},
+    {"task": "Requirements gathering and sign-off", "effort": 4, "role": "Business Analyst"},
+    {"task": "User acceptance testing", "effort": 5, "role": "Tester"},
+]
+
+ANSWER = """Here is the breakdown:
+
+| Task | Role | Effort (days) |
+|---|---|---|
+| Requirements gathering | | 10 |
+| Migrate legacy job sheets | Developer | 6 |
+
+Effort excludes travel."""
+
+
+def test_history_replaces_recognised_tasks_only():
+    text = apply_estimates(ANSWER, EffortEstimator(HISTORY))
+
+    assert "| Requirements gathering | Business Analyst | 3.5 |" in text
+    assert "| Migrate legacy job sheets | Developer | 6 |" in text
+    assert text.startswith("Here is the breakdown:") and text.endswith("Effort excludes travel.")
+
+
+def test_actuals_are_recorded_apart_from_the_seed_history(tmp_path):
+    seed, actuals = tmp_path / "seed.jsonl", tmp_path / "actuals.jsonl"
+    seed.write_text("".join(json.dumps(row) + "\n" for row in HISTORY))
+
+    record_actuals([{"task": "Migrate legacy job sheets", "effort": 7, "role": "Developer"},
+                    {"task": "Unconfirmed", "effort": "TBC"}], path=str(actuals))
+
+    assert load_history(str(seed)) == HISTORY
+    assert [row["task"] for row in load_history(str(actuals))] == ["Migrate legacy job sheets"]
+    estimator = EffortEstimator.from_history(str(seed), str(actuals))
+    assert estimator.predict("Migrate legacy job sheets")["effort"] == 7
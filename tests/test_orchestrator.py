@@ -0,0 +1,43 @@
+import asyncio
+
+from budget import BudgetExceededError
+from proposal_generator_agent import AsyncProposalOrchestrator
+
+
+class Agent:
+    client = None
+
+    def __init__(self, text=None, delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.used = []
+
+    async def generate(self, context):
+        self.used.append(self.client)
+        await asyncio.sleep(self.delay)
+        if self.text is None:
+            raise BudgetExceededError("max_llm_calls 2 reached")
+        return self.text
+
+
+def test_sections_finished_before_the_budget_runs_out_are_kept():
+    orchestrator = AsyncProposalOrchestrator({}, client=object())
+    orchestrator.agents = {"Executive Summary": Agent("Summary.", delay=0.05), "Costs": Agent(),
+                           "Project Scope": Agent("Scope.")}
+
+    proposal = asyncio.run(orchestrator.generate_proposal())
+
+    assert proposal == {"Executive Summary": "Summary.", "Project Scope": "Scope."}
+    assert orchestrator.stopped.reason == "max_llm_calls 2 reached"
+
+
+def test_agents_share_one_client_that_is_closed_afterwards(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "x")
+    orchestrator = AsyncProposalOrchestrator({})
+    agents = orchestrator.agents = {"Executive Summary": Agent("Summary."), "Costs": Agent("Costs.")}
+
+    asyncio.run(orchestrator.generate_proposal())
+
+    summary_client, costs_client = (agent.used[0] for agent in agents.values())
+    assert summary_client is costs_client and summary_client.is_closed()
+    assert orchestrator.client is None and all(agent.client is None for agent in agents.values())
@@ -0,0 +1,105 @@
+"""
+Golden-output test for proposal_builder.
+
+The built document is reduced to an outline (paragraph styles and text, table
+rows) and compared with tests/golden/proposal_builder.json. After an intended
+change to the document, regenerate the golden file and review its diff:
+
+    UPDATE_GOLDEN=1 python -m pytest tests/test_proposal_builder.py
+"""
+import json
+import os
+
+import pytest
+from docx import Document
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+from proposal_builder import build_proposal
+from template_manager import TemplateManager
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "proposal_builder.json")
+
+CONTENT = {
+    "title": "IT Project Proposal - Field Service Portal",
+    "subtitle": "Prepared for ACME Corp",
+    "executive_summary": "ACME Corp needs a secure portal for its field engineers.",
+    "requirements": [
+        {"requirement": "REQ-001", "description": "Single sign-on with Entra ID"},
+        {"requirement": "REQ-002", "description": "Offline access to job sheets"},
+    ],
+    "in_scope": ["Portal design and build", "Entra ID integration"],
+    "out_scope": ["Hardware procurement"],
+    "solution_summary": "A responsive web portal hosted in Azure.",
+    "standard_deliverables": ["Project plan", "Handover documentation"],
+    "project_specific_deliverables": ["Field service portal"],
+    "resources": [
+        {"activity": "Design", "role_type": "Solution Architect", "quantity": 5},
+        {"activity": "Build", "role_type": "Developer", "quantity": 20},
+        {"activity": "Test", "role_type": "Tester", "quantity": 8},
+    ],
+    "licenses": [{"name": "Power BI Pro", "quantity": 25}],
+    "licensing": "Licences are billed annually.",
+    "risks": ["Entra ID tenant changes during delivery"],
+    "assumptions": ["ACME provides test accounts"],
+    "issues": ["No staging environment yet"],
+    "dependencies": ["Network team opens firewall ports"],
+    "tasks": [
+        {"task": "Requirements workshop", "role": "Business Analyst", "effort": 3},
+        {"task": "Portal build", "role": "Developer", "effort": 20},
+    ],
+}
+
+
+def outline(path):
+    """Body of a saved document as [style, text] for paragraphs and ["table", rows] for tables"""
+    document = Document(path)
+    items = []
+    for element in document.element.body.iterchildren():
+        if element.tag.endswith("}p"):
+            paragraph = Paragraph(element, document)
+            items.append([paragraph.style.name, paragraph.text])
+        elif element.tag.endswith("}tbl"):
+            items.append(["table", [[cell.text for cell in row.cells] for row in Table(element, document).rows]])
+    return items
+
+
+def build(tmp_path, template_path=None):
+    output_path = str(tmp_path / "proposal.docx")
+    build_proposal(CONTENT, template_path).save(output_path)
+    return outline(output_path)
+
+
+@pytest.fixture(scope="module")
+def golden():
+    if os.getenv("UPDATE_GOLDEN"):
+        return {}
+    with open(GOLDEN_PATH) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def update_golden(golden):
+    yield
+    if os.getenv("UPDATE_GOLDEN"):
+        os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+        with open(GOLDEN_PATH, "w") as f:
+            json.dump(golden, f, indent=1)
+            f.write("\n")
+
+
+def check(golden, case, actual):
+    if os.getenv("UPDATE_GOLDEN"):
+        golden[case] = actual
+    else:
+        assert actual == golden[case]
+
+
+def test_blank_document_matches_golden(golden, tmp_path):
+    check(golden, "blank", build(tmp_path))
+
+
+def test_placeholder_template_matches_golden(golden, tmp_path):
+    template_path = str(tmp_path / "template.docx")
+    TemplateManager.create_littlefish_template(template_path)
+    check(golden, "template", build(tmp_path, template_path))
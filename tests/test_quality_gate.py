@@ -0,0 +1,45 @@
+import pytest
+
+from quality_gate import draft_section, fully_checked, gate_autogen_reviewer
+
+autogen = pytest.importorskip("autogen")
+
+COST_TABLE = "| Activity | Days | Rate | Total |\n|---|---|---|---|\n| Build | 2 | 800 | 1600 |"
+
+
+def reviewer_sees(draft):
+    """The messages the reviewer's LLM is asked about, or None if the gate approved on its own"""
+    seen = []
+    reviewer = autogen.ConversableAgent("Proposal_Reviewer", llm_config=False, human_input_mode="NEVER")
+    reviewer.generate_oai_reply = lambda messages=None, sender=None, config=None: (
+        seen.append(messages) or (True, "LLM review"))
+    gate_autogen_reviewer(reviewer, authors=["Proposal_Writer"])
+    reply = reviewer.generate_reply([{"role": "user", "name": "Proposal_Writer", "content": draft}])
+    return seen[0] if seen else reply
+
+
+def test_prose_is_reviewed_by_the_llm_even_when_it_passes():
+    messages = reviewer_sees("## Executive Summary\nACME needs a portal.")
+
+    assert isinstance(messages, list)
+    assert "the mechanical checks pass" in messages[-1]["content"]
+
+
+def test_passing_tables_are_approved_without_the_llm():
+    assert fully_checked(COST_TABLE)
+    assert reviewer_sees(COST_TABLE).startswith("APPROVED")
+
+
+def test_failing_tables_go_to_the_llm_with_the_findings():
+    messages = reviewer_sees(COST_TABLE.replace("1600", "9999"))
+
+    assert "cost_line" in messages[-1]["content"]
+
+
+def test_scope_drafts_are_checked_as_the_section_in_their_heading():
+    assert draft_section("Intro\n## Scope Statement\n### In Scope\n- Portal") == "Scope Statement"
+
+    messages = reviewer_sees("## Scope Statement\n| In scope | Phase |\n|---|---|\n| Portal | 1 |")
+
+    assert isinstance(messages, list)
+    assert "out_of_scope_statement" in messages[-1]["content"]
@@ -0,0 +1,61 @@
+import asyncio
+from contextlib import nullcontext
+
+from document_generator import ProposalDocumentGenerator
+from streaming import SectionStreamParser, stream_proposal_into
+
+REQUIREMENTS = [{"id": "REQ-1", "description": "Single sign-on", "priority": "Must"}]
+
+
+class Agent:
+    def __init__(self, text):
+        self.text = text
+
+    async def stream(self, context):
+        for line in self.text.splitlines(keepends=True):
+            yield line
+
+
+class Orchestrator:
+    context = {}
+
+    def __init__(self, sections):
+        self.agents = {name: Agent(text) for name, text in sections.items()}
+
+    def client_scope(self):
+        return nullcontext()
+
+
+def headings(generator):
+    return [(p.style.name, p.text) for p in generator.document.paragraphs if p.style.name.startswith("Heading")]
+
+
+def test_fixed_sections_keep_their_place_in_the_order():
+    generator = ProposalDocumentGenerator()
+    orchestrator = Orchestrator({"Executive Summary": "Summary.", "Customer Requirements": "LLM requirements",
+                                 "Costs": "Costs."})
+
+    def write_requirements():
+        generator.add_requirements_table(REQUIREMENTS)
+        return "REQ-1"
+
+    sections = asyncio.run(stream_proposal_into(
+        orchestrator, generator, fixed={"Customer Requirements": write_requirements}))
+
+    assert [text for _, text in headings(generator)] == ["Executive Summary", "Customer Requirements", "Costs"]
+    assert sections["Customer Requirements"] == "REQ-1"
+    assert "LLM requirements" not in [p.text for p in generator.document.paragraphs]
+
+
+def test_a_replaced_sub_section_is_written_by_its_writer():
+    generator = ProposalDocumentGenerator()
+    parser = SectionStreamParser(generator, "Proposal", replace={
+        "requirement": lambda level: generator.add_requirements_table(REQUIREMENTS, level=level)})
+    parser.feed("## Overview\nIntro.\n## Client Requirements\n- made up\n### Detail\nmore\n## Solution\nPlan.\n")
+    parser.close()
+
+    assert headings(generator) == [("Heading 1", "Proposal"), ("Heading 2", "Overview"),
+                                   ("Heading 2", "Customer Requirements"), ("Heading 2", "Solution")]
+    texts = [p.text for p in generator.document.paragraphs]
+    assert "made up" not in texts and "more" not in texts
+    assert generator.document.tables[0].cell(1, 0).text == "REQ-1"
@@ -0,0 +1,35 @@
+from docx import Document
+
+from template_filler import TemplateFiller
+from template_manager import PLACEHOLDER_TEXT, TemplateManager
+
+
+def texts(document):
+    return [paragraph.text for paragraph in document.paragraphs if paragraph.text]
+
+
+def test_sections_are_written_in_place_of_their_placeholders(tmp_path):
+    path = str(tmp_path / "template.docx")
+    TemplateManager.create_littlefish_template(path)
+    filler = TemplateFiller.load(path)
+
+    filler.enter("Executive Summary")
+    filler.document.add_paragraph("Summary text")
+    filler.enter("RAID Analysis")
+    filler.document.add_paragraph("Risk text")
+    filler.finish()
+
+    body = texts(filler.document)
+    assert filler.filled == ["", "Executive Summary", "RAID Analysis"]
+    assert body[-2:] == ["Summary text", "Risk text"]
+    assert PLACEHOLDER_TEXT not in body and "Customer Requirements" not in body
+    assert filler.enter("Deliverables") is False
+
+
+def test_templates_without_placeholders_are_not_filled(tmp_path):
+    path = str(tmp_path / "plain.docx")
+    document = Document()
+    document.add_heading("Executive Summary", level=1)
+    document.save(path)
+
+    assert TemplateFiller.load(path) is None
@@ -0,0 +1,44 @@
+import os
+import time
+
+import pytest
+
+from termination import DocumentCreated, ReviewerApproved, SectionsCollected
+
+DRAFT = {"name": "Proposal_Writer", "content": "## Executive Summary\nACME needs a portal."}
+
+
+def test_sections_need_the_reviewers_approval():
+    collected = SectionsCollected(["Executive Summary"], authors=["Proposal_Writer"])
+
+    assert collected(DRAFT) is None
+    assert collected({"name": "Proposal_Reviewer", "content": "NOT APPROVED: add detail"}) is None
+    assert collected(DRAFT) is None
+    assert collected({"name": "Proposal_Reviewer", "content": "APPROVED"})
+
+
+def test_a_document_from_an_earlier_run_does_not_end_the_chat(tmp_path):
+    path = tmp_path / "proposal.docx"
+    path.write_bytes(b"old")
+    os.utime(path, (time.time() - 60, time.time() - 60))
+    detector = DocumentCreated(str(tmp_path))
+    message = {"name": "Document_Assembler", "content": "Document created at proposal.docx"}
+
+    assert detector(message) is None
+    path.write_bytes(b"new")
+    assert detector(message)
+
+
+@pytest.mark.parametrize("reply", ["NOT APPROVED", "Not APPROVED yet", "not APPROVED", "NOT  APPROVED",
+                                   "NOT\nAPPROVED: the costs do not add up", "Needs work"])
+def test_rejections_are_not_approvals(reply):
+    message = {"name": "Proposal_Reviewer", "content": reply}
+    collected = SectionsCollected(["Executive Summary"], authors=["Proposal_Writer"])
+    collected(DRAFT)
+
+    assert ReviewerApproved()(message) is None
+    assert collected(message) is None
+
+
+def test_approval():
+    assert ReviewerApproved()({"name": "Proposal_Reviewer", "content": "APPROVED: ready to send"})
@@ -0,0 +1,38 @@
+from docx import Document
+from docx.oxml.ns import qn
+
+from toc import TableOfContents
+
+
+def field_instructions(document):
+    return [node.text for node in document.element.body.iter(qn("w:instrText"))]
+
+
+def test_entries_link_to_bookmarked_headings_within_the_levels():
+    document = Document()
+    toc = TableOfContents(document)
+    toc.insert_placeholder()
+    toc.add_heading("Costs", level=1)
+    toc.add_heading("Resource Costs", level=2)
+    toc.add_heading("Too deep", level=4)
+    toc.finalize()
+
+    anchors = [link.get(qn("w:anchor")) for link in document.element.body.iter(qn("w:hyperlink"))]
+    bookmarks = [mark.get(qn("w:name")) for mark in document.element.body.iter(qn("w:bookmarkStart"))]
+    assert [text for _, text, _ in toc.entries] == ["Costs", "Resource Costs"]
+    assert anchors == bookmarks == ["_Toc70000", "_Toc70001"]
+    assert field_instructions(document) == [' TOC \\o "1-3" \\h \\z \\n ']
+
+
+def test_finalize_rewrites_the_toc_instead_of_duplicating_it():
+    document = Document()
+    toc = TableOfContents(document)
+    toc.insert_placeholder()
+    toc.add_heading("Executive Summary")
+    toc.finalize()
+    toc.add_heading("Scope")
+    toc.finalize()
+
+    entries = [link for link in document.element.body.iter(qn("w:hyperlink"))]
+    assert len(entries) == 2
+    assert len(field_instructions(document)) == 1
@@ -0,0 +1,139 @@
+"""
+Table of contents for generated documents.
+
+Headings are bookmarked and recorded as they are added, so the TOC is written
+from that list when the document is finalized, without parsing the document
+again. The result is a real Word TOC field (``TOC \\o "1-3" \\h \\z \\n``)
+whose cached result already holds a hyperlinked entry per heading: the
+document is complete when saved and needs no "Update Field" in Word. Page
+numbers are omitted (``\\n``) because they depend on Word's layout.
+"""
+from typing import List, Optional, Tuple
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+TOC_LEVELS = (1, 3)
+BOOKMARK_PREFIX = "_Toc"
+# Kept clear of ids a template may already use, so no scan of the body is needed
+BOOKMARK_ID_BASE = 70000
+INDENT_TWIPS = 360
+
+
+def _field_char(kind: str):
+    run = OxmlElement('w:r')
+    fld_char = OxmlElement('w:fldChar')
+    fld_char.set(qn('w:fldCharType'), kind)
+    run.append(fld_char)
+    return run
+
+
+def _instruction(text: str):
+    run = OxmlElement('w:r')
+    instr = OxmlElement('w:instrText')
+    instr.set(qn('xml:space'), 'preserve')
+    instr.text = text
+    run.append(instr)
+    return run
+
+
+class TableOfContents:
+    def __init__(self, document, levels: Tuple[int, int] = TOC_LEVELS):
+        self.document = document
+        self.levels = levels
+        self.entries: List[Tuple[int, str, str]] = []  # (level, text, bookmark)
+        self._placeholder = None
+        self._written = []
+
+    @property
+    def instruction(self) -> str:
+        return f' TOC \\o "{self.levels[0]}-{self.levels[1]}" \\h \\z \\n '
+
+    def insert_placeholder(self):
+        """Mark where the TOC goes; it is filled in by finalize"""
+        self._placeholder = self.document.add_paragraph()
+        return self._placeholder
+
+    def add_heading(self, text: str, level: int = 1):
+        """Add a heading, bookmark it and record it for the TOC"""
+        return self.record(self.document.add_heading(text, level=level), text, level)
+
+    def record(self, paragraph, text: str, level: int):
+        """Bookmark an already added heading paragraph and record it for the TOC"""
+        if self.levels[0] <= level <= self.levels[1]:
+            bookmark_id = str(BOOKMARK_ID_BASE + len(self.entries))
+            name = f"{BOOKMARK_PREFIX}{bookmark_id}"
+            start = OxmlElement('w:bookmarkStart')
+            start.set(qn('w:id'), bookmark_id)
+            start.set(qn('w:name'), name)
+            end = OxmlElement('w:bookmarkEnd')
+            end.set(qn('w:id'), bookmark_id)
+            p = paragraph._p
+            # After pPr, so the paragraph properties stay first
+            if p.pPr is not None:
+                p.pPr.addnext(start)
+            else:
+                p.insert(0, start)
+            p.append(end)
+            self.entries.append((level, text, name))
+        return paragraph
+
+    def _entry_style_ids(self):
+        style_ids = {}
+        for style in self.document.styles:
+            if style.name and style.name.startswith('TOC '):
+                style_ids[style.name] = style.style_id
+        return style_ids
+
+    def _entry_paragraph(self, level: int, text: str, bookmark: str, style_id: Optional[str]):
+        p = OxmlElement('w:p')
+        pPr = OxmlElement('w:pPr')
+        if style_id:
+            p_style = OxmlElement('w:pStyle')
+            p_style.set(qn('w:val'), style_id)
+            pPr.append(p_style)
+        else:
+            ind = OxmlElement('w:ind')
+            ind.set(qn('w:left'), str(INDENT_TWIPS * (level - self.levels[0])))
+            pPr.append(ind)
+        p.append(pPr)
+
+        hyperlink = OxmlElement('w:hyperlink')
+        hyperlink.set(qn('w:anchor'), bookmark)
+        hyperlink.set(qn('w:history'), '1')
+        run = OxmlElement('w:r')
+        t = OxmlElement('w:t')
+        t.set(qn('xml:space'), 'preserve')
+        t.text = text
+        run.append(t)
+        hyperlink.append(run)
+        p.append(hyperlink)
+        return p
+
+    def finalize(self):
+        """Write the TOC field and its entries at the placeholder; safe to call before every save"""
+        if self._placeholder is None:
+            return
+        for element in self._written:
+            element.getparent().remove(element)
+        self._written = []
+
+        style_ids = self._entry_style_ids()
+        paragraphs = [
+            self._entry_paragraph(level, text, bookmark, style_ids.get(f'TOC {level}'))
+            for level, text, bookmark in self.entries
+        ]
+        anchor = self._placeholder._p
+        for p in paragraphs:
+            anchor.addprevious(p)
+
+        # Field begins in the first entry and ends in the placeholder paragraph
+        first = paragraphs[0] if paragraphs else anchor
+        field_start = [_field_char('begin'), _instruction(self.instruction), _field_char('separate')]
+        position = 1 if first.pPr is not None else 0
+        for offset, run in enumerate(field_start):
+            first.insert(position + offset, run)
+        field_end = _field_char('end')
+        anchor.append(field_end)
+
+        self._written = paragraphs + ([] if paragraphs else field_start) + [field_end]